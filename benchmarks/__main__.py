@@ -0,0 +1,61 @@
+"""Runs the benchmark suites.
+
+    python -m benchmarks [--suite settings] [--size small] [--rounds 20]
+        [--json results.json] [--compare baseline.json]
+
+Write the results of one version with `--json`, then run another version with
+`--compare` to see the relative change of each benchmark. The exit code is 1 if any
+benchmark is slower than the baseline by more than the threshold.
+"""
+
+import argparse
+import sys
+
+from . import file_sources, merge, settings
+from .common import compare_results, load_results, print_results, write_results
+
+SUITES = {
+    "settings": lambda sizes, rounds: settings.run(sizes, rounds),
+    "merge": lambda sizes, rounds: merge.run(sizes, rounds),
+    "file_sources": lambda sizes, rounds: file_sources.run(rounds=rounds),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--suite", action="append", dest="suites", choices=list(SUITES))
+    parser.add_argument(
+        "--size",
+        action="append",
+        dest="sizes",
+        choices=list(settings.SIZES),
+        help="Sizes of the settings and merge suites",
+    )
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--json", help="Write the results to a JSON file")
+    parser.add_argument("--compare", help="Compare with the results in a JSON file")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.2,
+        help="Ratio to the baseline median above which a benchmark is a regression",
+    )
+    args = parser.parse_args()
+
+    results = []
+    for suite in args.suites or SUITES:
+        results.extend(SUITES[suite](args.sizes, args.rounds))
+    print_results(results)
+    if args.json:
+        write_results(results, args.json)
+    if args.compare:
+        print()
+        regressions = compare_results(
+            load_results(args.compare), results, args.threshold
+        )
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+import json
+import platform
+import statistics
+import subprocess
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from importlib import metadata
+from typing import Any, Callable, Dict, List, Optional
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    # Seconds per call
+    best: float
+    median: float
+    rounds: int
+    params: Optional[Dict[str, Any]] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def measure(
+    name: str,
+    func: Callable[[], Any],
+    rounds: int = 20,
+    setup: Optional[Callable[[], Any]] = None,
+    **params,
+) -> BenchmarkResult:
+    """Time `rounds` calls of a function. `setup` is called before every round, and is
+    not included in the timing.
+    """
+    timings = []
+    for _ in range(rounds):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return BenchmarkResult(
+        name=name,
+        best=min(timings),
+        median=statistics.median(timings),
+        rounds=rounds,
+        params=params or None,
+    )
+
+
+def print_results(results: List[BenchmarkResult]) -> None:
+    width = max(len(result.name) for result in results)
+    print(f"{'benchmark':<{width}}  {'best (ms)':>10}  {'median (ms)':>12}")
+    for result in results:
+        print(
+            f"{result.name:<{width}}  {result.best * 1000:>10.3f}"
+            f"  {result.median * 1000:>12.3f}"
+        )
+
+
+def get_environment() -> Dict[str, Any]:
+    """Describe what the results were measured on, so that runs can be matched up."""
+    try:
+        version: Optional[str] = metadata.version("bingqilin")
+    except metadata.PackageNotFoundError:
+        version = None
+    try:
+        revision: Optional[str] = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = None
+    return {
+        "bingqilin": version,
+        "revision": revision,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def write_results(results: List[BenchmarkResult], path: str) -> None:
+    with open(path, "w") as results_file:
+        json.dump(
+            {
+                "environment": get_environment(),
+                "results": [result.to_dict() for result in results],
+            },
+            results_file,
+            indent=2,
+        )
+
+
+def load_results(path: str) -> List[BenchmarkResult]:
+    with open(path) as results_file:
+        data = json.load(results_file)
+    # Results files written before the environment was recorded are a plain list
+    if isinstance(data, dict):
+        data = data["results"]
+    return [BenchmarkResult(**result) for result in data]
+
+
+def compare_results(
+    baseline: List[BenchmarkResult],
+    results: List[BenchmarkResult],
+    threshold: float = 1.2,
+) -> List[str]:
+    """Print the median of each result relative to the baseline result of the same
+    name and params.
+
+    Returns:
+        List[str]: Names of the results that are slower than the baseline by more than
+        the threshold ratio
+    """
+
+    def key(result: BenchmarkResult):
+        return result.name, json.dumps(result.params, sort_keys=True)
+
+    baseline_by_key = {key(result): result for result in baseline}
+    width = max(len(result.name) for result in results)
+    print(f"{'benchmark':<{width}}  {'baseline (ms)':>13}  {'median (ms)':>12}  ratio")
+    regressions = []
+    for result in results:
+        previous = baseline_by_key.get(key(result))
+        if previous is None or not previous.median:
+            continue
+        ratio = result.median / previous.median
+        flag = ""
+        if ratio > threshold:
+            flag = "  slower"
+            regressions.append(result.name)
+        print(
+            f"{result.name:<{width}}  {previous.median * 1000:>13.3f}"
+            f"  {result.median * 1000:>12.3f}  {ratio:.2f}x{flag}"
+        )
+    return regressions
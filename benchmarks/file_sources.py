@@ -0,0 +1,125 @@
+"""Compares the load times of the file-based settings sources on a large config.
+
+    python -m benchmarks.file_sources [--sections 500] [--keys 20] [--json out.json]
+
+"cold" loads parse every file, while "cached" loads are served from the parsed file
+cache (see `bingqilin.conf.cache`).
+"""
+
+import argparse
+import json
+import tempfile
+import warnings
+from configparser import ConfigParser
+from pathlib import Path
+from typing import Any, Dict, List
+
+import yaml
+
+from bingqilin.conf.cache import parsed_file_cache
+from bingqilin.conf.models import ConfigModel
+from bingqilin.conf.sources import (
+    IniSettingsSource,
+    JsonSettingsSource,
+    TomlSettingsSource,
+    YamlSettingsSource,
+)
+
+from .common import BenchmarkResult, measure, print_results, write_results
+
+
+def make_config(sections: int, keys: int) -> Dict[str, Dict[str, Any]]:
+    config: Dict[str, Dict[str, Any]] = {}
+    for section in range(sections):
+        values: Dict[str, Any] = {}
+        for key in range(keys):
+            values[f"key_{key}"] = f"value {section}-{key}" if key % 2 else key
+        config[f"section_{section}"] = values
+    return config
+
+
+def _toml_value(value: Any) -> str:
+    return json.dumps(value)
+
+
+def write_files(config: Dict[str, Dict[str, Any]], directory: Path) -> Dict[str, Path]:
+    paths = {
+        "ini": directory / "settings.ini",
+        "yaml": directory / "settings.yaml",
+        "json": directory / "settings.json",
+        "toml": directory / "settings.toml",
+    }
+    parser = ConfigParser()
+    parser.read_dict(
+        {
+            section: {key: str(value) for key, value in values.items()}
+            for section, values in config.items()
+        }
+    )
+    with open(paths["ini"], "w") as ini_file:
+        parser.write(ini_file)
+    paths["yaml"].write_text(yaml.safe_dump(config))
+    paths["json"].write_text(json.dumps(config))
+    paths["toml"].write_text(
+        "\n".join(
+            f"[{section}]\n"
+            + "\n".join(
+                f"{key} = {_toml_value(value)}" for key, value in values.items()
+            )
+            + "\n"
+            for section, values in config.items()
+        )
+    )
+    return paths
+
+
+def run(sections: int = 500, keys: int = 20, rounds: int = 20) -> List[BenchmarkResult]:
+    config = make_config(sections, keys)
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write_files(config, Path(directory))
+        loaders = {
+            "ini": lambda: IniSettingsSource(ConfigModel, files=[paths["ini"]]),
+            "yaml": lambda: YamlSettingsSource(ConfigModel, files=[paths["yaml"]]),
+            "json": lambda: JsonSettingsSource(ConfigModel, files=[paths["json"]]),
+            "toml": lambda: TomlSettingsSource(ConfigModel, files=[paths["toml"]]),
+        }
+        with warnings.catch_warnings():
+            # YamlSettingsSource is deprecated
+            warnings.simplefilter("ignore", DeprecationWarning)
+            for name, loader in loaders.items():
+                params = {"sections": sections, "keys": keys}
+                results.append(
+                    measure(
+                        f"file_sources.{name}.cold",
+                        loader,
+                        rounds=rounds,
+                        setup=parsed_file_cache.invalidate,
+                        **params,
+                    )
+                )
+                loader()
+                results.append(
+                    measure(
+                        f"file_sources.{name}.cached", loader, rounds=rounds, **params
+                    )
+                )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sections", type=int, default=500)
+    parser.add_argument("--keys", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--json", help="Write the results to a JSON file")
+    args = parser.parse_args()
+
+    results = run(args.sections, args.keys, args.rounds)
+    print_results(results)
+    if args.json:
+        write_results(results, args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Measures `bingqilin.utils.dict.merge` on generated nested dicts.
+
+    python -m benchmarks.merge [--size small] [--rounds 20] [--json out.json]
+
+Each size merges an override dict into a copy of a base dict with `width` keys on
+every level, nested `depth` levels deep. The override replaces half of the leaves.
+Each sequence merge strategy is measured, as well as strategies set for specific paths.
+"""
+
+import argparse
+import copy
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+from bingqilin.utils.dict import (
+    SEQUENCE_MERGE_STRATEGY,
+    SequenceMergeStrategies,
+    merge,
+)
+
+from .common import BenchmarkResult, measure, print_results, write_results
+
+
+@dataclass(frozen=True)
+class TreeSize:
+    # Keys on each level
+    width: int
+    # Levels of nested dicts
+    depth: int
+
+
+SIZES = {
+    "small": TreeSize(width=10, depth=2),
+    "medium": TreeSize(width=10, depth=4),
+    "large": TreeSize(width=6, depth=6),
+}
+
+
+def make_tree(width: int, depth: int, seed: int = 0) -> Dict[str, Any]:
+    if depth <= 1:
+        return {
+            f"key_{key}": [seed, key] if key % 3 == 0 else f"value {seed}-{key}"
+            for key in range(width)
+        }
+    return {
+        f"key_{key}": make_tree(width, depth - 1, seed * width + key)
+        for key in range(width)
+    }
+
+
+def make_override(tree: Dict[str, Any]) -> Dict[str, Any]:
+    override: Dict[str, Any] = {}
+    for index, (key, value) in enumerate(tree.items()):
+        if isinstance(value, dict):
+            override[key] = make_override(value)
+        elif index % 2 == 0:
+            override[key] = [index] if isinstance(value, list) else f"new {value}"
+    return override
+
+
+def run_size(size_name: str, size: TreeSize, rounds: int) -> List[BenchmarkResult]:
+    base = make_tree(size.width, size.depth)
+    override = make_override(base)
+    results = []
+    for strategy in SEQUENCE_MERGE_STRATEGY:
+        params = {"size": size_name, **asdict(size), "strategy": strategy.value}
+        # merge() updates the base dict in place, so every round gets a fresh copy
+        copies: List[Dict[str, Any]] = []
+        results.append(
+            measure(
+                f"merge.{size_name}.{strategy.value}",
+                lambda: merge(copies.pop(), override, sequence_merge_strategy=strategy),
+                rounds=rounds,
+                setup=lambda: copies.append(copy.deepcopy(base)),
+                **params,
+            )
+        )
+
+    # Strategies for specific paths, compiled once and reused for every round
+    strategies = SequenceMergeStrategies(
+        {
+            ("*",) * (size.depth - 1): SEQUENCE_MERGE_STRATEGY.UNIQUE,
+            "key_0": SEQUENCE_MERGE_STRATEGY.CONCATENATE,
+        }
+    )
+    copies = []
+    results.append(
+        measure(
+            f"merge.{size_name}.paths",
+            lambda: merge(copies.pop(), override, sequence_merge_strategies=strategies),
+            rounds=rounds,
+            setup=lambda: copies.append(copy.deepcopy(base)),
+            size=size_name,
+            **asdict(size),
+        )
+    )
+    return results
+
+
+def run(
+    sizes: Optional[Sequence[str]] = None, rounds: int = 20
+) -> List[BenchmarkResult]:
+    results = []
+    for size_name in sizes or SIZES:
+        results.extend(run_size(size_name, SIZES[size_name], rounds))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", action="append", dest="sizes", choices=list(SIZES))
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--json", help="Write the results to a JSON file")
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.rounds)
+    print_results(results)
+    if args.json:
+        write_results(results, args.json)
+
+
+if __name__ == "__main__":
+    main()
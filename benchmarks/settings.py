@@ -0,0 +1,249 @@
+"""Measures loading and reloading synthetic settings models of several sizes.
+
+    python -m benchmarks.settings [--size small] [--rounds 20] [--json out.json]
+
+Each size generates a `ConfigModel` subclass with a number of sections (submodels
+nested `depth` levels deep, with `fields` fields each) and database entries, and a
+JSON file with values for all of them.
+"""
+
+import argparse
+import json
+import statistics
+import tempfile
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Type
+
+from pydantic import BaseModel, create_model
+
+from bingqilin.conf import SettingsManager
+from bingqilin.conf.cache import parsed_file_cache
+from bingqilin.conf.models import ConfigModel, ConfigModelConfigDict
+from bingqilin.conf.sources import JsonSettingsSource
+
+from .common import BenchmarkResult, measure, print_results, write_results
+
+
+@dataclass(frozen=True)
+class ConfigSize:
+    # Top-level submodel fields
+    sections: int
+    # Scalar fields in each submodel
+    fields: int
+    # Levels of submodels in each section (1 is a section without child submodels)
+    depth: int
+    # Entries in the `databases` field
+    databases: int
+
+
+SIZES = {
+    "small": ConfigSize(sections=5, fields=10, depth=1, databases=2),
+    "medium": ConfigSize(sections=25, fields=20, depth=2, databases=10),
+    "large": ConfigSize(sections=100, fields=20, depth=3, databases=50),
+}
+
+
+def make_section_model(name: str, fields: int, depth: int) -> Type[BaseModel]:
+    definitions: Dict[str, Any] = {}
+    for index in range(fields):
+        if index % 2:
+            definitions[f"field_{index}"] = (str, "")
+        else:
+            definitions[f"field_{index}"] = (int, 0)
+    if depth > 1:
+        child = make_section_model(f"{name}Child", fields, depth - 1)
+        definitions["child"] = (child, child())
+    return create_model(name, **definitions)
+
+
+def make_section_values(fields: int, depth: int, seed: int) -> Dict[str, Any]:
+    values: Dict[str, Any] = {
+        f"field_{index}": f"value {seed}-{index}" if index % 2 else seed + index
+        for index in range(fields)
+    }
+    if depth > 1:
+        values["child"] = make_section_values(fields, depth - 1, seed + 1)
+    return values
+
+
+def make_values(size: ConfigSize) -> Dict[str, Any]:
+    values: Dict[str, Any] = {
+        f"section_{section}": make_section_values(size.fields, size.depth, section)
+        for section in range(size.sections)
+    }
+    values["databases"] = {
+        f"db_{index}": {
+            "type": "sqlalchemy",
+            "url": f"postgresql://localhost:5432/db_{index}",
+        }
+        for index in range(size.databases)
+    }
+    return values
+
+
+def make_config_model(size: ConfigSize, json_file: Path) -> Type[ConfigModel]:
+    """Generate a `ConfigModel` subclass of the given size that reads its values from
+    a JSON file.
+    """
+    sections: Dict[str, Any] = {}
+    for section in range(size.sections):
+        model = make_section_model(f"Section{section}", size.fields, size.depth)
+        sections[f"section_{section}"] = (model, model())
+    base = create_model("SyntheticSections", __base__=ConfigModel, **sections)
+
+    class SyntheticConfig(base):  # type: ignore
+        model_config = ConfigModelConfigDict(json_files=[str(json_file)])
+
+        @classmethod
+        def add_settings_sources(cls, settings_cls):
+            return (JsonSettingsSource(settings_cls),)
+
+    return SyntheticConfig
+
+
+def make_settings_manager(
+    config_model: Type[ConfigModel], reuse_unchanged_sections: bool = False
+) -> SettingsManager:
+    manager_class = type(
+        "SyntheticSettings",
+        (SettingsManager,),
+        {
+            "__annotations__": {"data": config_model},
+            "reuse_unchanged_sections": reuse_unchanged_sections,
+        },
+    )
+    return manager_class()
+
+
+def measure_sources(
+    name: str, manager: SettingsManager, rounds: int, **params
+) -> List[BenchmarkResult]:
+    """Time each settings source separately, by profiling `rounds` loads."""
+    durations: Dict[str, List[float]] = {}
+    for _ in range(rounds):
+        profile = manager.profile_load()
+        for timing in profile.sources:
+            durations.setdefault(timing.name, []).append(timing.duration)
+    return [
+        BenchmarkResult(
+            name=f"{name}.{source_name}",
+            best=min(timings),
+            median=statistics.median(timings),
+            rounds=rounds,
+            params=params or None,
+        )
+        for source_name, timings in durations.items()
+    ]
+
+
+def run_size(
+    size_name: str, size: ConfigSize, directory: Path, rounds: int
+) -> List[BenchmarkResult]:
+    params = {"size": size_name, **asdict(size)}
+    prefix = f"settings.{size_name}"
+    json_file = directory / f"settings_{size_name}.json"
+    values = make_values(size)
+    json_file.write_text(json.dumps(values))
+    config_model = make_config_model(size, json_file)
+    results = []
+
+    results.append(
+        measure(
+            f"{prefix}.cold_load",
+            lambda: make_settings_manager(config_model).load(allow_reconfigure=False),
+            rounds=rounds,
+            setup=parsed_file_cache.invalidate,
+            **params,
+        )
+    )
+
+    manager = make_settings_manager(config_model).load(allow_reconfigure=False)
+    results.append(
+        measure(f"{prefix}.reload", manager.reconfigure, rounds=rounds, **params)
+    )
+
+    # Reloads after one value in one section changed, with and without reusing the
+    # unchanged sections
+    changes = {"count": 0}
+
+    def change_one_value():
+        changes["count"] += 1
+        values["section_0"]["field_0"] = changes["count"]
+        json_file.write_text(json.dumps(values))
+        parsed_file_cache.invalidate()
+
+    for name, reuse in (("reload_changed", False), ("reload_changed.reuse", True)):
+        manager = make_settings_manager(config_model, reuse).load(
+            allow_reconfigure=False
+        )
+        results.append(
+            measure(
+                f"{prefix}.{name}",
+                manager.reconfigure,
+                rounds=rounds,
+                setup=change_one_value,
+                **params,
+            )
+        )
+
+    results.extend(measure_sources(f"{prefix}.source", manager, rounds, **params))
+
+    databases = manager.data.databases
+    names = list(databases)
+    access_params = {**params, "accesses": len(names)}
+
+    def attribute_access():
+        for db_name in names:
+            getattr(databases, db_name)
+
+    def item_access():
+        for db_name in names:
+            databases[db_name]
+
+    results.append(
+        measure(
+            f"{prefix}.databases.attribute_access",
+            attribute_access,
+            rounds=rounds,
+            **access_params,
+        )
+    )
+    results.append(
+        measure(
+            f"{prefix}.databases.item_access",
+            item_access,
+            rounds=rounds,
+            **access_params,
+        )
+    )
+    return results
+
+
+def run(
+    sizes: Optional[Sequence[str]] = None, rounds: int = 20
+) -> List[BenchmarkResult]:
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for size_name in sizes or SIZES:
+            results.extend(
+                run_size(size_name, SIZES[size_name], Path(directory), rounds)
+            )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", action="append", dest="sizes", choices=list(SIZES))
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--json", help="Write the results to a JSON file")
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.rounds)
+    print_results(results)
+    if args.json:
+        write_results(results, args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,14 @@
+import asyncio
 import json
 from contextlib import asynccontextmanager
 from typing import Callable, Optional
 
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, HTTPException, Request, status
 from fastapi.exception_handlers import request_validation_exception_handler
 from fastapi.exceptions import RequestValidationError
 from pydantic import BaseModel
 
+from bingqilin.broadcast import ReconfigureBroadcaster, broadcaster
 from bingqilin.conf.models import ConfigModel, DEFAULT_RECONFIGURE_URL
 from bingqilin.conf.openapi import add_config_model_to_openapi
 from bingqilin.contexts import LifespanContext
@@ -23,6 +25,15 @@ def contexts_lifespan(
     **all_ctx_kwargs,
 ) -> Callable:
     """Convenience lifespan function to setup and teardown context objects.
+    All contexts are configured and warmed up concurrently before the app starts
+    serving requests, and are terminated concurrently
+    within the timeouts configured on each context.
+
+    Signals for reconfigure handlers are delivered through the app's event loop while
+    it is running.
+
+    If a context fails to configure or warm up, the contexts that were configured are
+    terminated in reverse order before the error is raised.
 
     Args:
         settings_data (Optional[BaseModel], optional): The settings instance passed in
@@ -34,16 +45,35 @@ def contexts_lifespan(
 
     @asynccontextmanager
     async def lifespan(_: FastAPI):
+        dispatcher.attach_loop()
+        configures = []
         for ctx in contexts:
             ctx_field_kwargs = {}
             if ctx.name:
                 ctx_field_kwargs = all_ctx_kwargs.get(ctx.name) or {}
-            ctx.configure(settings_data, **ctx_field_kwargs)
+            configures.append(ctx.aconfigure(settings_data, **ctx_field_kwargs))
+        results = await asyncio.gather(*configures, return_exceptions=True)
+        configured = [
+            ctx
+            for ctx, result in zip(contexts, results)
+            if not isinstance(result, BaseException)
+        ]
+        try:
+            for result in results:
+                if isinstance(result, BaseException):
+                    raise result
+            await asyncio.gather(*(ctx.awarmup() for ctx in contexts))
+        except BaseException:
+            # Close the clients of the contexts that did start, since the app won't
+            for ctx in reversed(configured):
+                await ctx.aterminate()
+            dispatcher.detach_loop()
+            raise
 
         yield
 
-        for ctx in contexts:
-            ctx.terminate()
+        await asyncio.gather(*(ctx.aterminate() for ctx in contexts))
+        dispatcher.detach_loop()
 
     return lifespan
 
@@ -56,12 +86,82 @@ async def log_validation_exception(request: Request, exc: RequestValidationError
 
 
 async def reconfigure_handler() -> dict:
-    dispatcher.dispatch_handlers(RECONFIGURE_SIGNAL)
-    return {}
+    """Queue a reconfigure and return right away. Requests made while a reconfigure is
+    still waiting to start are coalesced into the same job.
+
+    If reconfigures are broadcast, the reconfigure is applied in every worker on the
+    host instead, and the response reports how many of them applied it.
+    """
+    if broadcaster.running:
+        # Broadcasting locks and writes the generation file, so it's done off the loop
+        generation = await asyncio.to_thread(broadcaster.broadcast)
+        status = await broadcaster.wait_for_workers(
+            generation, broadcaster.wait_timeout
+        )
+        return status.to_dict()
+
+    dispatcher.attach_loop()
+    job = dispatcher.request_dispatch(RECONFIGURE_SIGNAL)
+    return job.to_dict()
+
+
+async def reconfigure_status_handler(job_id: str) -> dict:
+    if not (job := dispatcher.get_job(job_id)):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f'Reconfigure job "{job_id}" not found.',
+        )
+    return job.to_dict()
+
+
+async def broadcast_status_handler(generation: int) -> dict:
+    return (await asyncio.to_thread(broadcaster.status, generation)).to_dict()
 
 
 def add_reconfigure_handler(path: str, app: FastAPI):
-    app.router.post(path)(reconfigure_handler)
+    app.router.post(path, status_code=status.HTTP_202_ACCEPTED)(reconfigure_handler)
+    app.router.get(path.rstrip("/") + "/{job_id}")(reconfigure_status_handler)
+
+
+def add_reconfigure_broadcast(
+    path: str,
+    app: FastAPI,
+    directory: Optional[str] = None,
+    timeout: float = ReconfigureBroadcaster.wait_timeout,
+    name: Optional[str] = None,
+    master_pid: Optional[int] = None,
+):
+    """Broadcast reconfigures requested at `path` to every worker on the host. Each
+    worker starts watching for broadcasts when the app starts up, which happens after
+    the worker is forked.
+
+    The workers share `directory`, or a temp directory for the app's `name` and the
+    `master_pid` of the server process (see `default_broadcast_dir()`).
+    """
+    if not (directory or name):
+        raise ValueError(
+            "A name for the app or a directory is required to broadcast reconfigures."
+        )
+    broadcaster.directory = directory
+    broadcaster.name = name
+    broadcaster.master_pid = master_pid
+    broadcaster.wait_timeout = timeout
+
+    app_lifespan = app.router.lifespan_context
+
+    @asynccontextmanager
+    async def lifespan(_app: FastAPI):
+        broadcaster.start()
+        try:
+            async with app_lifespan(_app) as state:
+                yield state
+        finally:
+            broadcaster.stop()
+
+    app.router.lifespan_context = lifespan
+    app.router.get(path.rstrip("/") + "/generations/{generation}")(
+        broadcast_status_handler
+    )
 
 
 def setup_utils(
@@ -70,6 +170,7 @@ def setup_utils(
     log_validation_errors: bool = True,
     allow_reconfigure: bool = True,
     reconfigure_url: str = DEFAULT_RECONFIGURE_URL,
+    reconfigure_broadcast: bool = False,
 ):
     """
     Initializes all the default utilities of bingqilin.
@@ -88,6 +189,21 @@ def setup_utils(
     ):
         add_reconfigure_handler(_reconfigure_url, app)
 
+        if reconfigure_broadcast or (
+            settings_data and settings_data.reconfigure_broadcast
+        ):
+            add_reconfigure_broadcast(
+                _reconfigure_url,
+                app,
+                directory=settings_data and settings_data.reconfigure_broadcast_dir,
+                timeout=(
+                    settings_data.reconfigure_broadcast_timeout
+                    if settings_data
+                    else ReconfigureBroadcaster.wait_timeout
+                ),
+                name=settings_data and settings_data.get_reconfigure_broadcast_name(),
+            )
+
     # This feature is exclusive to ConfigModels
     if settings_data and settings_data.add_config_model_schema:
         add_config_model_to_openapi(
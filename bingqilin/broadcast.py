@@ -0,0 +1,287 @@
+import asyncio
+import fcntl
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterator, List, Optional
+
+from bingqilin.logger import bq_logger
+from bingqilin.signal import (
+    RECONFIGURE_SIGNAL,
+    DispatchJobStatus,
+    SignalHandlerDispatcher,
+    dispatcher,
+)
+
+logger = bq_logger.getChild("broadcast")
+
+GENERATION_FILE = "generation"
+LOCK_FILE = "lock"
+WORKER_FILE_PREFIX = "worker-"
+ACK_FILE_PREFIX = "ack-"
+
+
+def default_broadcast_dir(name: str, master_pid: Optional[int] = None) -> str:
+    """Get a directory in the system temp dir for the workers of an app. It is keyed on
+    the app's name and the pid of the server process that forked the workers
+    (gunicorn, uvicorn --workers), so that other apps started by the same process don't
+    share it.
+
+    Args:
+        name (str): A name that identifies the app
+        master_pid (Optional[int], optional): Pid of the server process. Defaults to
+            the parent of the current process.
+    """
+    if master_pid is None:
+        master_pid = os.getppid()
+    safe_name = re.sub(r"[^A-Za-z0-9_.-]", "_", name)
+    return os.path.join(
+        tempfile.gettempdir(), f"bingqilin-broadcast-{safe_name}-{master_pid}"
+    )
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _write_atomic(path: str, data: str) -> None:
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(fd, "w") as tmp_file:
+        tmp_file.write(data)
+    os.replace(tmp_path, path)
+
+
+@dataclass
+class BroadcastStatus:
+    """How many of the live workers on the host have applied a broadcast generation."""
+
+    generation: int
+    workers: int = 0
+    applied: int = 0
+    failed: Dict[int, Optional[str]] = field(default_factory=dict)
+    pending: List[int] = field(default_factory=list)
+
+    @property
+    def done(self) -> bool:
+        return not self.pending
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class ReconfigureBroadcaster:
+    """Fans a reconfigure out to every worker process on the host, without a broker.
+
+    Workers share a directory that holds a generation counter. A broadcast increments
+    the counter, and each worker polls it from a background thread. When a worker sees
+    a newer generation, it runs its reconfigure handlers through the dispatcher and
+    writes the generation it applied to its own ack file. Since workers only act on the
+    latest generation, broadcasts made while a worker is busy are coalesced.
+    """
+
+    # Seconds between checks of the generation counter
+    poll_interval: float = 0.5
+    # Seconds that the reconfigure route waits for the workers to apply a broadcast
+    wait_timeout: float = 5.0
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        for_signal: int = RECONFIGURE_SIGNAL,
+        signal_dispatcher: SignalHandlerDispatcher = dispatcher,
+        name: Optional[str] = None,
+        master_pid: Optional[int] = None,
+    ) -> None:
+        self.directory = directory
+        # Used for the default directory, if `directory` isn't set
+        self.name = name
+        self.master_pid = master_pid
+        self.for_signal = for_signal
+        self.dispatcher = signal_dispatcher
+        self.applied_generation = 0
+        self._pid: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+
+    @property
+    def path(self) -> str:
+        if self.directory:
+            return self.directory
+        if not self.name:
+            raise ValueError(
+                "A name for the app or a directory is required to broadcast "
+                "reconfigures."
+            )
+        return default_broadcast_dir(self.name, self.master_pid)
+
+    @property
+    def running(self) -> bool:
+        # A thread started by a parent process does not exist in a forked child
+        return bool(self._thread and self._pid == os.getpid())
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        with open(self._file(LOCK_FILE), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def current_generation(self) -> int:
+        try:
+            with open(self._file(GENERATION_FILE)) as gen_file:
+                return int(gen_file.read() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def start(self) -> None:
+        """Register this process as a worker and start watching for broadcasts. The
+        current generation counts as applied, since the worker loaded its settings
+        after it was made.
+        """
+        if self.running:
+            return
+        os.makedirs(self.path, mode=0o700, exist_ok=True)
+        self._pid = os.getpid()
+        self._stop.clear()
+        self.applied_generation = self.current_generation()
+        self._write_ack(self.applied_generation, DispatchJobStatus.SUCCEEDED)
+        open(self._file(f"{WORKER_FILE_PREFIX}{self._pid}"), "a").close()
+        self._thread = threading.Thread(
+            target=self._watch, name="bingqilin-broadcast", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop watching for broadcasts and unregister this process as a worker."""
+        if not self.running:
+            return
+        self._stop.set()
+        self._wake.set()
+        assert self._thread
+        self._thread.join(self.poll_interval * 2)
+        self._thread = None
+        for prefix in (WORKER_FILE_PREFIX, ACK_FILE_PREFIX):
+            try:
+                os.remove(self._file(f"{prefix}{self._pid}"))
+            except FileNotFoundError:
+                pass
+
+    def broadcast(self) -> int:
+        """Request a reconfigure in every worker on the host.
+
+        Returns:
+            int: The new generation, which can be passed to `status()`
+        """
+        with self._locked():
+            generation = self.current_generation() + 1
+            _write_atomic(self._file(GENERATION_FILE), str(generation))
+        # Don't wait for the next poll to apply it in this process
+        self._wake.set()
+        return generation
+
+    def _watch(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                return
+            try:
+                self._apply_latest()
+            except Exception:
+                logger.exception("Failed to apply a reconfigure broadcast.")
+
+    def _apply_latest(self) -> None:
+        generation = self.current_generation()
+        if generation <= self.applied_generation:
+            return
+        logger.info(
+            "Applying reconfigure broadcast generation %s in worker %s.",
+            generation,
+            self._pid,
+        )
+        job = self.dispatcher.request_dispatch(self.for_signal)
+        job.wait()
+        self.applied_generation = generation
+        self._write_ack(generation, job.status, job.error)
+
+    def _write_ack(
+        self,
+        generation: int,
+        status: DispatchJobStatus,
+        error: Optional[str] = None,
+    ) -> None:
+        _write_atomic(
+            self._file(f"{ACK_FILE_PREFIX}{self._pid}"),
+            json.dumps({"generation": generation, "status": status, "error": error}),
+        )
+
+    def _read_ack(self, pid: int) -> Optional[dict]:
+        try:
+            with open(self._file(f"{ACK_FILE_PREFIX}{pid}")) as ack_file:
+                return json.load(ack_file)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def live_workers(self) -> List[int]:
+        """Get the pids of the registered workers, removing any that have exited."""
+        pids = []
+        for name in os.listdir(self.path):
+            if not name.startswith(WORKER_FILE_PREFIX):
+                continue
+            pid = int(name[len(WORKER_FILE_PREFIX) :])
+            if _pid_alive(pid):
+                pids.append(pid)
+                continue
+            for prefix in (WORKER_FILE_PREFIX, ACK_FILE_PREFIX):
+                try:
+                    os.remove(self._file(f"{prefix}{pid}"))
+                except FileNotFoundError:
+                    pass
+        return sorted(pids)
+
+    def status(self, generation: int) -> BroadcastStatus:
+        """Get how many live workers have applied a generation (or a later one)."""
+        status = BroadcastStatus(generation=generation)
+        for pid in self.live_workers():
+            status.workers += 1
+            ack = self._read_ack(pid)
+            if not ack or ack["generation"] < generation:
+                status.pending.append(pid)
+            elif ack["status"] == DispatchJobStatus.FAILED:
+                status.failed[pid] = ack.get("error")
+            else:
+                status.applied += 1
+        return status
+
+    async def wait_for_workers(
+        self, generation: int, timeout: Optional[float] = None
+    ) -> BroadcastStatus:
+        """Wait until every live worker has applied a generation, or the timeout
+        expires. The files are polled without blocking the event loop.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            status = await asyncio.to_thread(self.status, generation)
+            if status.done or (deadline and time.monotonic() >= deadline):
+                return status
+            await asyncio.sleep(min(0.05, self.poll_interval))
+
+
+broadcaster = ReconfigureBroadcaster()
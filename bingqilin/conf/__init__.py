@@ -1,23 +1,106 @@
+import threading
+import time
+import weakref
+from contextlib import ExitStack
+from dataclasses import asdict, dataclass, field
 from datetime import datetime
-from typing import Any, Self, Type
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Self, Type
 
 from pydantic_settings import BaseSettings
 
 from bingqilin.logger import bq_logger
-from bingqilin.signal import RECONFIGURE_SIGNAL, signal_handler
+from bingqilin.signal import RECONFIGURE_SIGNAL, SETTINGS_HANDLER_GROUP, dispatcher
 
 from .models import ConfigModel
+from .profile import SettingsLoadProfile, get_active_profile, profile_settings_load
+from .reuse import reuse_unchanged_sections
+from .snapshot import SettingsSnapshot
+from .sources import get_loaded_settings_sources, get_source_file_paths
+from .watch import SettingsFileWatcher
 
 logger = bq_logger.getChild("conf")
 
 
-class SettingsManager:
+@dataclass
+class ReconfigureTransaction:
+    """Outcome of reloading the settings and reconfiguring the contexts that use them.
+    If the transaction was not committed, the settings and contexts stayed on
+    `previous_generation`.
+    """
+
+    previous_generation: int
+    generation: int
+    committed: bool = False
+    # Configure results of each context, keyed by context name
+    contexts: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+    duration: float = 0.0
+    # Profile of the settings reload, if the settings manager profiles its loads
+    profile: Optional[Dict[str, Any]] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass(frozen=True)
+class SettingsGeneration:
+    """A pairing of a settings instance with the generation it was committed under.
+    Every commit publishes a new one, so holding on to one keeps a consistent view of
+    the settings, even if a reload happens in the meantime.
+
+    Only the pairing itself is frozen. `data` is the settings model instance, which is
+    not copied, and submodels of sections reused on reload (see
+    `reuse_unchanged_sections`) are shared with later generations. Treat it as
+    read-only.
+    """
+
     data: Any
-    last_loaded_at: datetime
+    # Incremented every time new settings are committed. The first load is generation 1.
+    generation: int
+    loaded_at: datetime
+
+
+class SettingsManager:
+    # The published settings. This is replaced in a single assignment when new
+    # settings are committed, so reading it never requires a lock.
+    current: Optional[SettingsGeneration] = None
+    watcher: Optional[SettingsFileWatcher] = None
+    last_transaction: Optional[ReconfigureTransaction] = None
+    # Cache of the values of remote settings sources (see `load()`)
+    snapshot: Optional[SettingsSnapshot] = None
+    # Profile every load and reload of the settings (see `load()`)
+    profile_loads: bool = False
+    last_profile: Optional[SettingsLoadProfile] = None
+    # On reload, reuse the submodels of the current settings for sections whose raw
+    # input did not change, instead of validating them again. Only applies to
+    # settings models that derive from `ConfigModel`.
+    reuse_unchanged_sections: bool = False
 
     def __init__(self) -> None:
         super().__init__()
         self._get_data_annotated_class()
+        self._settings_init_kwargs: Dict[str, Any] = {}
+        self._contexts: List[weakref.ref] = []
+        self._reconfigure_lock = threading.Lock()
+        self._dependency: Optional[Callable[[], Awaitable[SettingsGeneration]]] = None
+
+    def _get_current(self) -> SettingsGeneration:
+        if self.current is None:
+            raise AttributeError("The settings have not been loaded.")
+        return self.current
+
+    @property
+    def data(self) -> Any:
+        return self._get_current().data
+
+    @property
+    def generation(self) -> int:
+        return self.current.generation if self.current else 0
+
+    @property
+    def last_loaded_at(self) -> datetime:
+        return self._get_current().loaded_at
 
     def _get_data_annotated_class(self) -> Type[BaseSettings]:
         data_class = self.__annotations__.get("data")
@@ -30,19 +113,242 @@ class SettingsManager:
             )
         return data_class
 
-    def load(self, allow_reconfigure: bool = True, **settings_init_kwargs) -> Self:
-        data_class = self._get_data_annotated_class()
+    def load(
+        self,
+        allow_reconfigure: bool = True,
+        watch_files: bool = False,
+        snapshot: Optional[SettingsSnapshot] = None,
+        profile: Optional[bool] = None,
+        **settings_init_kwargs,
+    ) -> Self:
+        """Load the settings data.
 
-        def reload():
-            self.data = data_class(**settings_init_kwargs)
-            self.last_loaded_at = datetime.now()
+        Args:
+            allow_reconfigure (bool, optional): Reload the settings when the reconfigure
+            signal is received. Defaults to True.
+            watch_files (bool, optional): Reload the settings when any of the files
+            read by its settings sources change (see `watch()`). Defaults to False.
+            snapshot (Optional[SettingsSnapshot], optional): Serve the values of remote
+            settings sources from this snapshot until they expire. Reconfigures always
+            fetch them again. Defaults to None.
+            profile (Optional[bool], optional): Record how long each settings source
+            takes and which source supplied each field, for this load and every
+            reload. The latest profile is stored in `last_profile`. Defaults to None,
+            which keeps the current `profile_loads` setting.
 
-        reload()
+        Returns:
+            Self: The settings manager instance
+        """
+        self._settings_init_kwargs = settings_init_kwargs
+        if snapshot is not None:
+            self.snapshot = snapshot
+        if profile is not None:
+            self.profile_loads = profile
+        self._commit_data(self._build_data("load"))
 
+        reload_func: Callable[[], Any] = self.reconfigure
         if allow_reconfigure:
             # If a different settings model is being used, then assume that reconfiguring
             # is allowed (otherwise it can be disabled via the parameter)
             if not isinstance(self.data, ConfigModel) or self.data.allow_reconfigure:
-                signal_handler(RECONFIGURE_SIGNAL)(reload)
+                dispatcher.add_handler(
+                    RECONFIGURE_SIGNAL, self.reconfigure, group=SETTINGS_HANDLER_GROUP
+                )
+
+                def reload_func():
+                    # Go through the dispatcher, so that other handlers run as well
+                    dispatcher.request_dispatch(RECONFIGURE_SIGNAL)
+
+        if watch_files:
+            self.watch(reload_func)
 
         return self
+
+    def build_data(self, refresh_snapshot: bool = False) -> Any:
+        """Create and validate a new settings instance from the settings sources,
+        without replacing the current one.
+
+        Args:
+            refresh_snapshot (bool, optional): Fetch the values of remote sources even
+            if they are in the snapshot. Defaults to False.
+        """
+        data_class = self._get_data_annotated_class()
+        with ExitStack() as stack:
+            if self.snapshot:
+                stack.enter_context(
+                    self.snapshot.build(data_class, refresh=refresh_snapshot)
+                )
+            if self.reuse_unchanged_sections:
+                reuse = stack.enter_context(
+                    reuse_unchanged_sections(
+                        self.current.data if self.current else None
+                    )
+                )
+            data = data_class(**self._settings_init_kwargs)
+        if self.reuse_unchanged_sections and (profile := get_active_profile()):
+            profile.reused_fields = reuse.reused
+        return data
+
+    def _build_data(self, kind: str, refresh_snapshot: bool = False) -> Any:
+        if not self.profile_loads:
+            return self.build_data(refresh_snapshot=refresh_snapshot)
+        data_class = self._get_data_annotated_class()
+        with profile_settings_load(data_class, kind) as profile:
+            self.last_profile = profile
+            return self.build_data(refresh_snapshot=refresh_snapshot)
+
+    def profile_load(self) -> SettingsLoadProfile:
+        """Build a new settings instance with the settings sources (without replacing
+        the current one), and profile it.
+
+        Returns:
+            SettingsLoadProfile: How long each source took, and which source supplied
+            each field
+        """
+        data_class = self._get_data_annotated_class()
+        with profile_settings_load(data_class, "profile") as profile:
+            self.build_data()
+        return profile
+
+    def _commit_data(self, data: Any) -> None:
+        self.current = SettingsGeneration(
+            data=data, generation=self.generation + 1, loaded_at=datetime.now()
+        )
+        if self.profile_loads and self.last_profile:
+            self.last_profile.generation = self.generation
+            logger.info(
+                "Loaded settings generation %s in %.3fs (slowest sources: %s)",
+                self.generation,
+                self.last_profile.duration,
+                ", ".join(
+                    f"{timing.name} {timing.duration:.3f}s"
+                    for timing in self.last_profile.slowest_sources(3)
+                ),
+            )
+        if self.watcher:
+            self.watcher.paths = self.get_file_paths()
+
+    def dependency(self) -> Callable[[], Awaitable[SettingsGeneration]]:
+        """Get a FastAPI dependency that provides the current `SettingsGeneration`.
+        FastAPI resolves a dependency once per request, so every use of it in a request
+        gets the same generation, even if the settings are reloaded while the request
+        is handled. The dependency is a coroutine function, so FastAPI doesn't run it
+        in its threadpool:
+
+            @app.get("/items")
+            def get_items(
+                settings: SettingsGeneration = Depends(settings.dependency()),
+            ):
+                ...
+
+        Returns:
+            Callable[[], Awaitable[SettingsGeneration]]: The dependency function. The
+            same function is returned on every call.
+        """
+        if self._dependency is None:
+
+            async def get_settings() -> SettingsGeneration:
+                return self._get_current()
+
+            self._dependency = get_settings
+        return self._dependency
+
+    def add_context(self, context: Any) -> None:
+        """Reconfigure a context as part of every settings reload (see `reconfigure()`).
+        Contexts are held by weak reference.
+        """
+        if context not in self.get_contexts():
+            self._contexts.append(weakref.ref(context))
+
+    def get_contexts(self) -> List[Any]:
+        contexts = [ref() for ref in self._contexts]
+        self._contexts = [ref for ref, ctx in zip(self._contexts, contexts) if ctx]
+        return [ctx for ctx in contexts if ctx is not None]
+
+    def reconfigure(self) -> ReconfigureTransaction:
+        """Reload the settings and reconfigure the contexts that use them, as a single
+        transaction:
+
+        1. A new settings instance is built and validated.
+        2. Each context builds its new field values with the new settings, without
+           replacing its current ones (see `LifespanContext.prepare_configure()`).
+        3. Only if every step succeeds, the new settings are committed under the next
+           generation number, and each context swaps in its new values.
+
+        If anything fails, the values built so far are discarded, and the settings and
+        contexts stay on the current generation. The error is then raised.
+
+        Returns:
+            ReconfigureTransaction: The outcome of the transaction
+        """
+        with self._reconfigure_lock:
+            started = time.perf_counter()
+            transaction = ReconfigureTransaction(
+                previous_generation=self.generation, generation=self.generation
+            )
+            self.last_transaction = transaction
+            prepared = []
+            try:
+                data = self._build_data("reload", refresh_snapshot=True)
+                for context in self.get_contexts():
+                    prepared.append((context, context.prepare_configure(data)))
+            except Exception as exc:
+                for context, staged in prepared:
+                    context.discard_configure(staged)
+                transaction.error = repr(exc)
+                transaction.duration = time.perf_counter() - started
+                self._record_profile(transaction)
+                logger.error(
+                    "Reconfigure failed, rolled back to settings generation %s: %r",
+                    self.generation,
+                    exc,
+                )
+                raise
+
+            self._commit_data(data)
+            for context, staged in prepared:
+                result = context.commit_configure(staged)
+                transaction.contexts[str(context.name)] = asdict(result)
+            transaction.committed = True
+            transaction.generation = self.generation
+            transaction.duration = time.perf_counter() - started
+            self._record_profile(transaction)
+            logger.info(
+                "Committed settings generation %s (%s context(s) reconfigured).",
+                self.generation,
+                len(prepared),
+            )
+            return transaction
+
+    def _record_profile(self, transaction: ReconfigureTransaction) -> None:
+        if self.profile_loads and self.last_profile:
+            transaction.profile = self.last_profile.to_dict()
+
+    def get_file_paths(self) -> List[Path]:
+        """Get the files and directories read by the settings sources the last time
+        the settings were loaded.
+        """
+        paths = []
+        for source in get_loaded_settings_sources(type(self.data)):
+            for path in get_source_file_paths(source):
+                if path not in paths:
+                    paths.append(path)
+        return paths
+
+    def watch(self, on_change: Callable[[], Any], **watcher_kwargs) -> None:
+        """Call `on_change` when any of the files read by the settings sources (such as
+        ini, YAML, dotenv files, or a secrets directory) change. Changes are detected
+        in a background thread, and bursts of changes are debounced into one call.
+
+        Args:
+            on_change (Callable[[], Any]): Function that reloads the settings
+            watcher_kwargs: Options passed to `SettingsFileWatcher` (`debounce`,
+            `poll_interval`)
+        """
+        if self.watcher:
+            self.watcher.stop()
+        paths = self.get_file_paths()
+        if not paths:
+            logger.warning("No settings files found to watch.")
+        self.watcher = SettingsFileWatcher(paths, on_change, **watcher_kwargs)
+        self.watcher.start()
@@ -0,0 +1,97 @@
+import os
+import threading
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Tuple, Union
+
+from bingqilin.conf.watch import FileStat, _stat
+from bingqilin.logger import bq_logger
+
+logger = bq_logger.getChild("conf.cache")
+
+
+@dataclass
+class FileCacheStats:
+    hits: int = 0
+    misses: int = 0
+    entries: int = 0
+
+    def to_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+class ParsedFileCache:
+    """A process-wide cache of parsed settings files, so that file-based settings
+    sources don't parse the same file again every time they are created (for
+    example, on every reload).
+
+    Entries are keyed by the file's absolute path and the parser used, and are only
+    reused while the file's mtime, size, and inode are unchanged. Parsed data is shared
+    between every source that reads the file, so it must be treated as read-only.
+    """
+
+    def __init__(self) -> None:
+        self._entries: Dict[Tuple[str, Hashable], Tuple[FileStat, Any]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(
+        self,
+        path: Union[str, Path],
+        parse: Callable[[Path], Any],
+        parser_key: Hashable = None,
+    ) -> Any:
+        """Get the parsed contents of a file, parsing it only if it changed since it
+        was last parsed.
+
+        Args:
+            path (Union[str, Path]): The file to read
+            parse (Callable[[Path], Any]): Function that reads and parses the file
+            parser_key (Hashable, optional): Identifies the parser and its options, if
+            a file can be parsed in different ways. Defaults to the parse function.
+
+        Returns:
+            Any: The parsed contents
+        """
+        path = Path(os.path.abspath(path))
+        key = (str(path), parse if parser_key is None else parser_key)
+        stat = _stat(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if stat is not None and entry is not None and entry[0] == stat:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        data = parse(path)
+        if stat is None:
+            # Missing files are not cached, so that they are picked up once created
+            return data
+        with self._lock:
+            self._entries[key] = (stat, data)
+        return data
+
+    def invalidate(self, path: Union[str, Path, None] = None) -> None:
+        """Remove the entries for a file, or every entry if no path is given."""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                return
+            abs_path = os.path.abspath(path)
+            for key in [key for key in self._entries if key[0] == abs_path]:
+                del self._entries[key]
+
+    def stats(self) -> FileCacheStats:
+        with self._lock:
+            return FileCacheStats(
+                hits=self.hits, misses=self.misses, entries=len(self._entries)
+            )
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+
+parsed_file_cache = ParsedFileCache()
@@ -0,0 +1,106 @@
+import asyncio
+import inspect
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
+
+from pydantic_settings import PydanticBaseSettingsSource
+
+from bingqilin.conf.sources import WrappedSettingsSource
+from bingqilin.logger import bq_logger
+
+logger = bq_logger.getChild("conf.concurrent")
+
+
+def is_async_source(source: PydanticBaseSettingsSource) -> bool:
+    return inspect.iscoroutinefunction(getattr(source, "acall", None))
+
+
+class PrefetchedSettingsSource(WrappedSettingsSource):
+    """Returns the values of a source that was evaluated ahead of time. If evaluating
+    the source failed, the error is raised when pydantic-settings calls this source,
+    the same as if it was evaluated in order.
+    """
+
+    def __init__(
+        self, source: PydanticBaseSettingsSource, future: "Future[Dict[str, Any]]"
+    ) -> None:
+        super().__init__(source)
+        self.future = future
+
+    def __call__(self) -> Dict[str, Any]:
+        return self.future.result()
+
+
+def _run_async_sources(
+    sources: List[PydanticBaseSettingsSource],
+) -> List[Any]:
+    async def gather():
+        return await asyncio.gather(
+            *(source.acall() for source in sources),  # type: ignore
+            return_exceptions=True,
+        )
+
+    return asyncio.run(gather())
+
+
+def evaluate_sources_concurrently(
+    sources: Tuple[PydanticBaseSettingsSource, ...],
+) -> Tuple[PydanticBaseSettingsSource, ...]:
+    """Evaluate the independent settings sources at the same time, so that loading the
+    settings takes about as long as the slowest source instead of all of them combined.
+
+    Sources run in a thread pool, except for async-capable sources (those that define
+    an `acall()` coroutine), which run together on an event loop in one of the
+    threads. Sources that read the values of higher-precedence sources (those with
+    `depends_on_state` set) can't run ahead of time, so they are evaluated in order.
+
+    The returned sources are in the same order as the given ones, so pydantic-settings
+    merges their values with the same precedence.
+
+    Args:
+        sources (Tuple[PydanticBaseSettingsSource, ...]): Sources in order of precedence
+
+    Returns:
+        Tuple[PydanticBaseSettingsSource, ...]: The sources, where the independent ones
+        are replaced by `PrefetchedSettingsSource`s holding their values
+    """
+    independent = [
+        index
+        for index, source in enumerate(sources)
+        if not getattr(source, "depends_on_state", False)
+    ]
+    if len(independent) < 2:
+        return sources
+
+    async_indexes = [i for i in independent if is_async_source(sources[i])]
+    sync_indexes = [i for i in independent if i not in async_indexes]
+    futures: Dict[int, Future] = {}
+    workers = len(sync_indexes) + (1 if async_indexes else 0)
+    with ThreadPoolExecutor(
+        max_workers=workers, thread_name_prefix="bingqilin-settings"
+    ) as executor:
+        for index in sync_indexes:
+            futures[index] = executor.submit(sources[index])
+        if async_indexes:
+            async_future = executor.submit(
+                _run_async_sources, [sources[i] for i in async_indexes]
+            )
+
+    if async_indexes:
+        # Give each async source its own future, so that errors stay with the source
+        try:
+            async_results = async_future.result()
+        except Exception as exc:
+            async_results = [exc] * len(async_indexes)
+        for index, result in zip(async_indexes, async_results):
+            future: Future = Future()
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+            futures[index] = future
+
+    return tuple(
+        PrefetchedSettingsSource(source, futures[index]) if index in futures else source
+        for index, source in enumerate(sources)
+    )
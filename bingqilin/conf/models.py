@@ -2,12 +2,21 @@ import logging
 from typing import Any, List, Optional, Sequence, Tuple, TypeVar, Union
 
 from fastapi import FastAPI
-from pydantic import AfterValidator, AnyUrl, BaseModel, Field
+from pydantic import (
+    AfterValidator,
+    AnyUrl,
+    BaseModel,
+    Field,
+    PrivateAttr,
+    ValidatorFunctionWrapHandler,
+    model_validator,
+)
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic_settings.sources import PydanticBaseSettingsSource
 from typing_extensions import Annotated
 
-from bingqilin.conf.sources import IniSettingsSource
+from bingqilin.conf.reuse import validate_with_reuse
+from bingqilin.conf.sources import IniSettingsSource, record_customised_sources
 from bingqilin.db import validate_databases
 from bingqilin.db.models import DBConfig
 from bingqilin.utils.types import AttrKeysDict
@@ -157,6 +166,15 @@ class FastAPIConfig(BaseModel):
 class ConfigModelConfigDict(SettingsConfigDict, total=False):
     ini_files: Optional[Sequence[str]]
     ini_file_encoding: Optional[str]
+    # Options for `JsonSettingsSource` and `TomlSettingsSource`
+    json_files: Optional[Sequence[str]]
+    json_file_encoding: Optional[str]
+    json_section: Optional[str]
+    toml_files: Optional[Sequence[str]]
+    toml_section: Optional[str]
+    # Evaluate independent settings sources at the same time
+    # (see `bingqilin.conf.concurrent:evaluate_sources_concurrently()`)
+    concurrent_sources: bool
 
 
 class ConfigModel(BaseSettings):
@@ -198,6 +216,28 @@ class ConfigModel(BaseSettings):
         description="Path to add the handler to trigger a reconfigure via an HTTP POST "
         "request. Set this to null or empty string to disable.",
     )
+    reconfigure_broadcast: bool = Field(
+        default=False,
+        description="Apply reconfigures requested via the reconfigure path in every "
+        "worker process on the host, instead of only the worker that received the "
+        "request. The response reports how many workers applied the change.",
+    )
+    reconfigure_broadcast_dir: Optional[str] = Field(
+        default=None,
+        description="Directory shared by the worker processes to coordinate reconfigure "
+        "broadcasts. Defaults to a directory in the system temp dir that is unique to "
+        "the app (see `reconfigure_broadcast_name`) and the workers' parent process.",
+    )
+    reconfigure_broadcast_name: Optional[str] = Field(
+        default=None,
+        description="Name that identifies the app in the default broadcast directory. "
+        "Defaults to the import path of the settings model.",
+    )
+    reconfigure_broadcast_timeout: float = Field(
+        default=5.0,
+        description="Seconds to wait for the other workers to apply a broadcast "
+        "reconfigure before responding.",
+    )
     # The `DBConfigType` type will be replaced with the injected schema of all registered
     # database config models in the OpenAPI schema
     databases: Annotated[
@@ -225,6 +265,35 @@ class ConfigModel(BaseSettings):
 
     fastapi: FastAPIConfig = FastAPIConfig()
 
+    # The raw input that this instance was validated from. Only kept when the settings
+    # manager reuses unchanged sections on reload (see `bingqilin.conf.reuse`).
+    _raw_input: Optional[dict] = PrivateAttr(default=None)
+
+    @model_validator(mode="wrap")
+    @classmethod
+    def reuse_unchanged_sections(
+        cls, data: Any, handler: ValidatorFunctionWrapHandler
+    ) -> Any:
+        return validate_with_reuse(cls, data, handler)
+
+    @classmethod
+    def __pydantic_init_subclass__(cls, **kwargs: Any) -> None:
+        super().__pydantic_init_subclass__(**kwargs)
+        # Subclasses that override `settings_customise_sources()` (to add sources after
+        # the ones returned by `ConfigModel`, for example) have the sources they return
+        # recorded and wrapped as well
+        customise = cls.__dict__.get("settings_customise_sources")
+        if isinstance(customise, classmethod):
+            cls.settings_customise_sources = classmethod(  # type: ignore
+                record_customised_sources(customise.__func__)
+            )
+
+    def get_reconfigure_broadcast_name(self) -> str:
+        return (
+            self.reconfigure_broadcast_name
+            or f"{type(self).__module__}.{type(self).__qualname__}"
+        )
+
     @classmethod
     def add_settings_sources(
         cls, settings_cls: type[BaseSettings]
@@ -244,6 +313,7 @@ class ConfigModel(BaseSettings):
         return tuple()
 
     @classmethod
+    @record_customised_sources
     def settings_customise_sources(
         cls,
         settings_cls: type[BaseSettings],
@@ -0,0 +1,242 @@
+import inspect
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from pydantic_settings import PydanticBaseSettingsSource
+
+from bingqilin.conf.sources import WrappedSettingsSource
+from bingqilin.logger import bq_logger
+
+logger = bq_logger.getChild("conf.profile")
+
+# Provenance of fields that were not set by any source
+DEFAULT_PROVENANCE = "default"
+
+
+@dataclass
+class SourceTiming:
+    """How long a settings source took, and which fields it returned values for."""
+
+    name: str
+    # Position of the source in order of precedence (0 is the highest)
+    index: int
+    duration: float = 0.0
+    fields: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+
+
+@dataclass
+class SettingsLoadProfile:
+    """Timing and provenance of a settings load.
+
+    `provenance` maps every field (nested fields are joined with ".") to the name of
+    the source that supplied its final value, or "default" if no source set it.
+    """
+
+    settings_class: str
+    # "load" for a first load, "reload" for a reconfigure, or "profile"
+    kind: str = "load"
+    # Total time to build the settings instance, including validation
+    duration: float = 0.0
+    sources: List[SourceTiming] = field(default_factory=list)
+    provenance: Dict[str, str] = field(default_factory=dict)
+    # Sections reused from the previous settings instance, without validating them
+    reused_fields: List[str] = field(default_factory=list)
+    generation: Optional[int] = None
+    error: Optional[str] = None
+
+    def slowest_sources(self, count: int = 5) -> List[SourceTiming]:
+        return sorted(self.sources, key=lambda timing: timing.duration, reverse=True)[
+            :count
+        ]
+
+    def unused_sources(self) -> List[SourceTiming]:
+        """Sources that returned values, but didn't supply any of the final ones."""
+        used = set(self.provenance.values())
+        return [
+            timing
+            for timing in self.sources
+            if timing.fields and timing.name not in used
+        ]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _leaf_paths(values: Any, prefix: str = "") -> List[str]:
+    if not isinstance(values, dict) or not values:
+        return [prefix] if prefix else []
+    paths = []
+    for key, value in values.items():
+        paths.extend(_leaf_paths(value, f"{prefix}.{key}" if prefix else str(key)))
+    return paths
+
+
+def _model_paths(model_cls: Any, prefix: str = "") -> List[str]:
+    paths = []
+    for field_name, field_info in getattr(model_cls, "model_fields", {}).items():
+        path = f"{prefix}.{field_name}" if prefix else field_name
+        if inspect.isclass(field_info.annotation) and hasattr(
+            field_info.annotation, "model_fields"
+        ):
+            paths.extend(_model_paths(field_info.annotation, path))
+        else:
+            paths.append(path)
+    return paths
+
+
+class SettingsLoadProfiler:
+    """Collects the timing and returned values of the sources while a settings
+    instance is built (see `profile_settings_load()`).
+    """
+
+    def __init__(self, profile: SettingsLoadProfile) -> None:
+        self.profile = profile
+        self._values: Dict[int, Dict[str, Any]] = {}
+
+    def record(
+        self,
+        timing: SourceTiming,
+        values: Optional[Dict[str, Any]],
+    ) -> None:
+        self.profile.sources.append(timing)
+        if values:
+            self._values[timing.index] = values
+            timing.fields = _leaf_paths(values)
+
+    def finish(self, settings_cls: type) -> None:
+        self.profile.sources.sort(key=lambda timing: timing.index)
+        # Sources are merged in order of precedence, so the first source that set a
+        # value (or a parent of it) supplied it
+        claimed: Dict[str, str] = {}
+        for timing in self.profile.sources:
+            for path in timing.fields:
+                parents = [path[:i] for i, c in enumerate(path) if c == "."]
+                if path in claimed or any(parent in claimed for parent in parents):
+                    continue
+                claimed[path] = timing.name
+        provenance = {}
+        for path in _model_paths(settings_cls):
+            source = claimed.get(path)
+            if source is None:
+                # A value for a submodel field can come from a source as a whole
+                # object, or as values for its nested fields
+                for claimed_path, claimed_source in claimed.items():
+                    if path.startswith(f"{claimed_path}.") or claimed_path.startswith(
+                        f"{path}."
+                    ):
+                        source = claimed_source
+                        break
+            provenance[path] = source or DEFAULT_PROVENANCE
+        # Keep values for fields that aren't in the model (such as extra fields)
+        for path, source in claimed.items():
+            if path not in provenance and not any(
+                existing.startswith(f"{path}.") for existing in provenance
+            ):
+                provenance[path] = source
+        self.profile.provenance = provenance
+
+
+_active_profiler: ContextVar[Optional[SettingsLoadProfiler]] = ContextVar(
+    "bingqilin_settings_profiler", default=None
+)
+
+
+def get_active_profile() -> Optional[SettingsLoadProfile]:
+    """Get the profile of the settings load in progress, if it is being profiled."""
+    profiler = _active_profiler.get()
+    return profiler.profile if profiler else None
+
+
+@contextmanager
+def profile_settings_load(
+    settings_cls: type, kind: str = "load"
+) -> Iterator[SettingsLoadProfile]:
+    """Profile the settings sources of a settings class that are created in this
+    block. The profile is filled in when the block exits, even if building the
+    settings failed.
+    """
+    profile = SettingsLoadProfile(
+        settings_class=f"{settings_cls.__module__}.{settings_cls.__qualname__}",
+        kind=kind,
+    )
+    profiler = SettingsLoadProfiler(profile)
+    token = _active_profiler.set(profiler)
+    started = time.perf_counter()
+    try:
+        yield profile
+    except Exception as exc:
+        profile.error = repr(exc)
+        raise
+    finally:
+        profile.duration = time.perf_counter() - started
+        _active_profiler.reset(token)
+        profiler.finish(settings_cls)
+        logger.debug(
+            "Built %s in %.3fs (%s)",
+            profile.settings_class,
+            profile.duration,
+            ", ".join(
+                f"{timing.name}: {timing.duration:.3f}s" for timing in profile.sources
+            ),
+        )
+
+
+class ProfiledSettingsSource(WrappedSettingsSource):
+    """Times a settings source and records the values that it returns."""
+
+    def __init__(
+        self,
+        source: PydanticBaseSettingsSource,
+        index: int,
+        profiler: SettingsLoadProfiler,
+    ) -> None:
+        super().__init__(source)
+        self.index = index
+        self.profiler = profiler
+        if inspect.iscoroutinefunction(getattr(source, "acall", None)):
+            self.acall = self._acall
+
+    def __call__(self) -> Dict[str, Any]:
+        timing = SourceTiming(name=self.__name__, index=self.index)
+        started = time.perf_counter()
+        values = None
+        try:
+            values = super().__call__()
+            return values
+        except Exception as exc:
+            timing.error = repr(exc)
+            raise
+        finally:
+            timing.duration = time.perf_counter() - started
+            self.profiler.record(timing, values)
+
+    async def _acall(self) -> Dict[str, Any]:
+        timing = SourceTiming(name=self.__name__, index=self.index)
+        started = time.perf_counter()
+        values = None
+        try:
+            values = await self.source.acall()  # type: ignore
+            return values  # type: ignore
+        except Exception as exc:
+            timing.error = repr(exc)
+            raise
+        finally:
+            timing.duration = time.perf_counter() - started
+            self.profiler.record(timing, values)
+
+
+def wrap_profiled_sources(
+    sources: Tuple[PydanticBaseSettingsSource, ...],
+) -> Tuple[PydanticBaseSettingsSource, ...]:
+    """Wrap every source so that it is timed, if a settings load is being profiled."""
+    profiler = _active_profiler.get()
+    if profiler is None:
+        return sources
+    return tuple(
+        ProfiledSettingsSource(source, index, profiler)
+        for index, source in enumerate(sources)
+    )
@@ -0,0 +1,92 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional
+
+from pydantic import BaseModel
+
+from bingqilin.logger import bq_logger
+
+logger = bq_logger.getChild("conf.reuse")
+
+
+class SectionReuse:
+    """Tracks the sections of the previous settings instance that can be reused while
+    a new one is built.
+    """
+
+    def __init__(self, previous: Optional[BaseModel]) -> None:
+        self.previous = previous
+        # Names of the fields whose previous values were reused
+        self.reused: List[str] = []
+
+
+_active_reuse: ContextVar[Optional[SectionReuse]] = ContextVar(
+    "bingqilin_section_reuse", default=None
+)
+
+
+@contextmanager
+def reuse_unchanged_sections(previous: Optional[BaseModel]) -> Iterator[SectionReuse]:
+    """Reuse the submodels of a previous settings instance while building a new one in
+    this block, for every section whose raw input is unchanged.
+    """
+    reuse = SectionReuse(previous)
+    token = _active_reuse.set(reuse)
+    try:
+        yield reuse
+    finally:
+        _active_reuse.reset(token)
+
+
+def _is_reusable(value: Any) -> bool:
+    # Only validated submodels (or mappings of them, like `databases`) are reused.
+    # Other values might not be valid input for their field's validators.
+    if isinstance(value, BaseModel):
+        return True
+    if isinstance(value, Mapping) and value:
+        return all(isinstance(item, BaseModel) for item in value.values())
+    return False
+
+
+def _input_keys(model_cls: type) -> Dict[str, str]:
+    keys = {}
+    for field_name, field_info in model_cls.model_fields.items():  # type: ignore
+        keys[field_name] = field_name
+        for alias in (field_info.alias, field_info.validation_alias):
+            if isinstance(alias, str):
+                keys[alias] = field_name
+    return keys
+
+
+def validate_with_reuse(
+    model_cls: type, data: Any, handler: Callable[[Any], Any]
+) -> Any:
+    """Validate settings input, substituting the previous instance's submodels for
+    sections whose raw input is equal to the input they were validated from. Pydantic
+    accepts model instances as they are, so these sections skip validation.
+
+    The raw input is stored on the new instance, so that the next build can compare
+    against it.
+    """
+    reuse = _active_reuse.get()
+    if reuse is None or not isinstance(data, dict):
+        return handler(data)
+
+    raw_input = data
+    previous = reuse.previous
+    previous_input = getattr(previous, "_raw_input", None) if previous else None
+    if previous is not None and type(previous) is model_cls and previous_input:
+        data = dict(data)
+        for key, field_name in _input_keys(model_cls).items():
+            if key not in data or key not in previous_input:
+                continue
+            previous_value = getattr(previous, field_name)
+            if _is_reusable(previous_value) and data[key] == previous_input[key]:
+                data[key] = previous_value
+                reuse.reused.append(field_name)
+
+    instance = handler(data)
+    instance._raw_input = raw_input
+    if reuse.reused:
+        logger.debug("Reused unchanged settings sections: %s", reuse.reused)
+    return instance
@@ -0,0 +1,338 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+import typing
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, Iterator, Mapping, Optional, Tuple, Type, Union
+
+from pydantic import BaseModel, SecretBytes, SecretStr
+from pydantic.fields import FieldInfo
+from pydantic_settings import PydanticBaseSettingsSource
+
+from bingqilin.conf.sources import WrappedSettingsSource
+from bingqilin.logger import bq_logger
+
+logger = bq_logger.getChild("conf.snapshot")
+
+SNAPSHOT_FORMAT_VERSION = 1
+
+
+def schema_fingerprint(settings_cls: type) -> str:
+    """Hash the schema of a settings model, so that a snapshot written for a different
+    version of the model is never used.
+    """
+    try:
+        schema: Any = settings_cls.model_json_schema()  # type: ignore
+    except Exception:
+        # Some field types can't be represented in a JSON schema
+        schema = {name: repr(info) for name, info in settings_cls.model_fields.items()}  # type: ignore
+    data = json.dumps(
+        {
+            "model": f"{settings_cls.__module__}.{settings_cls.__qualname__}",
+            "schema": schema,
+        },
+        sort_keys=True,
+        default=repr,
+    )
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+def _is_secret_annotation(annotation: Any) -> bool:
+    if isinstance(annotation, type) and issubclass(
+        annotation, (SecretStr, SecretBytes)
+    ):
+        return True
+    return any(_is_secret_annotation(arg) for arg in typing.get_args(annotation))
+
+
+def _model_classes(model: Type[BaseModel]) -> Iterator[Type[BaseModel]]:
+    # Registries (such as the database configs) validate values into subclasses of
+    # the annotated model, so their fields are checked as well
+    yield model
+    for subclass in model.__subclasses__():
+        yield from _model_classes(subclass)
+
+
+def _contains_secret_values(annotation: Any, value: Any) -> bool:
+    if isinstance(annotation, typing.TypeVar):
+        annotation = annotation.__bound__
+    if annotation is None:
+        return False
+    if _is_secret_annotation(annotation):
+        return True
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return any(
+            contains_secret_fields(model.model_fields, value)
+            for model in _model_classes(annotation)
+        )
+
+    args = typing.get_args(annotation)
+    if not args:
+        return False
+    origin = typing.get_origin(annotation)
+    if isinstance(origin, type) and issubclass(origin, Mapping):
+        return isinstance(value, Mapping) and any(
+            _contains_secret_values(args[-1], item) for item in value.values()
+        )
+    if isinstance(origin, type) and issubclass(origin, (list, tuple, set, frozenset)):
+        return isinstance(value, (list, tuple, set, frozenset)) and any(
+            _contains_secret_values(arg, item) for item in value for arg in args
+        )
+    # Unions (including `Optional`) and other wrappers of a type
+    return any(_contains_secret_values(arg, value) for arg in args)
+
+
+def contains_secret_fields(fields: Dict[str, FieldInfo], values: Any) -> bool:
+    """Check whether any of the values are for fields typed as `SecretStr` or
+    `SecretBytes`, including fields of submodels, and of models in optional fields,
+    unions, mappings and sequences.
+    """
+    if not isinstance(values, Mapping):
+        return False
+    return any(
+        _contains_secret_values(field_info.annotation, values[field_name])
+        for field_name, field_info in fields.items()
+        if field_name in values
+    )
+
+
+class SettingsSnapshot:
+    """A local cache of the values returned by remote settings sources (such as the
+    AWS SSM and Secrets Manager sources), so that worker processes don't have to fetch
+    them every time they start.
+
+    The snapshot is a JSON file that holds the values of each remote source along with
+    the time they were fetched. Values are served from it until they are older than
+    `ttl` seconds, or until a reconfigure refreshes them. A snapshot is only used if it
+    was written for the same settings model schema.
+
+    The file is only readable by its owner. Values that are secret (from a source that
+    sets `secret = True`, or for `SecretStr`/`SecretBytes` fields) are encrypted with
+    Fernet if an `encryption_key` is given and the `cryptography` package is installed.
+    Otherwise, sources with secret values are not written to the snapshot, and are
+    fetched on every load.
+    """
+
+    # Seconds that the values of a source are served from the snapshot
+    ttl: float = 300.0
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        ttl: Optional[float] = None,
+        encryption_key: Optional[Union[str, bytes]] = None,
+    ) -> None:
+        self.path = Path(path)
+        if ttl is not None:
+            self.ttl = ttl
+        self._fernet = self._get_fernet(encryption_key) if encryption_key else None
+
+    def _get_fernet(self, key: Union[str, bytes]):
+        try:
+            from cryptography.fernet import Fernet
+        except (ModuleNotFoundError, ImportError):
+            logger.warning(
+                'The "cryptography" package is required to encrypt settings snapshots. '
+                "Sources with secret values will not be snapshotted."
+            )
+            return None
+        return Fernet(key)
+
+    @property
+    def can_encrypt(self) -> bool:
+        return self._fernet is not None
+
+    def read(self, settings_cls: type) -> Dict[str, Dict[str, Any]]:
+        """Read the source entries of the snapshot. Returns an empty dict if there is
+        no snapshot, or it was written for a different settings model schema.
+        """
+        try:
+            with open(self.path) as snapshot_file:
+                snapshot = json.load(snapshot_file)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError):
+            logger.warning("Ignoring unreadable settings snapshot %s.", self.path)
+            return {}
+        if snapshot.get("version") != SNAPSHOT_FORMAT_VERSION or snapshot.get(
+            "fingerprint"
+        ) != schema_fingerprint(settings_cls):
+            logger.info("Settings snapshot %s is for a different schema.", self.path)
+            return {}
+        return snapshot.get("sources") or {}
+
+    def write(self, settings_cls: type, sources: Dict[str, Dict[str, Any]]) -> None:
+        """Atomically replace the snapshot with new source entries."""
+        snapshot = {
+            "version": SNAPSHOT_FORMAT_VERSION,
+            "fingerprint": schema_fingerprint(settings_cls),
+            "sources": sources,
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # The temp file is created with mode 0600
+        fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, prefix=".snapshot-")
+        try:
+            with os.fdopen(fd, "w") as tmp_file:
+                json.dump(snapshot, tmp_file)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def clear(self) -> None:
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def is_fresh(self, entry: Dict[str, Any]) -> bool:
+        return time.time() - entry.get("fetched_at", 0) < self.ttl
+
+    def encode_entry(
+        self, values: Dict[str, Any], secret: bool
+    ) -> Optional[Dict[str, Any]]:
+        """Create a snapshot entry for the values of a source, or None if the values
+        can't be written to the snapshot.
+        """
+        try:
+            data = json.dumps(values)
+        except (TypeError, ValueError):
+            return None
+        entry: Dict[str, Any] = {"fetched_at": time.time()}
+        if not secret:
+            entry["values"] = values
+        elif self._fernet:
+            entry["encrypted"] = self._fernet.encrypt(data.encode()).decode()
+        else:
+            return None
+        return entry
+
+    def decode_entry(self, entry: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if "values" in entry:
+            return entry["values"]
+        if "encrypted" in entry and self._fernet:
+            from cryptography.fernet import InvalidToken
+
+            try:
+                return json.loads(self._fernet.decrypt(entry["encrypted"].encode()))
+            except (InvalidToken, ValueError):
+                logger.warning("Could not decrypt a settings snapshot entry.")
+        return None
+
+    @contextmanager
+    def build(
+        self, settings_cls: type, refresh: bool = False
+    ) -> Iterator["SnapshotBuild"]:
+        """Serve remote sources from the snapshot while building a settings instance in
+        this block. If the block finishes without an error, any values that were
+        fetched are written to the snapshot.
+
+        Args:
+            settings_cls (type): The settings model being built
+            refresh (bool, optional): Fetch every remote source, even if its values in
+            the snapshot are still fresh. Defaults to False.
+        """
+        snapshot_build = SnapshotBuild(
+            self, settings_cls, {} if refresh else self.read(settings_cls)
+        )
+        token = _active_build.set(snapshot_build)
+        try:
+            yield snapshot_build
+        finally:
+            _active_build.reset(token)
+        if snapshot_build.fetched:
+            try:
+                self.write(settings_cls, snapshot_build.entries)
+            except OSError:
+                logger.exception("Could not write settings snapshot %s.", self.path)
+
+
+class SnapshotBuild:
+    """The snapshot entries used and fetched while building one settings instance."""
+
+    def __init__(
+        self,
+        snapshot: SettingsSnapshot,
+        settings_cls: type,
+        entries: Dict[str, Dict[str, Any]],
+    ) -> None:
+        self.snapshot = snapshot
+        self.settings_cls = settings_cls
+        self.entries = entries
+        # Keys of the sources that were fetched instead of served from the snapshot
+        self.fetched: list = []
+        self.hits: list = []
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self.entries.get(key)
+        if entry is None or not self.snapshot.is_fresh(entry):
+            return None
+        return self.snapshot.decode_entry(entry)
+
+    def put(self, key: str, values: Dict[str, Any], secret: bool) -> None:
+        self.fetched.append(key)
+        secret = secret or contains_secret_fields(
+            self.settings_cls.model_fields, values  # type: ignore
+        )
+        if entry := self.snapshot.encode_entry(values, secret):
+            self.entries[key] = entry
+        else:
+            self.entries.pop(key, None)
+
+
+_active_build: ContextVar[Optional[SnapshotBuild]] = ContextVar(
+    "bingqilin_snapshot_build", default=None
+)
+
+
+class SnapshotSettingsSource(WrappedSettingsSource):
+    """Serves the values of a remote settings source from the active snapshot, and
+    records the values it fetches otherwise.
+    """
+
+    def __init__(
+        self,
+        source: PydanticBaseSettingsSource,
+        key: str,
+        snapshot_build: SnapshotBuild,
+    ) -> None:
+        super().__init__(source)
+        self.key = key
+        self.snapshot_build = snapshot_build
+
+    def __call__(self) -> Dict[str, Any]:
+        values = self.snapshot_build.get(self.key)
+        if values is not None:
+            self.snapshot_build.hits.append(self.key)
+            return values
+
+        values = super().__call__()
+        self.snapshot_build.put(
+            self.key, values, secret=getattr(self.source, "secret", False)
+        )
+        return values
+
+
+def wrap_snapshot_sources(
+    sources: Tuple[PydanticBaseSettingsSource, ...],
+) -> Tuple[PydanticBaseSettingsSource, ...]:
+    """Wrap the remote sources (those with `remote = True`) so that they are served
+    from the snapshot, if a snapshot is being built.
+    """
+    snapshot_build = _active_build.get()
+    if snapshot_build is None:
+        return sources
+    return tuple(
+        (
+            SnapshotSettingsSource(
+                source, f"{index}:{type(source).__name__}", snapshot_build
+            )
+            if getattr(source, "remote", False)
+            else source
+        )
+        for index, source in enumerate(sources)
+    )
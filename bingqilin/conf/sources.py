@@ -1,7 +1,21 @@
-from configparser import ConfigParser
+import functools
+import json
+from configparser import DEFAULTSECT, ConfigParser
+from contextvars import ContextVar
 from deprecated import deprecated
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Self, Type, Union
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Self,
+    Sequence,
+    Tuple,
+    Type,
+    Union,
+)
 
 from pydantic import BaseModel, ConfigDict, create_model
 from pydantic.fields import FieldInfo
@@ -15,13 +29,122 @@ from pydantic_settings.main import BaseSettings
 from pydantic_settings.sources import ENV_FILE_SENTINEL, DotenvType
 from typing_extensions import Literal
 
+from bingqilin.conf.cache import parsed_file_cache
 from bingqilin.logger import bq_logger
 from bingqilin.utils.dict import merge
 from bingqilin.utils.types import RegistryMeta, get_annotation_literal_value
 
 logger = bq_logger.getChild("conf.sources")
 
+# A section name that can't appear in an ini file
+_NO_DEFAULT_SECTION = "\0"
+
 SETTINGS_SOURCES: Dict[str, Type["BingqilinSettingsSource"]] = {}
+# Attribute of a settings class that holds the sources used the last time it was
+# loaded. The sources reference the class, so they are kept on it instead of in a
+# registry that would keep every loaded class alive.
+LOADED_SOURCES_ATTR = "__bingqilin_sources__"
+
+
+def record_settings_sources(
+    settings_cls: type, sources: Tuple[PydanticBaseSettingsSource, ...]
+) -> Tuple[PydanticBaseSettingsSource, ...]:
+    # These modules define subclasses of `WrappedSettingsSource`
+    from bingqilin.conf.concurrent import evaluate_sources_concurrently
+    from bingqilin.conf.profile import wrap_profiled_sources
+    from bingqilin.conf.snapshot import wrap_snapshot_sources
+
+    setattr(settings_cls, LOADED_SOURCES_ATTR, sources)
+    # Remote sources are served from the settings snapshot, if one is in use
+    sources = wrap_snapshot_sources(sources)
+    # Sources are timed if the load is being profiled
+    sources = wrap_profiled_sources(sources)
+    model_config = getattr(settings_cls, "model_config", None) or {}
+    if model_config.get("concurrent_sources"):
+        sources = evaluate_sources_concurrently(sources)
+    return sources
+
+
+# Set while the sources of a settings class are being customised, so that only the
+# outermost `settings_customise_sources()` call records and wraps them
+_customising_sources: ContextVar[bool] = ContextVar(
+    "customising_sources", default=False
+)
+
+
+def record_customised_sources(customise: Callable) -> Callable:
+    """Decorate a `settings_customise_sources()` implementation so that the final tuple
+    of sources is passed to `record_settings_sources()`. Overrides that call the
+    implementation of a parent class and add more sources are only recorded once,
+    with all of their sources.
+    """
+    if getattr(customise, "__records_sources__", False):
+        return customise
+
+    @functools.wraps(customise)
+    def wrapper(cls, settings_cls, *args, **kwargs):
+        if _customising_sources.get():
+            return customise(cls, settings_cls, *args, **kwargs)
+        token = _customising_sources.set(True)
+        try:
+            sources = customise(cls, settings_cls, *args, **kwargs)
+        finally:
+            _customising_sources.reset(token)
+        return record_settings_sources(settings_cls, tuple(sources))
+
+    wrapper.__records_sources__ = True  # type: ignore
+    return wrapper
+
+
+def get_loaded_settings_sources(
+    settings_cls: type,
+) -> Tuple[PydanticBaseSettingsSource, ...]:
+    # Only the class's own sources, not the ones of a parent class that was loaded
+    return vars(settings_cls).get(LOADED_SOURCES_ATTR) or tuple()
+
+
+class WrappedSettingsSource(PydanticBaseSettingsSource):
+    """Base class for sources that wrap another settings source to change how it is
+    evaluated. The field values, name and `depends_on_state` of the wrapped source are
+    passed through, so pydantic-settings treats the wrapper the same as the source.
+    """
+
+    def __init__(self, source: PydanticBaseSettingsSource) -> None:
+        super().__init__(source.settings_cls)
+        self.source = source
+        # Keep the wrapped source's name in the state that pydantic-settings collects
+        self.__name__ = getattr(source, "__name__", type(source).__name__)
+
+    @property
+    def depends_on_state(self) -> bool:
+        return getattr(self.source, "depends_on_state", False)
+
+    def get_field_value(
+        self, field: FieldInfo, field_name: str
+    ) -> Tuple[Any, str, bool]:
+        return self.source.get_field_value(field, field_name)
+
+    def _forward_state(self) -> None:
+        """Pass the state of the sources evaluated before this one, which
+        pydantic-settings sets on the wrapper, on to the wrapped source.
+        """
+        self.source._set_current_state(self.current_state)
+        if hasattr(self.source, "_set_settings_sources_data"):
+            self.source._set_settings_sources_data(self.settings_sources_data)
+
+    def __call__(self) -> Dict[str, Any]:
+        self._forward_state()
+        return self.source()
+
+
+def _as_paths(value: Any) -> List[Path]:
+    if not value:
+        return []
+    if isinstance(value, (str, Path)):
+        return [Path(value)]
+    if isinstance(value, Sequence):
+        return [Path(v) for v in value if v]
+    return []
 
 
 class MissingDependencyError(Exception):
@@ -101,6 +224,15 @@ class BingqilinSettingsSource(
     type: Literal[""]
     package_deps: List[str] = []
     imported_pkg: Any = None
+    # Set on sources that fetch values over the network. The values of these sources
+    # can be cached in a settings snapshot (see `bingqilin.conf.snapshot`).
+    remote: bool = False
+    # Set on sources whose values are all secret. These are only written to a
+    # settings snapshot if it is encrypted.
+    secret: bool = False
+    # Set on sources that read the values of higher-precedence sources from
+    # `current_state`. These are never evaluated concurrently with other sources.
+    depends_on_state: bool = False
 
     # See `SourcesRegistryMeta.create_shadow_config_model()`
     __source_config_model__: Type[BaseSourceConfig]
@@ -113,6 +245,12 @@ class BingqilinSettingsSource(
     ) -> Any:
         return value
 
+    def file_paths(self) -> List[Path]:
+        """Files or directories that this source reads from. These are watched for
+        changes if file watching is enabled on the `SettingsManager`.
+        """
+        return []
+
     def __call__(self) -> dict[str, Any]:
         data: Dict[str, Any] = {}
         for field_name, field in self.settings_cls.model_fields.items():
@@ -178,14 +316,20 @@ class YamlSettingsSource(BingqilinSettingsSource):
 
         self.loaded_config = merge({}, *configs)
 
+    def file_paths(self) -> List[Path]:
+        return _as_paths(self.files)
+
     def _load_file(self, file_name: FilePath) -> dict:
         import yaml
 
-        try:
-            with open(file_name, "r") as yaml_file:
-                return yaml.safe_load(yaml_file)
-        except FileNotFoundError:
-            return {}
+        def parse(path: Path) -> dict:
+            try:
+                with open(path, "r") as yaml_file:
+                    return yaml.safe_load(yaml_file)
+            except FileNotFoundError:
+                return {}
+
+        return parsed_file_cache.get(file_name, parse, parser_key="yaml")
 
     def get_field_value(
         self, field: FieldInfo, field_name: str
@@ -213,18 +357,203 @@ class IniSettingsSource(BingqilinSettingsSource):
             else settings_cls.model_config.get("ini_file_encoding") or None
         )
 
-        parser = ConfigParser()
+        # Combine the files the same way that `ConfigParser.read()` would
+        defaults: Dict[str, str] = {}
+        sections: Dict[str, Dict[str, str]] = {}
         for filename in self.files:
-            parser.read(filename)
+            parsed = parsed_file_cache.get(
+                filename, self._parse_file, parser_key=("ini", self.file_encoding)
+            )
+            for section, options in parsed.items():
+                if section == DEFAULTSECT:
+                    defaults.update(options)
+                else:
+                    sections.setdefault(section, {}).update(options)
 
         config = {}
-        sections = parser.sections()
-        for section in sections:
-            config[section] = parser.options(section)
+        for section, options in sections.items():
+            config[section] = list({**options, **defaults})
 
         self.loaded_config = config
 
+    def _parse_file(self, path: Path) -> Dict[str, Dict[str, str]]:
+        # Disable the default section, so that each section only has its own options
+        parser = ConfigParser(default_section=_NO_DEFAULT_SECTION)
+        parser.read(path, encoding=self.file_encoding)
+        return {
+            section: dict(parser.items(section, raw=True))
+            for section in parser.sections()
+        }
+
+    def file_paths(self) -> List[Path]:
+        return _as_paths(self.files)
+
+    def get_field_value(
+        self, field: FieldInfo, field_name: str
+    ) -> tuple[Any, str, bool]:
+        return self.loaded_config.get(field_name), field_name, False
+
+
+def get_section(config: Any, section: Optional[str]) -> Dict[str, Any]:
+    """Get a nested section of a config by its dotted path (e.g. "tool.myapp")."""
+    if section:
+        for part in section.split("."):
+            config = config.get(part) if isinstance(config, dict) else None
+    return config if isinstance(config, dict) else {}
+
+
+def _load_nested_files(
+    files: List[Path], parse, parser_key: Any, section: Optional[str]
+) -> Dict[str, Any]:
+    configs = [
+        get_section(parsed_file_cache.get(filename, parse, parser_key), section)
+        for filename in files
+    ]
+    if len(configs) == 1:
+        # The parsed data is only read from, so it doesn't need to be copied
+        return configs[0]
+    # Later files take precedence over earlier ones
+    return merge({}, *configs)
+
+
+class JsonSettingsSource(BingqilinSettingsSource):
+    """Reads settings from JSON files. Nested objects are validated into submodels.
+    If the `orjson` package is installed, it is used to parse the files.
+    """
+
+    type: Literal["json"]
+
+    class SourceConfig(BaseSourceConfig):
+        files: List[Path]
+        file_encoding: Optional[str] = None
+        # Dotted path to the object in the files that holds the settings
+        section: Optional[str] = None
+
+        model_config = ConfigDict(title="JsonSourceConfig")
+
+    def __init__(
+        self,
+        settings_cls: Type[BaseSettings],
+        files=None,
+        file_encoding=None,
+        section=None,
+    ):
+        super().__init__(settings_cls)
+        self.files = files or settings_cls.model_config.get("json_files") or []
+        self.file_encoding = (
+            file_encoding
+            if file_encoding is not None
+            else settings_cls.model_config.get("json_file_encoding") or None
+        )
+        self.section = (
+            section
+            if section is not None
+            else settings_cls.model_config.get("json_section")
+        )
+        try:
+            import orjson
+
+            self.imported_pkg = orjson
+        except (ModuleNotFoundError, ImportError):
+            self.imported_pkg = json
+
+        self.loaded_config = _load_nested_files(
+            _as_paths(self.files),
+            self._parse_file,
+            ("json", self.file_encoding),
+            self.section,
+        )
+
+    def file_paths(self) -> List[Path]:
+        return _as_paths(self.files)
+
+    def _parse_file(self, path: Path) -> Any:
+        try:
+            if self.file_encoding:
+                with open(path, "r", encoding=self.file_encoding) as json_file:
+                    return self.imported_pkg.loads(json_file.read())
+            with open(path, "rb") as json_file:
+                return self.imported_pkg.loads(json_file.read())
+        except FileNotFoundError:
+            return {}
+
     def get_field_value(
         self, field: FieldInfo, field_name: str
     ) -> tuple[Any, str, bool]:
         return self.loaded_config.get(field_name), field_name, False
+
+
+class TomlSettingsSource(BingqilinSettingsSource):
+    """Reads settings from TOML files. Tables are validated into submodels."""
+
+    type: Literal["toml"]
+    # Only required before Python 3.11, which added `tomllib`
+    package_deps = ["tomli"]
+
+    class SourceConfig(BaseSourceConfig):
+        files: List[Path]
+        # Dotted path to the table in the files that holds the settings
+        section: Optional[str] = None
+
+        model_config = ConfigDict(title="TomlSourceConfig")
+
+    def __init__(self, settings_cls: Type[BaseSettings], files=None, section=None):
+        super().__init__(settings_cls)
+        self.files = files or settings_cls.model_config.get("toml_files") or []
+        self.section = (
+            section
+            if section is not None
+            else settings_cls.model_config.get("toml_section")
+        )
+        try:
+            import tomllib
+
+            self.imported_pkg = tomllib
+        except (ModuleNotFoundError, ImportError):
+            try:
+                import tomli
+
+                self.imported_pkg = tomli
+            except (ModuleNotFoundError, ImportError):
+                raise MissingDependencyError(self)
+
+        self.loaded_config = _load_nested_files(
+            _as_paths(self.files), self._parse_file, "toml", self.section
+        )
+
+    def file_paths(self) -> List[Path]:
+        return _as_paths(self.files)
+
+    def _parse_file(self, path: Path) -> Dict[str, Any]:
+        try:
+            with open(path, "rb") as toml_file:
+                return self.imported_pkg.load(toml_file)
+        except FileNotFoundError:
+            return {}
+
+    def get_field_value(
+        self, field: FieldInfo, field_name: str
+    ) -> tuple[Any, str, bool]:
+        return self.loaded_config.get(field_name), field_name, False
+
+
+def get_source_file_paths(source: PydanticBaseSettingsSource) -> List[Path]:
+    """Get the files and directories that a settings source reads from.
+
+    Args:
+        source (PydanticBaseSettingsSource): An initialized settings source
+
+    Returns:
+        List[Path]: Paths read by the source, or an empty list if it doesn't read files
+    """
+    if isinstance(source, BingqilinSettingsSource):
+        if paths := source.file_paths():
+            return paths
+    if isinstance(source, DotEnvSettingsSource):
+        return _as_paths(source.env_file)
+    if isinstance(source, SecretsSettingsSource):
+        return _as_paths(source.secrets_dir)
+    for attr in ("yaml_file_path", "json_file_path", "toml_file_path"):
+        if paths := _as_paths(getattr(source, attr, None)):
+            return paths
+    return []
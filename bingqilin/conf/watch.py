@@ -0,0 +1,180 @@
+import os
+import threading
+import weakref
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from bingqilin.logger import bq_logger
+
+logger = bq_logger.getChild("conf.watch")
+
+# (mtime_ns, size, inode) of a file, or None if it doesn't exist
+FileStat = Optional[Tuple[int, int, int]]
+
+
+def _stat(path: Path) -> FileStat:
+    try:
+        # Follow symlinks, since mounted ConfigMaps and Secrets swap a symlinked
+        # directory instead of writing to the files
+        result = os.stat(path)
+    except OSError:
+        return None
+    return (result.st_mtime_ns, result.st_size, result.st_ino)
+
+
+def snapshot_paths(paths: Iterable[Path]) -> Dict[Path, FileStat]:
+    """Stat every watched file. Directories (such as a secrets dir) are expanded to
+    the files directly inside of them.
+    """
+    snapshot = {}
+    for path in paths:
+        if path.is_dir():
+            try:
+                entries = sorted(os.scandir(path), key=lambda entry: entry.name)
+            except OSError:
+                entries = []
+            for entry in entries:
+                if not entry.name.startswith(".."):
+                    snapshot[Path(entry.path)] = _stat(Path(entry.path))
+        else:
+            snapshot[path] = _stat(path)
+    return snapshot
+
+
+class SettingsFileWatcher:
+    """Watches settings files for changes from a background thread, and calls a
+    callback once for each burst of changes.
+
+    If the optional `inotify_simple` package is installed, the directories that
+    contain the files are watched with inotify. Otherwise, the files are polled by
+    their mtime, size, and inode. Either way, a change is only reported after the
+    files have stopped changing for `debounce` seconds.
+    """
+
+    # Seconds that the files must stay unchanged before the callback is called
+    debounce: float = 0.5
+    # Seconds between checks when polling (or between inotify reads)
+    poll_interval: float = 1.0
+
+    def __init__(
+        self,
+        paths: Iterable[Path],
+        callback: Callable[[], None],
+        debounce: Optional[float] = None,
+        poll_interval: Optional[float] = None,
+    ) -> None:
+        self.paths: List[Path] = [Path(path) for path in paths]
+        self.callback = callback
+        if debounce is not None:
+            self.debounce = debounce
+        if poll_interval is not None:
+            self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started_pid: Optional[int] = None
+        self._fork_hook_registered = False
+
+    @property
+    def running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+    def start(self) -> None:
+        if self.running:
+            return
+        if not self._fork_hook_registered and hasattr(os, "register_at_fork"):
+            # The watcher thread does not survive a fork, so restart it in the child
+            _ref = weakref.ref(self)
+            os.register_at_fork(after_in_child=lambda: _restart_after_fork(_ref))
+            self._fork_hook_registered = True
+        self._started_pid = os.getpid()
+        self._stop.clear()
+        # Snapshot before returning, so that changes made right after are detected
+        snapshot = snapshot_paths(self.paths)
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(snapshot,),
+            name="bingqilin-settings-watch",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(self.poll_interval * 2)
+        self._thread = None
+        self._started_pid = None
+
+    def _run(self, snapshot: Dict[Path, FileStat]) -> None:
+        inotify = self._open_inotify()
+        try:
+            while not self._stop.is_set():
+                self._wait_for_events(inotify)
+                if self._stop.is_set():
+                    return
+                current = snapshot_paths(self.paths)
+                if current == snapshot:
+                    continue
+
+                # Wait until the files stop changing, so that a burst of writes
+                # results in one reload
+                while not self._stop.wait(self.debounce):
+                    settled = snapshot_paths(self.paths)
+                    if settled == current:
+                        break
+                    current = settled
+                snapshot = current
+                if self._stop.is_set():
+                    return
+
+                logger.info("Settings files changed, reloading.")
+                try:
+                    self.callback()
+                except Exception:
+                    logger.exception(
+                        "Settings reload triggered by a file change failed."
+                    )
+        finally:
+            if inotify:
+                inotify.close()
+
+    def _open_inotify(self):
+        try:
+            from inotify_simple import INotify, flags
+        except (ModuleNotFoundError, ImportError):
+            return None
+
+        inotify = INotify()
+        watch_flags = (
+            flags.CLOSE_WRITE
+            | flags.MOVED_TO
+            | flags.CREATE
+            | flags.DELETE
+            | flags.ATTRIB
+        )
+        directories = {path if path.is_dir() else path.parent for path in self.paths}
+        for directory in directories:
+            try:
+                inotify.add_watch(directory, watch_flags)
+            except OSError:
+                logger.warning(
+                    "Could not watch %s with inotify, polling instead.", directory
+                )
+                inotify.close()
+                return None
+        return inotify
+
+    def _wait_for_events(self, inotify) -> None:
+        if inotify is None:
+            self._stop.wait(self.poll_interval)
+            return
+        # Any event in a watched directory triggers a check. The snapshot comparison
+        # decides whether a watched file actually changed.
+        inotify.read(timeout=int(self.poll_interval * 1000))
+
+
+def _restart_after_fork(ref: "weakref.ref[SettingsFileWatcher]") -> None:
+    watcher = ref()
+    if watcher and watcher._started_pid is not None:
+        watcher._thread = None
+        watcher.start()
@@ -1,17 +1,49 @@
+import asyncio
+import hashlib
+import inspect
+import logging
+import os
+import threading
+import time
 import uuid
-from collections import OrderedDict
-from dataclasses import dataclass
+import weakref
+from collections import OrderedDict, deque
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
 from enum import StrEnum
-from typing import Any, Callable, Dict, Generic, Optional, Self, Type, Union, get_origin
-
-from pydantic import BaseModel
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Generic,
+    Iterator,
+    List,
+    Optional,
+    Self,
+    Sequence,
+    Tuple,
+    Type,
+    Union,
+    get_origin,
+)
+
+from pydantic import BaseModel, SecretBytes, SecretStr
 from pydantic._internal._decorators import ReturnType, is_instance_method_from_sig
 
 from bingqilin.conf import SettingsManager
 from bingqilin.conf.models import ConfigModel
 from bingqilin.db.models import DBConfig, RedisDBConfig, SQLAlchemyDBConfig
 from bingqilin.logger import bq_logger
-from bingqilin.signal import RECONFIGURE_SIGNAL, dispatcher
+from bingqilin.signal import (
+    CONTEXTS_HANDLER_GROUP,
+    RECONFIGURE_SIGNAL,
+    dispatcher,
+    in_dispatcher_thread,
+)
 
 logger = bq_logger.getChild("contexts")
 
@@ -31,8 +63,17 @@ class ContextFieldInfo:
     init_from_config: bool
     initialize_func: Optional[Callable]
     terminate_func: Optional[Callable]
+    warmup_func: Optional[Callable]
     config_getter_func: Optional[Callable[[BaseModel], Any]]
     is_default: bool
+    depends_on: Tuple[str, ...]
+    lazy: bool
+    retries: int
+    after_fork_func: Optional[Callable]
+    # Used by field types (such as `DatabaseField()`) for fields that have neither
+    # an explicit function nor an @initializer/@terminator method on the context
+    default_initialize_func: Optional[Callable] = None
+    default_terminate_func: Optional[Callable] = None
 
     def __init__(
         self,
@@ -42,6 +83,11 @@ class ContextFieldInfo:
         terminate_func: Optional[Callable] = None,
         config_getter_func: Optional[Callable[[BaseModel], Any]] = None,
         is_default: bool = False,
+        depends_on: Optional[Sequence[str]] = None,
+        lazy: bool = False,
+        warmup_func: Optional[Callable] = None,
+        retries: int = 0,
+        after_fork_func: Optional[Callable] = None,
     ) -> None:
         self.namespace = namespace
         self.config_model = config_model
@@ -49,6 +95,11 @@ class ContextFieldInfo:
         self.terminate_func = terminate_func
         self.config_getter_func = config_getter_func
         self.is_default = is_default
+        self.depends_on = tuple(depends_on or ())
+        self.lazy = lazy
+        self.warmup_func = warmup_func
+        self.retries = retries
+        self.after_fork_func = after_fork_func
 
 
 def ContextField(
@@ -58,6 +109,11 @@ def ContextField(
     terminate_func: Optional[Callable] = None,
     config_getter_func: Optional[Callable[[BaseModel], Any]] = None,
     is_default: bool = False,
+    depends_on: Optional[Sequence[str]] = None,
+    lazy: bool = False,
+    warmup_func: Optional[Callable] = None,
+    retries: int = 0,
+    after_fork_func: Optional[Callable] = None,
 ) -> Any:
     return ContextFieldInfo(
         namespace or ContextFieldInfo.UNKNOWN,
@@ -66,6 +122,11 @@ def ContextField(
         terminate_func=terminate_func,
         config_getter_func=config_getter_func,
         is_default=is_default,
+        depends_on=depends_on,
+        lazy=lazy,
+        warmup_func=warmup_func,
+        retries=retries,
+        after_fork_func=after_fork_func,
     )
 
 
@@ -75,6 +136,12 @@ def DatabaseField(
     terminate_func: Optional[Callable] = None,
     config_getter_func: Optional[Callable[[BaseModel], Any]] = None,
     is_default: bool = False,
+    depends_on: Optional[Sequence[str]] = None,
+    lazy: bool = False,
+    warmup_func: Optional[Callable] = None,
+    warmup_connections: int = 1,
+    retries: int = 0,
+    after_fork_func: Optional[Callable] = None,
 ) -> Any:
     def init_from_db_config(config: Union[DBConfig, Dict]) -> Any:
         if not isinstance(config, DBConfig):
@@ -84,17 +151,58 @@ def DatabaseField(
             )
         return config.initialize_client()
 
-    if not initialize_func:
-        initialize_func = init_from_db_config
-
-    return ContextFieldInfo(
+    def terminate_db_client(client: Any) -> Any:
+        # Async clients (`redis.asyncio`, `SQLAlchemyClient`) expose `aclose()`, which
+        # returns a coroutine that is awaited by the context.
+        if aclose := getattr(client, "aclose", None):
+            return aclose()
+        if close := getattr(client, "close", None):
+            return close()
+
+    async def warmup_db_client(client: Any) -> None:
+        # Open `warmup_connections` connections in the client's pool at the same time,
+        # so that requests don't have to wait for connects.
+        if warmup_connections <= 0:
+            return
+        if awarmup := getattr(client, "awarmup", None):
+            await awarmup(warmup_connections)
+        elif type(client).__module__.startswith("redis."):
+            from bingqilin.db.redis import awarmup_redis_client
+
+            await awarmup_redis_client(client, warmup_connections)
+
+    def reset_db_client_after_fork(client: Any) -> None:
+        # Drop the pooled connections inherited from the parent process without
+        # closing them, since the parent is still using the same sockets.
+        if reset := getattr(client, "reset_after_fork", None):
+            reset()
+        elif type(client).__module__.startswith("redis."):
+            from bingqilin.db.redis import reset_redis_client_after_fork
+
+            reset_redis_client_after_fork(client)
+
+    if not warmup_func:
+        warmup_func = warmup_db_client
+
+    if not after_fork_func:
+        after_fork_func = reset_db_client_after_fork
+
+    field_info = ContextFieldInfo(
         ContextFieldTypes.DATABASES,
         config_model=config_model,
         initialize_func=initialize_func,
         terminate_func=terminate_func,
         config_getter_func=config_getter_func,
         is_default=is_default,
+        depends_on=depends_on,
+        lazy=lazy,
+        warmup_func=warmup_func,
+        retries=retries,
+        after_fork_func=after_fork_func,
     )
+    field_info.default_initialize_func = init_from_db_config
+    field_info.default_terminate_func = terminate_db_client
+    return field_info
 
 
 def ThirdPartyField(
@@ -103,6 +211,11 @@ def ThirdPartyField(
     terminate_func: Optional[Callable] = None,
     config_getter_func: Optional[Callable] = None,
     is_default: bool = False,
+    depends_on: Optional[Sequence[str]] = None,
+    lazy: bool = False,
+    warmup_func: Optional[Callable] = None,
+    retries: int = 0,
+    after_fork_func: Optional[Callable] = None,
 ) -> Any:
     return ContextFieldInfo(
         ContextFieldTypes.THIRD_PARTIES,
@@ -111,6 +224,11 @@ def ThirdPartyField(
         terminate_func=terminate_func,
         config_getter_func=config_getter_func,
         is_default=is_default,
+        depends_on=depends_on,
+        lazy=lazy,
+        warmup_func=warmup_func,
+        retries=retries,
+        after_fork_func=after_fork_func,
     )
 
 
@@ -166,6 +284,10 @@ class TerminatorDescriptorProxy(ContextDescriptorProxy):
     pass
 
 
+class WarmerDescriptorProxy(ContextDescriptorProxy):
+    pass
+
+
 def initializer(field: str):
     def inner(func):
         if is_instance_method_from_sig(func):
@@ -190,6 +312,366 @@ def terminator(field: str):
     return inner
 
 
+def warmer(field: str):
+    def inner(func):
+        if is_instance_method_from_sig(func):
+            raise RuntimeError(
+                f"@warmer() applied to {func} cannot be an instance method."
+            )
+        dec_info = ContextDecoratorInfo(field=field)
+        return WarmerDescriptorProxy(func, dec_info)
+
+    return inner
+
+
+def get_init_layers(
+    context_name: str, context_fields: Dict[str, ContextFieldInfo]
+) -> List[List[str]]:
+    """Sort the context fields into layers based on their `depends_on` declarations.
+    Every field in a layer only depends on fields from the layers before it, so all the
+    fields within one layer can be initialized at the same time. Fields keep their
+    declaration order inside of a layer.
+
+    Args:
+        context_name (str): Name of the context class (used for error messages)
+        context_fields (Dict[str, ContextFieldInfo]): Fields declared on the context
+
+    Raises:
+        ValueError: A field depends on an unknown field, or the dependencies form a cycle
+
+    Returns:
+        List[List[str]]: Field names grouped by initialization layer
+    """
+    for field_name, field_info in context_fields.items():
+        for dependency in field_info.depends_on:
+            if dependency not in context_fields:
+                raise ValueError(
+                    f'Field "{field_name}" on context {context_name} depends on "{dependency}", '
+                    "which is not a field on the context."
+                )
+
+    layers = []
+    remaining = list(context_fields.keys())
+    resolved = set()
+    while remaining:
+        layer = [
+            field_name
+            for field_name in remaining
+            if resolved.issuperset(context_fields[field_name].depends_on)
+        ]
+        if not layer:
+            raise ValueError(
+                f"Fields on context {context_name} have circular dependencies: "
+                f"{remaining}"
+            )
+        layers.append(layer)
+        resolved.update(layer)
+        remaining = [
+            field_name for field_name in remaining if field_name not in resolved
+        ]
+
+    return layers
+
+
+async def _await(awaitable: Awaitable) -> Any:
+    return await awaitable
+
+
+def _get_running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+def run_sync(awaitable: Awaitable) -> Any:
+    """Run an awaitable to completion from synchronous code, on a temporary event loop.
+    If the current thread is already running an event loop, the awaitable is run in a
+    new loop on a separate thread so that the running loop is not re-entered.
+
+    Async clients are bound to the loop that they are created on, so contexts only use
+    this when they have no running loop to use instead (see
+    `LifespanContext._run_coroutine()`).
+    """
+    if _get_running_loop() is None:
+        return asyncio.run(_await(awaitable))
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, _await(awaitable)).result()
+
+
+def _canonicalize_config(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return (type(value).__qualname__, _canonicalize_config(value.model_dump()))
+    if isinstance(value, (SecretStr, SecretBytes)):
+        # Compare the secret itself, so that a changed password is picked up
+        return (type(value).__name__, value.get_secret_value())
+    if isinstance(value, Mapping):
+        return tuple(
+            sorted((str(k), _canonicalize_config(v)) for k, v in value.items())
+        )
+    if isinstance(value, (list, tuple)):
+        return tuple(_canonicalize_config(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(repr(_canonicalize_config(v)) for v in value))
+    return value
+
+
+def fingerprint_config(config: Any) -> str:
+    """Create a fingerprint of a field's resolved config. Two configs with the same
+    values (including secret values) will have the same fingerprint.
+    """
+    return hashlib.sha256(repr(_canonicalize_config(config)).encode()).hexdigest()
+
+
+class ContextFieldDescriptor:
+    """Replaces each declared field on a context class. Field values live in a single
+    mapping on the context instance, so that all fields can be swapped in one step when
+    the context is reconfigured.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def __get__(self, obj: Any, obj_type: Optional[type] = None) -> Any:
+        if obj is None:
+            return self
+        try:
+            return obj._field_values[self.name]
+        except KeyError:
+            if self.name in obj._lazy_configs:
+                return obj._initialize_lazy_field(self.name)
+            raise AttributeError(
+                f'Field "{self.name}" on context "{obj.name}" has not been configured.'
+            )
+
+    def __set__(self, obj: Any, value: Any) -> None:
+        obj._publish_values({**obj._field_values, self.name: value})
+
+    def __delete__(self, obj: Any) -> None:
+        field_values = dict(obj._field_values)
+        field_values.pop(self.name, None)
+        obj._publish_values(field_values)
+
+
+# Marks a field slot that has no value yet
+_UNSET: Any = object()
+
+
+class FieldSlot:
+    """Holds the current value of a single context field. The context updates the slot
+    whenever the field's value is replaced, so reading it is a single attribute access.
+    """
+
+    __slots__ = ("context", "field", "value")
+
+    def __init__(self, context: "LifespanContext", field: str) -> None:
+        self.context = context
+        self.field = field
+        self.value = _UNSET
+
+    def get(self) -> Any:
+        value = self.value
+        if value is _UNSET:
+            # Not configured yet, or a lazy field that has not been initialized
+            return getattr(self.context, self.field)
+        return value
+
+    async def aget(self) -> Any:
+        value = self.value
+        if value is _UNSET:
+            return await self.context.aget(self.field)
+        return value
+
+
+@dataclass
+class ConfigureResult:
+    """Outcome of configuring a context. Fields whose config did not change since the
+    last configure keep their current values and are listed as unchanged.
+    """
+
+    context: str
+    rebuilt: List[str] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+    # Lazy fields that will be initialized on first access
+    deferred: List[str] = field(default_factory=list)
+    # Lazy fields whose live values were discarded because their config changed
+    reset: List[str] = field(default_factory=list)
+
+
+@dataclass
+class StagedConfigure:
+    """Field values built by `LifespanContext.prepare_configure()` that have not been
+    swapped in yet.
+    """
+
+    result: ConfigureResult
+    values: Dict[str, Any] = field(default_factory=dict)
+    fingerprints: Dict[str, str] = field(default_factory=dict)
+    lazy_configs: Dict[str, Tuple[Any, str]] = field(default_factory=dict)
+
+
+class LifecyclePhase(StrEnum):
+    CONFIG = "config"
+    INITIALIZE = "initialize"
+    WARMUP = "warmup"
+    TERMINATE = "terminate"
+
+
+@dataclass
+class FieldLifecycleEvent:
+    """Timing and outcome of one lifecycle phase for one field."""
+
+    field: str
+    phase: LifecyclePhase
+    duration: float = 0.0
+    success: bool = True
+    retries: int = 0
+    error: Optional[str] = None
+
+
+@dataclass
+class LifecycleRun:
+    """A single configure, warmup, or terminate run on a context."""
+
+    kind: str
+    started_at: datetime = field(default_factory=datetime.now)
+    duration: float = 0.0
+    events: List[FieldLifecycleEvent] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class TerminateReport:
+    """Outcome of terminating the fields on a context."""
+
+    context: str
+    terminated: List[str] = field(default_factory=list)
+    timed_out: List[str] = field(default_factory=list)
+    failed: Dict[str, BaseException] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class FieldPlan:
+    """Everything needed to configure, warm up, and terminate a field, resolved once
+    when the context class is created.
+    """
+
+    name: str
+    info: ContextFieldInfo
+    initializer: Callable
+    terminator: Optional[Callable]
+    warmers: Tuple[Callable, ...]
+    after_fork: Optional[Callable]
+    config_getter: Callable[[Any], Any]
+    config_model: Optional[Type[BaseModel]]
+    initializer_is_async: bool
+    terminator_is_async: bool
+
+
+def _make_namespace_config_getter(namespace: str, field: str) -> Callable[[Any], Any]:
+    """Default config getter, which gets the config at `settings.<namespace>.<field>`."""
+
+    def get_config(settings_data: Any) -> Any:
+        if context_config := getattr(settings_data, namespace, None):
+            if field_config := getattr(context_config, field):
+                return field_config
+
+    return get_config
+
+
+def build_field_plans(context_cls: type) -> Dict[str, FieldPlan]:
+    """Resolve the initializer, terminator, warmup hooks, and config getter for every
+    field on a context class. Functions are picked in order of decreasing precedence:
+
+    * The function specified on the field (`initialize_func`, `terminate_func`, etc.)
+    * The decorated classmethod on the context class (`@initializer`, `@terminator`)
+    * The default of the field type, such as a `DatabaseField()` creating its client
+      from its `DBConfig` and closing it
+    * For initializers only, as a last resort, the field's annotated type
+
+    Warmup hooks are the exception: both the field's `warmup_func` and the `@warmer`
+    classmethod are used, in that order.
+
+    Raises:
+        ValueError: A decorated method targets an unknown field, or a field has no way
+        to be initialized
+
+    Returns:
+        Dict[str, FieldPlan]: Plans keyed by field name
+    """
+    context_fields: Dict[str, ContextFieldInfo] = context_cls.__context_fields__
+    for decorated in (
+        "__field_initializers__",
+        "__field_terminators__",
+        "__field_warmers__",
+    ):
+        for field_name in getattr(context_cls, decorated):
+            if field_name not in context_fields:
+                raise ValueError(
+                    f'A decorated method on context {context_cls.__name__} targets "{field_name}", '
+                    "which is not a field on the context."
+                )
+
+    annotations = context_cls.__dict__.get("__annotations__", {})
+    plans = {}
+    for field_name, field_info in context_fields.items():
+        init_func = field_info.initialize_func
+        if not init_func and (
+            _f_init := context_cls.__field_initializers__.get(field_name)
+        ):
+            # Initializers are stored as classmethods, so bind them to the class
+            init_func = _f_init.__get__(None, context_cls)
+        if not init_func:
+            init_func = field_info.default_initialize_func
+        if not init_func:
+            annotation = annotations.get(field_name)
+            # If the origin of the annotated type is an Annotation, Generic, or Union
+            # type, it's a type we can't use to create our context field instance from
+            # without any way to disambiguate it.
+            if isinstance(annotation, type) and not get_origin(annotation):
+                init_func = annotation
+            else:
+                raise ValueError(
+                    f'Field "{field_name}" on context {context_cls.__name__} has no initialize '
+                    "function or @initializer method, and its annotation "
+                    f"({annotation!r}) is not a class that can be created from its config."
+                )
+
+        term_func = field_info.terminate_func
+        if not term_func and (
+            _f_term := context_cls.__field_terminators__.get(field_name)
+        ):
+            term_func = _f_term.__get__(None, context_cls)
+        if not term_func:
+            term_func = field_info.default_terminate_func
+
+        warmers = []
+        if field_info.warmup_func:
+            warmers.append(field_info.warmup_func)
+        if _f_warm := context_cls.__field_warmers__.get(field_name):
+            warmers.append(_f_warm.__get__(None, context_cls))
+
+        plans[field_name] = FieldPlan(
+            name=field_name,
+            info=field_info,
+            initializer=init_func,
+            terminator=term_func,
+            warmers=tuple(warmers),
+            after_fork=field_info.after_fork_func,
+            config_getter=field_info.config_getter_func
+            or _make_namespace_config_getter(field_info.namespace, field_name),
+            config_model=field_info.config_model,
+            initializer_is_async=inspect.iscoroutinefunction(init_func),
+            terminator_is_async=bool(term_func)
+            and inspect.iscoroutinefunction(term_func),
+        )
+
+    return plans
+
+
 class LifespanContextMeta(type):
     name: str = ""
 
@@ -207,10 +689,11 @@ class LifespanContextMeta(type):
         __namespace["__default_fields__"] = {}
         __namespace["__field_initializers__"] = {}
         __namespace["__field_terminators__"] = {}
+        __namespace["__field_warmers__"] = {}
 
-        for field, field_type in __namespace.items():
+        for field_name, field_type in __namespace.items():
             if isinstance(field_type, ContextFieldInfo):
-                __namespace["__context_fields__"][field] = field_type
+                __namespace["__context_fields__"][field_name] = field_type
                 if field_type.is_default:
                     if field_type.namespace in __namespace["__default_fields__"]:
                         raise ValueError(
@@ -218,7 +701,7 @@ class LifespanContextMeta(type):
                             f'default for their ctx type "{field_type.namespace}". '
                             "Only one can be default."
                         )
-                    __namespace["__default_fields__"][field_type.namespace] = field
+                    __namespace["__default_fields__"][field_type.namespace] = field_name
 
             elif isinstance(field_type, InitializerDescriptorProxy):
                 _field_name = field_type.decorator_info.field
@@ -228,8 +711,16 @@ class LifespanContextMeta(type):
                 _field_name = field_type.decorator_info.field
                 __namespace["__field_terminators__"][_field_name] = field_type.wrapped
 
-        for field in __namespace["__context_fields__"].keys():
-            __namespace.pop(field, None)
+            elif isinstance(field_type, WarmerDescriptorProxy):
+                _field_name = field_type.decorator_info.field
+                __namespace["__field_warmers__"][_field_name] = field_type.wrapped
+
+        for field_name in __namespace["__context_fields__"].keys():
+            __namespace[field_name] = ContextFieldDescriptor(field_name)
+
+        __namespace["__field_init_layers__"] = get_init_layers(
+            __name, __namespace["__context_fields__"]
+        )
 
         if not __namespace.get("name"):
             __namespace["name"] = f"context_{uuid.uuid4()}"
@@ -240,19 +731,66 @@ class LifespanContextMeta(type):
             )
 
         newcls = super().__new__(__mcls, __name, __bases, __namespace, **kwargs)
+        newcls.__field_plans__ = build_field_plans(newcls)
         context_classes[newcls.name] = newcls
 
         return newcls
 
 
+# Contexts whose clients are reset in child processes after a fork
+_fork_safe_contexts: "weakref.WeakSet[LifespanContext]" = weakref.WeakSet()
+
+
+def _reset_contexts_after_fork() -> None:
+    for context in list(_fork_safe_contexts):
+        context.after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_contexts_after_fork)
+
+
 class LifespanContext(metaclass=LifespanContextMeta):
     name: Optional[str] = None
     allow_reconfigure = True
+    # Maximum number of threads used to run synchronous initializers in parallel.
+    # If not set, the default for `ThreadPoolExecutor` is used.
+    max_init_workers: Optional[int] = None
+    # Timeouts (in seconds) used by `aterminate()`. The field timeout applies to each
+    # field individually, while the total timeout bounds the whole teardown.
+    # Set either to None to wait indefinitely.
+    field_terminate_timeout: Optional[float] = 10.0
+    terminate_timeout: Optional[float] = 20.0
+    # When a context is reconfigured, the replaced clients are kept open for this many
+    # seconds so that in-flight requests can finish with them before they are closed.
+    reconfigure_grace_period: float = 30.0
+    # Level used to log the timing of each field's lifecycle phases, and the number of
+    # configure/warmup/terminate runs kept in the history for `lifecycle_stats()`.
+    lifecycle_log_level: int = logging.DEBUG
+    lifecycle_history_size: int = 50
+    # Reset the clients in forked child processes (e.g. when a pre-fork server like
+    # gunicorn configures the context with `--preload`) so that workers don't share
+    # the connections that were opened in the parent process.
+    reset_after_fork: bool = True
+
+    # Configured field values. This mapping is never mutated, only replaced.
+    _field_values: Dict[str, Any] = {}
+    # Fingerprints of the configs used to build the current field values
+    _field_fingerprints: Dict[str, str] = {}
+    # Resolved configs (and their fingerprints) for lazy fields
+    _lazy_configs: Dict[str, Tuple[Any, str]] = {}
+    last_configure_result: Optional[ConfigureResult] = None
+    # The event loop that the context was configured on with `aconfigure()`. While it
+    # is running, synchronous reconfigures build and close async clients on it.
+    _loop: Optional[asyncio.AbstractEventLoop] = None
 
     __context_fields__: Dict[str, ContextFieldInfo] = {}
     __default_fields__: Dict[str, str] = {}
     __field_initializers__: Dict[str, Callable] = {}
     __field_terminators__: Dict[str, Callable] = {}
+    __field_warmers__: Dict[str, Callable] = {}
+    __field_init_layers__: List[List[str]] = []
+    __field_plans__: Dict[str, FieldPlan] = {}
 
     def __init__(
         self,
@@ -262,6 +800,21 @@ class LifespanContext(metaclass=LifespanContextMeta):
         if not self.name:
             self.name = f"context_{uuid.uuid4()}"
         self.settings = settings_manager
+        self._field_values = {}
+        self._field_fingerprints = {}
+        self._lazy_configs = {}
+        self._field_slots = {
+            field_name: FieldSlot(self, field_name)
+            for field_name in self.__context_fields__
+        }
+        self._dependencies: Dict[str, Callable[[], Awaitable[Any]]] = {}
+        self._init_locks()
+        self._retiring: Dict[int, Tuple[Dict[str, Any], Any]] = {}
+        self._lifecycle_history: deque[LifecycleRun] = deque(
+            maxlen=self.lifecycle_history_size
+        )
+        if self.reset_after_fork:
+            _fork_safe_contexts.add(self)
 
         # This takes the highest precedence. If it is disabled in config, then
         # it is _absolutely_ disabled.
@@ -277,27 +830,198 @@ class LifespanContext(metaclass=LifespanContextMeta):
         if self.allow_reconfigure:
             self.register_reconfigure()
 
+    def _init_locks(self) -> None:
+        self._swap_lock = threading.Lock()
+        self._lazy_locks = {
+            field_name: threading.Lock()
+            for field_name, field_info in self.__context_fields__.items()
+            if field_info.lazy
+        }
+        self._lazy_async_locks: Dict[str, asyncio.Lock] = {}
+
+    def after_fork(self) -> None:
+        """Reset the context in a forked child process. This is called automatically
+        in the child if `reset_after_fork` is enabled.
+
+        Locks that may have been held by other threads in the parent are recreated,
+        and every field's `after_fork_func` is called with its current value, so that
+        clients drop the connections they inherited without closing them. Values that
+        were waiting to be retired are reset as well, since the timers that would have
+        terminated them don't run in the child.
+        """
+        self._init_locks()
+        # The parent's event loop does not run in the child
+        self._loop = None
+        retiring = [values for values, _ in self._retiring.values()]
+        self._retiring = {}
+        for values in [self._field_values, *retiring]:
+            for field_name, attr_value in values.items():
+                if not (reset_func := self.__field_plans__[field_name].after_fork):
+                    continue
+                try:
+                    reset_func(attr_value)
+                except Exception:
+                    logger.exception(
+                        'Field "%s" on context "%s" failed to reset after fork.',
+                        field_name,
+                        self.name,
+                    )
+
+    def _publish_values(self, field_values: Dict[str, Any]) -> None:
+        """Replace the field values mapping and update the field slots to match."""
+        self._field_values = field_values
+        for field_name, slot in self._field_slots.items():
+            slot.value = field_values.get(field_name, _UNSET)
+
+    def _resolve_field_name(
+        self, field: Optional[str] = None, namespace: Optional[str] = None
+    ) -> str:
+        if field:
+            if field not in self.__context_fields__:
+                raise ValueError(f'"{field}" is not a field on context "{self.name}".')
+            return field
+        if not namespace and len(self.__default_fields__) == 1:
+            namespace = tuple(self.__default_fields__.keys())[0]
+        if not namespace or namespace not in self.__default_fields__:
+            raise ValueError(
+                f'Context "{self.name}" has no default field for namespace "{namespace}".'
+            )
+        return self.__default_fields__[namespace]
+
+    def field_slot(
+        self, field: Optional[str] = None, namespace: Optional[str] = None
+    ) -> FieldSlot:
+        """Get the slot that holds the current value of a field. Slots are updated in
+        place when the context is reconfigured, so they can be resolved once and kept.
+
+        Args:
+            field (Optional[str], optional): Name of the field. If not provided, the
+            default field for the namespace is used.
+            namespace (Optional[str], optional): Namespace to get the default field of.
+            Can be omitted if the context only has one default field.
+
+        Raises:
+            ValueError: The field does not exist, or there is no default field
+
+        Returns:
+            FieldSlot: The field's slot
+        """
+        return self._field_slots[self._resolve_field_name(field, namespace)]
+
+    def dependency(
+        self, field: Optional[str] = None, namespace: Optional[str] = None
+    ) -> Callable[[], Awaitable[Any]]:
+        """Get a FastAPI dependency that resolves to the current value of a field:
+
+            @app.get("/items")
+            async def get_items(cache: Redis = Depends(context.dependency("cache"))):
+                ...
+
+        The field is resolved once, when the dependency is created. At request time, the
+        dependency only reads the field's slot, which is updated on reconfigure. The same
+        function is returned for every call with the same field, so FastAPI's
+        per-request dependency cache resolves the field at most once per request. Lazy
+        fields are initialized without blocking the event loop.
+
+        Args:
+            field (Optional[str], optional): Name of the field. If not provided, the
+            default field for the namespace is used.
+            namespace (Optional[str], optional): Namespace to get the default field of.
+
+        Returns:
+            Callable[[], Awaitable[Any]]: Dependency function for use with `Depends()`
+        """
+        field = self._resolve_field_name(field, namespace)
+        if field not in self._dependencies:
+            slot = self._field_slots[field]
+
+            async def _resolve() -> Any:
+                value = slot.value
+                if value is _UNSET:
+                    return await slot.aget()
+                return value
+
+            _resolve.__name__ = f"{self.name}_{field}"
+            self._dependencies[field] = _resolve
+        return self._dependencies[field]
+
     def register_reconfigure(self):
-        if not self.settings:
-            logger.warning(
-                "No settings manager was passed into the constructor for the %s "
-                "context instance. It is highly recommended that you do, since the "
-                "reconfigure handler will only have access to the context instance.",
+        if self.settings:
+            # The settings manager reconfigures the context as part of its reload, so
+            # that new settings are only committed if the context can use them
+            self.settings.add_context(self)
+            return
+
+        logger.warning(
+            "No settings manager was passed into the constructor for the %s "
+            "context instance. It is highly recommended that you do, since the "
+            "reconfigure handler will only have access to the context instance.",
+            self.name,
+        )
+        # Run after the settings managers have reloaded. The dispatcher runs coroutine
+        # handlers on the app's event loop, so that async clients are built on it.
+        dispatcher.add_handler(
+            RECONFIGURE_SIGNAL, self.areconfigure, group=CONTEXTS_HANDLER_GROUP
+        )
+
+    @contextmanager
+    def _record(
+        self, run: LifecycleRun, field: str, phase: LifecyclePhase
+    ) -> Iterator[FieldLifecycleEvent]:
+        """Time a lifecycle phase for a field and add it to the run."""
+        event = FieldLifecycleEvent(field=field, phase=phase)
+        started = time.perf_counter()
+        try:
+            yield event
+        except BaseException as exc:
+            event.success = False
+            event.error = repr(exc)
+            raise
+        finally:
+            event.duration = time.perf_counter() - started
+            run.events.append(event)
+            logger.log(
+                self.lifecycle_log_level,
+                'Context "%s" field "%s" %s: %.3fs (success: %s, retries: %s)',
                 self.name,
+                field,
+                phase.value,
+                event.duration,
+                event.success,
+                event.retries,
             )
-        dispatcher.add_handler(RECONFIGURE_SIGNAL, self.configure)
 
-    def _initialize_field(
-        self, field: str, field_info: ContextFieldInfo, init_values: Any
-    ) -> bool:
-        """Initialize a field with the given config/values.
-        Functions for initializing this field can come from different places, listed in
-        order of decreasing precedence:
+    def _finish_run(self, run: LifecycleRun, started: float) -> None:
+        run.duration = time.perf_counter() - started
+        self._lifecycle_history.append(run)
+        logger.log(
+            self.lifecycle_log_level,
+            'Context "%s" %s finished in %.3fs.',
+            self.name,
+            run.kind,
+            run.duration,
+        )
+
+    def lifecycle_stats(self) -> List[Dict[str, Any]]:
+        """Get the timing history of the context's configure, warmup, and terminate
+        runs, oldest first. Each run lists the duration, outcome, and retry count of
+        every field's config resolution, initialize, warmup, and terminate phases.
+        """
+        return [run.to_dict() for run in self._lifecycle_history]
 
-        * Use the `initialize_func` specified on the field
-        * Use the decorated `@initializer` classmethod on the context class
-        * As a last resort, attempt to get the field's annotated type and create an
-        instance from that class
+    def _retry_attempts(self, field: str) -> range:
+        return range(self.__field_plans__[field].info.retries + 1)
+
+    def _build_field(
+        self,
+        field: str,
+        field_info: ContextFieldInfo,
+        init_values: Any,
+        run: LifecycleRun,
+    ) -> Any:
+        """Create the value for a field with the given config/values.
+        See `build_field_plans()` for where the initialize function comes from.
+        If the initializer is a coroutine function, it is run to completion.
 
         Args:
             field (_type_): Name of the field to initialize
@@ -305,33 +1029,57 @@ class LifespanContext(metaclass=LifespanContextMeta):
             field_info (_type_): Field metadata declared on the context's attribute
             init_values (_type_): A Pydantic `BaseModel` or dict to initialize the
             attribute with
+            run (LifecycleRun): The run to record the initialize timing in
 
         Returns:
-            bool: The initialization was successful
+            Any: The new field value, or None if the field could not be initialized
         """
         result = None
-        if field_info.initialize_func:
-            result = field_info.initialize_func(init_values)
-        elif _f_init := self.__field_initializers__.get(field):
-            result = _f_init(init_values)
-        elif annotation := self.__annotations__.get(field):
-            if not get_origin(annotation):
-                # The origin of the annotated type is an Annotation, Generic, or Union
-                # type. If this check passed, it means that it was annotated with a type
-                # we can't use to create our context field instance from without any way
-                # to disambiguate it.
-                result = annotation(init_values)
-
-        if result:
-            setattr(self, field, result)
-            return True
-
-        return False
-
-    def _get_config_from_settings_data(self, field, field_info, settings_data):
-        if context_config := getattr(settings_data, field_info.namespace, None):
-            if field_config := getattr(context_config, field):
-                return field_config
+        init_func = self.__field_plans__[field].initializer
+        with self._record(run, field, LifecyclePhase.INITIALIZE) as event:
+            for attempt in self._retry_attempts(field):
+                try:
+                    result = init_func(init_values)
+                    if inspect.isawaitable(result):
+                        result = self._run_coroutine(result)
+                    break
+                except Exception:
+                    if attempt == field_info.retries:
+                        raise
+                    event.retries += 1
+
+        return result or None
+
+    async def _abuild_field(
+        self,
+        field: str,
+        field_info: ContextFieldInfo,
+        init_values: Any,
+        run: LifecycleRun,
+    ) -> Any:
+        """Async version of `_build_field()`. Coroutine initializers are awaited,
+        while synchronous initializers are run in a worker thread so that they don't
+        block the event loop.
+        """
+        result = None
+        plan = self.__field_plans__[field]
+        init_func = plan.initializer
+        with self._record(run, field, LifecyclePhase.INITIALIZE) as event:
+            for attempt in self._retry_attempts(field):
+                try:
+                    if plan.initializer_is_async:
+                        result = await init_func(init_values)
+                    else:
+                        result = await asyncio.to_thread(init_func, init_values)
+                        if inspect.isawaitable(result):
+                            result = await result
+                    break
+                except Exception:
+                    if attempt == field_info.retries:
+                        raise
+                    event.retries += 1
+
+        return result or None
 
     def _get_field_config(
         self,
@@ -371,56 +1119,670 @@ class LifespanContext(metaclass=LifespanContextMeta):
         if not _config:
             _ctx_settings = self.settings.data if self.settings else None
             if _settings := settings_data or _ctx_settings:
-                if field_info.config_getter_func:
-                    _config = field_info.config_getter_func(_settings)
-                else:
-                    _config = self._get_config_from_settings_data(
-                        field, field_info, _settings
-                    )
+                _config = self.__field_plans__[field].config_getter(_settings)
 
         if not _config:
             _config = {}
 
-        if field_info.config_model and not isinstance(_config, field_info.config_model):
-            _config = field_info.config_model(**_config)
+        config_model = self.__field_plans__[field].config_model
+        if config_model and not isinstance(_config, config_model):
+            _config = config_model(**_config)
 
         return _config
 
+    def _check_unconfigured(self, configured_fields: Sequence[str]):
+        uninitialized = set(self.__context_fields__.keys()) - set(configured_fields)
+        if uninitialized:
+            raise RuntimeError(
+                f'The attributes on context "{self.name}" were '
+                f"uninitialized: {uninitialized}"
+            )
+
+    def _is_unchanged(
+        self, field: str, fingerprint: str, result: ConfigureResult
+    ) -> bool:
+        return (
+            field in self._field_values
+            and self._field_fingerprints.get(field) == fingerprint
+            and not set(self.__context_fields__[field].depends_on).intersection(
+                result.rebuilt + result.reset
+            )
+        )
+
+    def _get_layer_configs(
+        self,
+        layer: List[str],
+        settings_data: Optional[BaseModel],
+        all_field_kwargs: Dict[str, Any],
+        fingerprints: Dict[str, str],
+        lazy_configs: Dict[str, Tuple[Any, str]],
+        result: ConfigureResult,
+        force: bool,
+        run: LifecycleRun,
+    ) -> List[Tuple[str, ContextFieldInfo, Any, LifecycleRun]]:
+        """Resolve the configs for a layer of fields, and return the arguments for
+        building each field that needs to be rebuilt. A field is rebuilt if its config
+        fingerprint changed, if any of its dependencies were rebuilt, or if `force` is set.
+        Lazy fields that need to be rebuilt are deferred until they are first accessed.
+        """
+        init_args = []
+        for field_name in layer:
+            field_info = self.__context_fields__[field_name]
+            with self._record(run, field_name, LifecyclePhase.CONFIG):
+                _config = self._get_field_config(
+                    field_name,
+                    field_info,
+                    settings_data,
+                    all_field_kwargs.get(field_name) or {},
+                )
+                fingerprints[field_name] = fingerprint_config(_config)
+            if not force and self._is_unchanged(
+                field_name, fingerprints[field_name], result
+            ):
+                result.unchanged.append(field_name)
+                continue
+            if field_info.lazy:
+                lazy_configs[field_name] = (_config, fingerprints[field_name])
+                result.deferred.append(field_name)
+                if field_name in self._field_values:
+                    result.reset.append(field_name)
+                continue
+            init_args.append((field_name, field_info, _config, run))
+        return init_args
+
+    def _stage_results(
+        self,
+        staged: Dict[str, Any],
+        init_args: List[Tuple[str, ContextFieldInfo, Any, LifecycleRun]],
+        results: List[Any],
+        result: ConfigureResult,
+    ) -> None:
+        errors = []
+        for (field_name, *_), field_value in zip(init_args, results):
+            if isinstance(field_value, BaseException):
+                errors.append(field_value)
+            elif field_value is not None:
+                staged[field_name] = field_value
+                result.rebuilt.append(field_name)
+        if errors:
+            raise errors[0]
+
+    def prepare_configure(
+        self,
+        settings_data: Optional[BaseModel] = None,
+        raise_on_unconfigured=True,
+        force: bool = False,
+        **all_field_kwargs,
+    ) -> StagedConfigure:
+        """Build the new field values for a configure without replacing the current
+        ones. This is the first half of `configure()`, and it lets a caller check that
+        every field can be initialized with new settings before committing to them.
+        The staged values must be passed to either `commit_configure()` or
+        `discard_configure()`.
+
+        If any field fails to initialize, the values built so far are terminated and
+        the error is raised.
+
+        Returns:
+            StagedConfigure: The new field values and configure result
+        """
+        _ctx_settings = self.settings.data if self.settings else None
+        _settings = settings_data or _ctx_settings
+        staged = StagedConfigure(result=ConfigureResult(context=str(self.name)))
+        result = staged.result
+        run = LifecycleRun(kind="reconfigure" if self._field_values else "configure")
+        started = time.perf_counter()
+        try:
+            for layer in self.__field_init_layers__:
+                init_args = self._get_layer_configs(
+                    layer,
+                    _settings,
+                    all_field_kwargs,
+                    staged.fingerprints,
+                    staged.lazy_configs,
+                    result,
+                    force,
+                    run,
+                )
+                if len(init_args) <= 1:
+                    results = [self._build_field(*args) for args in init_args]
+                else:
+                    with ThreadPoolExecutor(
+                        max_workers=self.max_init_workers
+                    ) as executor:
+                        futures = [
+                            executor.submit(self._build_field, *args)
+                            for args in init_args
+                        ]
+                    results = [
+                        future.exception() or future.result() for future in futures
+                    ]
+                self._stage_results(staged.values, init_args, results, result)
+
+            if raise_on_unconfigured:
+                self._check_unconfigured(
+                    result.rebuilt + result.unchanged + result.deferred
+                )
+        except BaseException:
+            self._terminate_values(staged.values)
+            raise
+        finally:
+            self._finish_run(run, started)
+
+        return staged
+
+    def commit_configure(self, staged: StagedConfigure) -> ConfigureResult:
+        """Swap in the field values built by `prepare_configure()`. The replaced values
+        are terminated after `reconfigure_grace_period` seconds.
+        """
+        self._retire_values(
+            self._swap_fields(
+                staged.values, staged.fingerprints, staged.lazy_configs, staged.result
+            )
+        )
+        return staged.result
+
+    def discard_configure(self, staged: StagedConfigure) -> None:
+        """Terminate the field values built by `prepare_configure()` without using them."""
+        self._terminate_values(staged.values)
+
     def configure(
         self,
         settings_data: Optional[BaseModel] = None,
         raise_on_unconfigured=True,
+        force: bool = False,
+        **all_field_kwargs,
+    ) -> Self:
+        """Initialize all fields on the context. Fields are initialized in the order of
+        their `depends_on` declarations, and fields that don't depend on each other are
+        initialized in parallel in a thread pool.
+
+        New field values are built before any of the current ones are replaced. If every
+        field is initialized successfully, all of them are swapped in at once and the
+        replaced values are terminated after `reconfigure_grace_period` seconds.
+        Otherwise, the newly built values are terminated and the current ones are kept.
+
+        Fields whose resolved config is unchanged since the last configure keep their
+        current values. The rebuilt and unchanged fields are recorded in
+        `last_configure_result`.
+
+        If the context was configured with `aconfigure()` and its event loop is still
+        running in another thread, coroutine initializers and terminators are run on
+        that loop, so that async clients are bound to the loop that uses them.
+
+        Args:
+            settings_data (Optional[BaseModel], optional): The settings instance to get
+            field configs from. Defaults to the data of the context's settings manager.
+            raise_on_unconfigured (bool, optional): Raise an error if any field could
+            not be initialized. Defaults to True.
+            force (bool, optional): Rebuild every field, even if its config did not
+            change. Defaults to False.
+
+        Returns:
+            Self: The context instance
+        """
+        self.commit_configure(
+            self.prepare_configure(
+                settings_data, raise_on_unconfigured, force, **all_field_kwargs
+            )
+        )
+        return self
+
+    async def aconfigure(
+        self,
+        settings_data: Optional[BaseModel] = None,
+        raise_on_unconfigured=True,
+        force: bool = False,
         **all_field_kwargs,
     ) -> Self:
+        """Async version of `configure()`. Coroutine initializers within the same
+        dependency layer run concurrently on the event loop, and synchronous initializers
+        run in worker threads. The loop is kept, so that later synchronous reconfigures
+        build their async clients on it as well.
+        """
+        # Dispatchers without an attached loop run `areconfigure()` on a temporary
+        # loop, which is closed as soon as it returns
+        if not in_dispatcher_thread():
+            self._loop = asyncio.get_running_loop()
         _ctx_settings = self.settings.data if self.settings else None
         _settings = settings_data or _ctx_settings
-        configured_fields = {}
-        for field, field_info in self.__context_fields__.items():
-            _config = self._get_field_config(
-                field, field_info, _settings, all_field_kwargs.get(field) or {}
-            )
-            configured_fields[field] = self._initialize_field(
-                field, field_info, _config
+        staged = StagedConfigure(result=ConfigureResult(context=str(self.name)))
+        result = staged.result
+        run = LifecycleRun(kind="reconfigure" if self._field_values else "configure")
+        started = time.perf_counter()
+        try:
+            for layer in self.__field_init_layers__:
+                init_args = self._get_layer_configs(
+                    layer,
+                    _settings,
+                    all_field_kwargs,
+                    staged.fingerprints,
+                    staged.lazy_configs,
+                    result,
+                    force,
+                    run,
+                )
+                results = await asyncio.gather(
+                    *(self._abuild_field(*args) for args in init_args),
+                    return_exceptions=True,
+                )
+                self._stage_results(staged.values, init_args, results, result)
+
+            if raise_on_unconfigured:
+                self._check_unconfigured(
+                    result.rebuilt + result.unchanged + result.deferred
+                )
+        except BaseException:
+            await self._aterminate_values(staged.values)
+            raise
+        finally:
+            self._finish_run(run, started)
+
+        self._aretire_values(
+            self._swap_fields(
+                staged.values, staged.fingerprints, staged.lazy_configs, result
             )
+        )
+        return self
+
+    def reconfigure(
+        self,
+        settings_data: Optional[BaseModel] = None,
+        force: bool = False,
+        **all_field_kwargs,
+    ) -> ConfigureResult:
+        """Reconfigure the context, only rebuilding fields whose config changed.
+        This is the handler that is added for the reconfigure signal.
 
-        if raise_on_unconfigured:
-            uninitialized = set(self.__context_fields__.keys()) - set(
-                [k for k in configured_fields.keys() if k]
+        Returns:
+            ConfigureResult: The fields that were rebuilt and left unchanged
+        """
+        self.configure(settings_data, force=force, **all_field_kwargs)
+        assert self.last_configure_result
+        logger.info(
+            'Reconfigured context "%s". Rebuilt: %s, unchanged: %s',
+            self.name,
+            self.last_configure_result.rebuilt,
+            self.last_configure_result.unchanged,
+        )
+        return self.last_configure_result
+
+    async def areconfigure(
+        self,
+        settings_data: Optional[BaseModel] = None,
+        force: bool = False,
+        **all_field_kwargs,
+    ) -> ConfigureResult:
+        """Async version of `reconfigure()`. This is the handler that is added for the
+        reconfigure signal when the context has no settings manager.
+        """
+        await self.aconfigure(settings_data, force=force, **all_field_kwargs)
+        assert self.last_configure_result
+        logger.info(
+            'Reconfigured context "%s". Rebuilt: %s, unchanged: %s',
+            self.name,
+            self.last_configure_result.rebuilt,
+            self.last_configure_result.unchanged,
+        )
+        return self.last_configure_result
+
+    def _run_coroutine(self, awaitable: Awaitable) -> Any:
+        """Run an awaitable to completion from synchronous code. If the context's event
+        loop is running in another thread, the awaitable is run on it. Otherwise, it is
+        run on a temporary loop with `run_sync()`.
+        """
+        loop = self._loop
+        if loop is not None and loop.is_running():
+            if _get_running_loop() is not loop:
+                return asyncio.run_coroutine_threadsafe(
+                    _await(awaitable), loop
+                ).result()
+            # Blocking the loop's own thread on it would deadlock
+            logger.warning(
+                'Context "%s" ran a coroutine on a temporary event loop, since it was '
+                "called synchronously from its own loop. Use the async methods "
+                "(such as `aconfigure()`) from async code instead.",
+                self.name,
             )
-            if uninitialized:
+        return run_sync(awaitable)
+
+    def _swap_fields(
+        self,
+        staged: Dict[str, Any],
+        fingerprints: Dict[str, str],
+        lazy_configs: Dict[str, Tuple[Any, str]],
+        result: ConfigureResult,
+    ) -> Dict[str, Any]:
+        """Replace the current field values with the staged ones in a single step.
+        Fields that were not staged keep their current values, except for lazy fields
+        that were reset.
+
+        Returns:
+            Dict[str, Any]: The values that were replaced
+        """
+        with self._swap_lock:
+            current = self._field_values
+            field_values = {**current, **staged}
+            for field_name in result.reset:
+                field_values.pop(field_name, None)
+            self._publish_values(field_values)
+            self._field_fingerprints = {
+                **self._field_fingerprints,
+                **{field_name: fingerprints[field_name] for field_name in staged},
+            }
+            self._lazy_configs = {**self._lazy_configs, **lazy_configs}
+            self.last_configure_result = result
+
+        return {
+            field_name: current[field_name]
+            for field_name in list(staged.keys()) + result.reset
+            if field_name in current
+            and current[field_name] is not staged.get(field_name)
+        }
+
+    def _set_lazy_value(self, field: str, field_value: Any) -> Any:
+        """Store the value for a lazy field, unless another thread or task already did.
+        Returns the value that ended up stored on the context.
+        """
+        with self._swap_lock:
+            if field in self._field_values:
+                existing = self._field_values[field]
+            else:
+                _, fingerprint = self._lazy_configs[field]
+                self._publish_values({**self._field_values, field: field_value})
+                self._field_fingerprints = {
+                    **self._field_fingerprints,
+                    field: fingerprint,
+                }
+                return field_value
+
+        # Lost the race, so clean up the duplicate value
+        self._terminate_values({field: field_value})
+        return existing
+
+    def _initialize_lazy_field(self, field: str) -> Any:
+        """Initialize a lazy field on first access. Only one thread will run the
+        initializer, while others wait for it to finish.
+        """
+        field_info = self.__context_fields__[field]
+        for dependency in field_info.depends_on:
+            getattr(self, dependency)
+
+        with self._lazy_locks[field]:
+            if field in self._field_values:
+                return self._field_values[field]
+
+            _config, _ = self._lazy_configs[field]
+            run = LifecycleRun(kind="lazy_initialize")
+            started = time.perf_counter()
+            try:
+                field_value = self._build_field(field, field_info, _config, run)
+            finally:
+                self._finish_run(run, started)
+            if field_value is None:
                 raise RuntimeError(
-                    f'The attributes on context "{self.name}" were '
-                    f"uninitialized: {uninitialized}"
+                    f'Lazy field "{field}" on context "{self.name}" could not be '
+                    "initialized."
                 )
-        return self
+            return self._set_lazy_value(field, field_value)
+
+    async def aget(self, field: str) -> Any:
+        """Get a field value from async code. If the field is lazy and has not been
+        initialized yet, its initializer is run without blocking the event loop.
+        Concurrent calls for the same field wait for a single initialization.
+        """
+        if field in self._field_values or field not in self._lazy_configs:
+            return getattr(self, field)
+
+        field_info = self.__context_fields__[field]
+        for dependency in field_info.depends_on:
+            await self.aget(dependency)
+
+        lock = self._lazy_async_locks.setdefault(field, asyncio.Lock())
+        async with lock:
+            if field in self._field_values:
+                return self._field_values[field]
+
+            _config, _ = self._lazy_configs[field]
+            run = LifecycleRun(kind="lazy_initialize")
+            started = time.perf_counter()
+            try:
+                field_value = await self._abuild_field(field, field_info, _config, run)
+            finally:
+                self._finish_run(run, started)
+            if field_value is None:
+                raise RuntimeError(
+                    f'Lazy field "{field}" on context "{self.name}" could not be '
+                    "initialized."
+                )
+            return self._set_lazy_value(field, field_value)
+
+    def _retire_values(self, retired: Dict[str, Any]) -> None:
+        if not retired:
+            return
+
+        loop = self._loop
+        if loop is not None and loop.is_running():
+            # Close the values on the loop that they were used on
+            loop.call_soon_threadsafe(self._aretire_values, retired)
+            return
+        self._retire_values_later(retired)
+
+    def _retire_values_later(self, retired: Dict[str, Any]) -> None:
+        # Terminated from a timer thread, which runs async terminators on the context's
+        # loop if it is running by then (see `_run_coroutine()`)
+        def _terminate():
+            self._retiring.pop(id(retired), None)
+            self._terminate_values(retired, kind="retire")
+
+        timer = threading.Timer(self.reconfigure_grace_period, _terminate)
+        timer.daemon = True
+        self._retiring[id(retired)] = (retired, timer)
+        timer.start()
+
+    def _aretire_values(self, retired: Dict[str, Any]) -> None:
+        if not retired:
+            return
+        if _get_running_loop() is not self._loop:
+            # A temporary loop may be closed before the grace period is over
+            self._retire_values_later(retired)
+            return
+
+        def _terminate():
+            self._retiring.pop(id(retired), None)
+            asyncio.ensure_future(self._aterminate_values(retired, kind="retire"))
+
+        handle = asyncio.get_running_loop().call_later(
+            self.reconfigure_grace_period, _terminate
+        )
+        self._retiring[id(retired)] = (retired, handle)
+
+    def _pop_retiring(self) -> List[Dict[str, Any]]:
+        """Cancel any pending retirements and return the values waiting on them."""
+        retiring = list(self._retiring.values())
+        self._retiring.clear()
+        for _, handle in retiring:
+            handle.cancel()
+        return [values for values, _ in retiring]
+
+    async def _awarmup_field(self, field: str, run: LifecycleRun) -> float:
+        attr_value = self._field_values[field]
+        with self._record(run, field, LifecyclePhase.WARMUP) as event:
+            for warm_func in self.__field_plans__[field].warmers:
+                if inspect.iscoroutinefunction(warm_func):
+                    await warm_func(attr_value)
+                else:
+                    result = await asyncio.to_thread(warm_func, attr_value)
+                    if inspect.isawaitable(result):
+                        await result
+        return event.duration
+
+    async def awarmup(self) -> Dict[str, float]:
+        """Run the warmup hooks for all configured fields concurrently. For database
+        fields, this opens connections in their pools ahead of time. Lazy fields that
+        have not been accessed are skipped. Failures are logged and do not stop the
+        other fields from warming up.
+
+        Returns:
+            Dict[str, float]: Seconds spent warming up each field that succeeded
+        """
+        fields = [
+            field_name
+            for field_name, plan in self.__field_plans__.items()
+            if field_name in self._field_values and plan.warmers
+        ]
+        run = LifecycleRun(kind="warmup")
+        started = time.perf_counter()
+        results = await asyncio.gather(
+            *(self._awarmup_field(field_name, run) for field_name in fields),
+            return_exceptions=True,
+        )
+        self._finish_run(run, started)
+
+        durations = {}
+        for field_name, result in zip(fields, results):
+            if isinstance(result, BaseException):
+                logger.error(
+                    'Field "%s" on context "%s" failed to warm up: %r',
+                    field_name,
+                    self.name,
+                    result,
+                )
+                continue
+            durations[field_name] = result
+            logger.info(
+                'Warmed up field "%s" on context "%s" in %.3fs.',
+                field_name,
+                self.name,
+                result,
+            )
+        return durations
+
+    def warmup(self) -> Dict[str, float]:
+        """Synchronous version of `awarmup()`. Async clients should be warmed up with
+        `awarmup()` on the event loop that will use them.
+        """
+        return self._run_coroutine(self.awarmup())
+
+    def _terminate_values(
+        self, values: Dict[str, Any], kind: str = "terminate"
+    ) -> None:
+        run = LifecycleRun(kind=kind)
+        started = time.perf_counter()
+        for field_name, attr_value in values.items():
+            if term_func := self.__field_plans__[field_name].terminator:
+                try:
+                    with self._record(run, field_name, LifecyclePhase.TERMINATE):
+                        result = term_func(attr_value)
+                        if inspect.isawaitable(result):
+                            self._run_coroutine(result)
+                except Exception:
+                    logger.exception(
+                        'Field "%s" on context "%s" failed to terminate.',
+                        field_name,
+                        self.name,
+                    )
+        self._finish_run(run, started)
 
     def terminate(self):
-        for field, field_info in self.__context_fields__.items():
-            attr_value = getattr(self, field)
-            if field_info.terminate_func:
-                field_info.terminate_func(attr_value)
-            elif _f_term := self.__field_terminators__.get(field):
-                _f_term(attr_value)
+        for retired in self._pop_retiring():
+            self._terminate_values(retired, kind="retire")
+        self._terminate_values(self._field_values)
+
+    async def _aterminate_field(self, field: str, attr_value: Any, run: LifecycleRun):
+        plan = self.__field_plans__[field]
+        term_func = plan.terminator
+        if not term_func:
+            return
+        with self._record(run, field, LifecyclePhase.TERMINATE):
+            if plan.terminator_is_async:
+                await term_func(attr_value)
+            else:
+                result = await asyncio.to_thread(term_func, attr_value)
+                if inspect.isawaitable(result):
+                    await result
+
+    async def _aterminate_values(
+        self,
+        values: Dict[str, Any],
+        timeout: Optional[float] = None,
+        field_timeout: Optional[float] = None,
+        kind: str = "terminate",
+    ) -> TerminateReport:
+        _timeout = timeout if timeout is not None else self.terminate_timeout
+        _field_timeout = (
+            field_timeout if field_timeout is not None else self.field_terminate_timeout
+        )
+        report = TerminateReport(context=str(self.name))
+        run = LifecycleRun(kind=kind)
+        started = time.perf_counter()
+
+        tasks: Dict[str, asyncio.Task] = {}
+        for field_name, attr_value in values.items():
+            tasks[field_name] = asyncio.create_task(
+                asyncio.wait_for(
+                    self._aterminate_field(field_name, attr_value, run), _field_timeout
+                )
+            )
+
+        if tasks:
+            _, pending = await asyncio.wait(tasks.values(), timeout=_timeout)
+            for task in pending:
+                task.cancel()
+
+        for field_name, task in tasks.items():
+            if not task.done() or task.cancelled():
+                report.timed_out.append(field_name)
+            elif isinstance(task.exception(), asyncio.TimeoutError):
+                report.timed_out.append(field_name)
+            elif exc := task.exception():
+                report.failed[field_name] = exc
+            else:
+                report.terminated.append(field_name)
+        self._finish_run(run, started)
+
+        if report.timed_out:
+            logger.warning(
+                'Fields on context "%s" did not terminate before the deadline: %s',
+                self.name,
+                report.timed_out,
+            )
+        for field_name, exc in report.failed.items():
+            logger.error(
+                'Field "%s" on context "%s" failed to terminate: %r',
+                field_name,
+                self.name,
+                exc,
+            )
+
+        return report
+
+    async def aterminate(
+        self,
+        timeout: Optional[float] = None,
+        field_timeout: Optional[float] = None,
+    ) -> TerminateReport:
+        """Terminate all fields on the context concurrently. Coroutine terminators
+        (and terminators that return awaitables, such as `aclose()`) are awaited, while
+        synchronous terminators run in worker threads.
+
+        Values that are still waiting out their grace period after a reconfigure are
+        terminated as well.
+
+        Args:
+            timeout (Optional[float], optional): Total time to wait for all fields to
+            terminate. Defaults to the `terminate_timeout` class attribute.
+            field_timeout (Optional[float], optional): Time to wait for each field to
+            terminate. Defaults to the `field_terminate_timeout` class attribute.
+
+        Returns:
+            TerminateReport: The fields that were terminated, timed out, or failed
+        """
+        for retired in self._pop_retiring():
+            await self._aterminate_values(
+                retired, timeout, field_timeout, kind="retire"
+            )
+        return await self._aterminate_values(self._field_values, timeout, field_timeout)
 
     def get_default(self, namespace: Optional[str] = None) -> Any:
         if not namespace and len(self.__default_fields__) == 1:
@@ -1,3 +1,5 @@
+import asyncio
+import inspect
 from typing import Union
 
 from redis import Redis
@@ -66,3 +68,40 @@ def make_redis_client(
             return make_async_redis_client(config)
         else:
             return make_sync_redis_client(config)
+
+
+async def awarmup_redis_client(client: RedisClientTypes, connections: int = 1) -> None:
+    """Open connections in the client's pool ahead of time by sending concurrent
+    PINGs, each of which checks out its own connection.
+    """
+    if isinstance(client, (AsyncRedis, AsyncRedisCluster)) or (
+        inspect.iscoroutinefunction(client.ping)
+    ):
+        # The `ping()` of async clients is a plain function that returns an awaitable,
+        # so it has to be called on the loop and its result awaited
+        async def ping() -> None:
+            result = client.ping()
+            if inspect.isawaitable(result):
+                await result
+
+        await asyncio.gather(*(ping() for _ in range(connections)))
+    else:
+        await asyncio.gather(
+            *(asyncio.to_thread(client.ping) for _ in range(connections))
+        )
+
+
+def reset_redis_client_after_fork(client: RedisClientTypes) -> None:
+    """Drop the connections in the client's pools that were inherited from a parent
+    process, without closing them. New connections are opened when they are needed.
+    """
+    if isinstance(client, (Redis, AsyncRedis)):
+        client.connection_pool.reset()
+    elif isinstance(client, RedisCluster):
+        for node in client.nodes_manager.nodes_cache.values():
+            if node.redis_connection:
+                node.redis_connection.connection_pool.reset()
+    elif isinstance(client, AsyncRedisCluster):
+        for node in client.nodes_manager.nodes_cache.values():
+            node._connections.clear()
+            node._free.clear()
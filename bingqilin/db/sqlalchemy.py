@@ -1,4 +1,5 @@
-from contextlib import asynccontextmanager, contextmanager
+import asyncio
+from contextlib import AsyncExitStack, asynccontextmanager, contextmanager
 from typing import Any, AsyncGenerator, Callable, Generator, List, Optional, Type
 
 from pydantic import BaseModel
@@ -21,6 +22,11 @@ class ObjectNotFoundError(Exception):
     pass
 
 
+def _get_pool_size(engine: Engine, default: int) -> int:
+    pool_size = getattr(engine.pool, "size", None)
+    return pool_size() if callable(pool_size) else default
+
+
 class SQLAlchemyClient:
     sync_engine: Engine
     sync_session: sessionmaker[Session]
@@ -39,6 +45,44 @@ class SQLAlchemyClient:
             bind=self.async_engine, autoflush=False, autocommit=False
         )
 
+    async def aclose(self):
+        """Dispose of the connection pools for both engines. Closing the sync engine's
+        connections blocks, so it's done in a thread.
+        """
+        await asyncio.gather(
+            asyncio.to_thread(self.sync_engine.dispose), self.async_engine.dispose()
+        )
+
+    def reset_after_fork(self):
+        """Drop the pooled connections inherited from a parent process. The
+        connections are not closed, since the parent may still be using them.
+        """
+        self.sync_engine.dispose(close=False)
+        self.async_engine.sync_engine.dispose(close=False)
+
+    async def awarmup(self, connections: int = 1):
+        """Open connections in both engines' pools ahead of time. The connections are
+        checked out at the same time so that each one is a separate pool connection,
+        and the number is capped to the size of the pool.
+        """
+        sync_count = min(connections, _get_pool_size(self.sync_engine, connections))
+        sync_conns = await asyncio.gather(
+            *(asyncio.to_thread(self.sync_engine.connect) for _ in range(sync_count))
+        )
+        for conn in sync_conns:
+            conn.close()
+
+        async_count = min(
+            connections, _get_pool_size(self.async_engine.sync_engine, connections)
+        )
+        async with AsyncExitStack() as stack:
+            await asyncio.gather(
+                *(
+                    stack.enter_async_context(self.async_engine.connect())
+                    for _ in range(async_count)
+                )
+            )
+
     def get_sync_db(self):
         db: Session = self.sync_session()
 
@@ -194,14 +238,11 @@ def get_sync_db(
     Returns:
         Callable[..., Generator]: Function returned for use with `Depends()`
     """
+    # Resolve the field once, so each request only reads the field's current value
+    slot = ctx_object.field_slot(client_name, ContextFieldTypes.DATABASES)
 
     def _resolve():
-        if not client_name:
-            client: SQLAlchemyClient = ctx_object.get_default(
-                ContextFieldTypes.DATABASES
-            )
-        else:
-            client: SQLAlchemyClient = getattr(ctx_object, client_name)
+        client: SQLAlchemyClient = slot.get()
         yield from client.get_sync_db()
 
     return _resolve
@@ -221,14 +262,11 @@ def get_async_db(
     Returns:
         Callable[..., AsyncGenerator]: Function returned for use with `Depends()`
     """
+    # Resolve the field once, so each request only reads the field's current value
+    slot = ctx_object.field_slot(client_name, ContextFieldTypes.DATABASES)
 
     async def _resolve():
-        if not client_name:
-            client: SQLAlchemyClient = ctx_object.get_default(
-                ContextFieldTypes.DATABASES
-            )
-        else:
-            client: SQLAlchemyClient = getattr(ctx_object, client_name)
+        client: SQLAlchemyClient = await slot.aget()
         async for _ in client.get_async_db():
             yield _
 
@@ -1,5 +1,7 @@
 import json
-from typing import Any, Dict, Literal, Optional, Type, Union
+import os
+import threading
+from typing import Any, Dict, Literal, Optional, Tuple, Type, Union
 
 from botocore.exceptions import ClientError
 from pydantic import BaseModel, ConfigDict
@@ -20,10 +22,43 @@ from bingqilin.logger import bq_logger
 
 logger = bq_logger.getChild("aws.conf.sources")
 
+# Settings sources are created again on every load and reload of the settings, so the
+# boto3 sessions and clients are cached and shared by the source instances. They are
+# keyed by pid, since clients should not be shared with forked processes.
+_SESSIONS: Dict[Tuple, Any] = {}
+_CLIENTS: Dict[Tuple, Any] = {}
+_CLIENTS_LOCK = threading.Lock()
+
+
+def get_cached_session(region, access_key_id, secret_access_key):
+    from boto3 import Session
+
+    key = (os.getpid(), region, access_key_id, secret_access_key)
+    with _CLIENTS_LOCK:
+        if key not in _SESSIONS:
+            _SESSIONS[key] = Session(
+                region_name=region,
+                aws_access_key_id=access_key_id,
+                aws_secret_access_key=secret_access_key,
+            )
+        return _SESSIONS[key]
+
+
+def get_cached_client(session, service_name, region):
+    key = (os.getpid(), id(session), service_name, region)
+    with _CLIENTS_LOCK:
+        if key not in _CLIENTS:
+            # Sessions are not thread-safe, but the clients they create are
+            _CLIENTS[key] = session.client(
+                service_name=service_name, region_name=region
+            )
+        return _CLIENTS[key]
+
 
 class BaseAWSSettingsSource(BingqilinSettingsSource):
     type: Literal["aws"]
     package_deps = ["boto3"]
+    remote = True
     AWS_SERVICE = None
     DEFAULT_ALWAYS_FETCH = True
 
@@ -41,7 +76,7 @@ class BaseAWSSettingsSource(BingqilinSettingsSource):
             raise RuntimeError("An AWS service ID must be specified.")
 
         try:
-            from boto3 import Session
+            import boto3  # noqa: F401
         except (ModuleNotFoundError, ImportError):
             raise MissingDependencyError(self)
 
@@ -52,25 +87,42 @@ class BaseAWSSettingsSource(BingqilinSettingsSource):
         _secret_access_key = secret_access_key or settings_cls.model_config.get(
             "aws_secret_access_key"
         )
-        self.session = Session(
-            region_name=region,
-            aws_access_key_id=_access_key_id,
-            aws_secret_access_key=_secret_access_key,
-        )
+        self.session = get_cached_session(region, _access_key_id, _secret_access_key)
         self.clients_by_region = {}
-        self.clients_by_region[region] = self.session.client(
-            service_name=self.AWS_SERVICE, region_name=region
+        self.clients_by_region[region] = get_cached_client(
+            self.session, self.AWS_SERVICE, region
         )
         self.always_fetch = (
             settings_cls.model_config.get("always_fetch") or always_fetch
         )
 
+    @property
+    def depends_on_state(self) -> bool:
+        # Fields that are not always fetched are skipped if a higher-precedence
+        # source already set them, so the source has to wait for those values
+        def fields_walk(model: type[BaseModel]) -> bool:
+            for field_info in model.model_fields.values():
+                if field_info.annotation and isinstance(
+                    field_info.annotation, type(BaseModel)
+                ):
+                    if fields_walk(field_info.annotation):
+                        return True
+                    continue
+                aws_extra = self.get_aws_extra(field_info)
+                if aws_extra.get("service") != self.AWS_SERVICE:
+                    continue
+                if not self.do_always_fetch(field_info):
+                    return True
+            return False
+
+        return fields_walk(self.settings_cls)
+
     def get_region_client(self, region=None):
         if not region:
             region = self.default_region
         if region not in self.clients_by_region:
-            self.clients_by_region[region] = self.session.client(
-                service_name=self.AWS_SERVICE, region_name=region
+            self.clients_by_region[region] = get_cached_client(
+                self.session, self.AWS_SERVICE, region
             )
         return self.clients_by_region[region]
 
@@ -78,9 +130,9 @@ class BaseAWSSettingsSource(BingqilinSettingsSource):
         if not field_info.json_schema_extra:
             return {}
         aws_extra = field_info.json_schema_extra.get(AWS_FIELD_EXTRA_NAMESPACE) or {}
-        assert isinstance(aws_extra, dict), (
-            f"AWS extra must be a dict, got {type(aws_extra)}"
-        )
+        assert isinstance(
+            aws_extra, dict
+        ), f"AWS extra must be a dict, got {type(aws_extra)}"
         return aws_extra
 
     def do_always_fetch(self, field_info: FieldInfo) -> bool:
@@ -155,6 +207,8 @@ class BaseAWSSettingsSource(BingqilinSettingsSource):
 
 class AWSSystemsManagerParamsSource(BaseAWSSettingsSource):
     type: Literal["aws_ssm"]
+    # Parameters are fetched with decryption, so any of them can be a SecureString
+    secret = True
 
     AWS_SERVICE = AWS_SSM_SERVICE
 
@@ -227,6 +281,7 @@ class AWSSystemsManagerParamsSource(BaseAWSSettingsSource):
 
 class AWSSecretsManagerSource(BaseAWSSettingsSource):
     type: Literal["aws_secretsmanager"]
+    secret = True
 
     AWS_SERVICE = AWS_SECRETS_MANAGER_SERVICE
 
@@ -0,0 +1,89 @@
+import json
+
+import rich
+import typer
+from rich.table import Table
+from typer import Option
+from typing_extensions import Annotated
+
+from bingqilin.conf.profile import DEFAULT_PROVENANCE, SettingsLoadProfile
+from bingqilin.management import BaseCommand, get_app_settings
+from bingqilin.management.utils import log_panel
+
+
+class Command(BaseCommand):
+    help = (
+        "Load the app settings and report how long each settings source took, and "
+        "which source supplied each field."
+    )
+    short_help = "Profile loading the app settings"
+
+    def print_sources(self, profile: SettingsLoadProfile):
+        table = Table(
+            title=f"{profile.settings_class} loaded in {profile.duration:.4f}s",
+            title_justify="left",
+        )
+        table.add_column("#", justify="right")
+        table.add_column("Source")
+        table.add_column("Duration (s)", justify="right")
+        table.add_column("Fields set", justify="right")
+        table.add_column("Fields supplied", justify="right")
+
+        supplied = list(profile.provenance.values())
+        unused = {id(timing) for timing in profile.unused_sources()}
+        for timing in profile.sources:
+            name = timing.name
+            if timing.error:
+                name = f"[red]{name} ({timing.error})[/red]"
+            elif id(timing) in unused:
+                name = f"[yellow]{name} (overridden)[/yellow]"
+            table.add_row(
+                str(timing.index),
+                name,
+                f"{timing.duration:.4f}",
+                str(len(timing.fields)),
+                str(supplied.count(timing.name)),
+            )
+        rich.print(table)
+
+    def print_provenance(self, profile: SettingsLoadProfile, all_fields: bool):
+        table = Table(title="Field provenance", title_justify="left")
+        table.add_column("Field")
+        table.add_column("Source")
+        for path, source in profile.provenance.items():
+            if source == DEFAULT_PROVENANCE and not all_fields:
+                continue
+            table.add_row(path, source)
+        rich.print(table)
+
+    def handle(
+        self,
+        as_json: Annotated[
+            bool, Option("--json", help="Print the profile as JSON.")
+        ] = False,
+        all_fields: Annotated[
+            bool,
+            Option(help="Include fields that were not set by any source."),
+        ] = False,
+    ):
+        """
+        Command that builds a new instance of the app settings (without affecting the
+        running app) and profiles its settings sources.
+        """
+        settings = get_app_settings()
+        if not settings:
+            log_panel("Could not load the app settings.", level="error")
+            raise typer.Exit(code=1)
+
+        try:
+            profile = settings.profile_load()
+        except Exception as exc:
+            log_panel(f"Loading the settings failed: {exc!r}", level="error")
+            raise typer.Exit(code=1)
+
+        if as_json:
+            print(json.dumps(profile.to_dict(), indent=2))
+            return
+
+        self.print_sources(profile)
+        self.print_provenance(profile, all_fields)
@@ -1,41 +1,526 @@
+import asyncio
+import dataclasses
+import inspect
 import signal
+import threading
+import time
+import uuid
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from enum import StrEnum
 from functools import wraps
-from typing import Callable, Dict, List
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from bingqilin.logger import bq_logger
+
+logger = bq_logger.getChild("signal")
 
 
 class DuplicateHandlerError(RuntimeError):
     pass
 
 
+# Handlers run in order of their group's priority (lowest first), and the handlers
+# within a group run concurrently. Settings are reloaded before contexts reconfigure.
+SETTINGS_HANDLER_GROUP = "settings"
+DEFAULT_HANDLER_GROUP = "default"
+CONTEXTS_HANDLER_GROUP = "contexts"
+HANDLER_GROUP_PRIORITIES: Dict[str, int] = {
+    SETTINGS_HANDLER_GROUP: 0,
+    DEFAULT_HANDLER_GROUP: 50,
+    CONTEXTS_HANDLER_GROUP: 100,
+}
+
+
+class HandlerRegistration:
+    """A handler added to the dispatcher.
+
+    Bound methods are held through a weak reference, so that registering a handler
+    does not keep its owner (such as a context or settings manager) alive. Once the
+    owner is garbage collected, the registration is dead and is dropped. Other
+    callables are held strongly.
+
+    Registrations are identified by their owner and key. For bound methods, the key
+    defaults to the method name, and for other callables, it is the callable itself.
+    """
+
+    __slots__ = ("_handler", "_ref", "owner_id", "key", "group", "priority")
+
+    def __init__(
+        self,
+        handler: Callable,
+        group: str = DEFAULT_HANDLER_GROUP,
+        priority: int = HANDLER_GROUP_PRIORITIES[DEFAULT_HANDLER_GROUP],
+        key: Optional[Hashable] = None,
+    ) -> None:
+        self._handler: Optional[Callable] = None
+        self._ref: Optional[weakref.WeakMethod] = None
+        # Builtins (such as `print`) also have a `__self__`, but can't be weakly
+        # referenced, so only Python methods are
+        if inspect.ismethod(handler):
+            self._ref = weakref.WeakMethod(handler)
+            self.owner_id: Optional[int] = id(handler.__self__)
+            default_key: Hashable = handler.__func__.__name__  # type: ignore
+        else:
+            self._handler = handler
+            self.owner_id = None
+            default_key = handler
+        self.key: Hashable = default_key if key is None else key
+        self.group = group
+        self.priority = priority
+
+    @property
+    def handler(self) -> Optional[Callable]:
+        """The handler, or None if its owner has been garbage collected."""
+        return self._ref() if self._ref else self._handler
+
+    @property
+    def alive(self) -> bool:
+        return self.handler is not None
+
+    @property
+    def weak(self) -> bool:
+        return self._ref is not None
+
+    @property
+    def identity(self) -> Tuple[Optional[int], Hashable]:
+        return (self.owner_id, self.key)
+
+    def to_dict(self) -> Dict[str, Any]:
+        handler = self.handler
+        return {
+            "name": get_handler_name(handler) if handler else None,
+            "group": self.group,
+            "priority": self.priority,
+            "weak": self.weak,
+            "alive": handler is not None,
+        }
+
+
+@dataclass
+class HandlerReport:
+    """Outcome of running a single handler."""
+
+    name: str
+    group: str
+    priority: int
+    duration: float = 0.0
+    success: bool = True
+    error: Optional[str] = None
+    # The handler's return value, converted so that it can be sent as JSON
+    result: Any = None
+
+
+class DispatchJobStatus(StrEnum):
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+@dataclass
+class DispatchJob:
+    """A requested run of the handlers for a signal. Requests that arrive before the
+    job starts are coalesced into it.
+    """
+
+    signal: int
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    status: DispatchJobStatus = DispatchJobStatus.PENDING
+    # Number of requests (signals or HTTP calls) coalesced into this job
+    requests: int = 1
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+    handlers: List[HandlerReport] = field(default_factory=list)
+    _done: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the job is finished. Returns False if the timeout expired."""
+        return self._done.wait(timeout)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "signal": self.signal,
+            "status": self.status.value,
+            "requests": self.requests,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+            "handlers": [dataclasses.asdict(report) for report in self.handlers],
+        }
+
+
 class SignalHandlerDispatcher:
-    handlers: Dict[int, List[Callable]] = {}
+    handlers: Dict[int, List[HandlerRegistration]] = {}
+    # Number of finished jobs to keep around so that they can still be polled
+    job_history_size: int = 100
+
+    def __init__(self) -> None:
+        self.jobs: OrderedDict[str, DispatchJob] = OrderedDict()
+        self._pending: Dict[int, DispatchJob] = {}
+        self._jobs_lock = threading.Lock()
+        # A single worker runs the jobs one at a time, off of the event loop
+        self._executor = ThreadPoolExecutor(
+            max_workers=1,
+            thread_name_prefix="bingqilin-dispatch",
+            initializer=_mark_dispatcher_thread,
+        )
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
 
     def add_handler(
-        self, for_signal: int, handler: Callable, raise_on_duplicate: bool = False
-    ):
-        if for_signal not in self.handlers:
-            self.handlers[for_signal] = []
-            signal.signal(for_signal, self.dispatch_handlers)
+        self,
+        for_signal: int,
+        handler: Callable,
+        raise_on_duplicate: bool = False,
+        group: str = DEFAULT_HANDLER_GROUP,
+        priority: Optional[int] = None,
+        key: Optional[Hashable] = None,
+    ) -> HandlerRegistration:
+        """Add a handler for a signal. Adding a handler that is already registered (by
+        the same owner with the same key) replaces the existing registration, so that
+        the handler still only runs once.
+
+        Args:
+            for_signal (int): The signal to handle
+            handler (Callable): Function called with no arguments
+            raise_on_duplicate (bool, optional): Raise an error if the handler was
+            already added. Defaults to False.
+            group (str, optional): Group to run the handler in. Handlers in the same
+            group run concurrently. Defaults to "default".
+            priority (Optional[int], optional): Order in which the group runs (lowest
+            first). Defaults to the priority in `HANDLER_GROUP_PRIORITIES`, or the
+            default group's priority for other groups.
+            key (Optional[Hashable], optional): Key that identifies the handler along
+            with its owner. Defaults to the method name for bound methods, or the
+            handler itself otherwise.
 
-        if handler in self.handlers[for_signal] and raise_on_duplicate:
-            raise DuplicateHandlerError(
-                f"Handler {handler} already present for signal {for_signal}."
+        Returns:
+            HandlerRegistration: The registration for the handler
+        """
+        if priority is None:
+            priority = HANDLER_GROUP_PRIORITIES.get(
+                group, HANDLER_GROUP_PRIORITIES[DEFAULT_HANDLER_GROUP]
             )
+        registration = HandlerRegistration(
+            handler, group=group, priority=priority, key=key
+        )
+
+        if for_signal not in self.handlers:
+            self.handlers[for_signal] = []
+            self._install_signal_handler(for_signal)
 
-        self.handlers[for_signal].append(handler)
+        registrations = self._live_registrations(for_signal)
+        for index, existing in enumerate(registrations):
+            if existing.identity != registration.identity:
+                continue
+            if raise_on_duplicate:
+                raise DuplicateHandlerError(
+                    f"Handler {handler} already present for signal {for_signal}."
+                )
+            registrations[index] = registration
+            break
+        else:
+            registrations.append(registration)
+        return registration
 
     def remove_handler(self, for_signal: int, handler: Callable):
-        if handler not in (self.handlers.get(for_signal) or []):
+        if for_signal not in self.handlers:
             return
 
-        self.handlers[for_signal].remove(handler)
+        registrations = [
+            registration
+            for registration in self._live_registrations(for_signal)
+            if registration.handler != handler
+        ]
+        if registrations:
+            self.handlers[for_signal] = registrations
+        else:
+            # The next `add_handler()` for the signal installs the signal handler again
+            del self.handlers[for_signal]
+
+    def _live_registrations(self, for_signal: int) -> List[HandlerRegistration]:
+        """Get the registrations for a signal, dropping those whose owner is gone."""
+        registrations = self.handlers.get(for_signal)
+        if registrations is None:
+            return []
+        if not all(registration.alive for registration in registrations):
+            registrations[:] = [
+                registration for registration in registrations if registration.alive
+            ]
+        return registrations
 
     def get_handlers(self, for_signal: int) -> List[Callable]:
-        return self.handlers.get(for_signal) or []
+        handlers = []
+        for registration in self._live_registrations(for_signal):
+            if handler := registration.handler:
+                handlers.append(handler)
+        return handlers
+
+    def count_handlers(self, for_signal: Optional[int] = None) -> int:
+        """Count the live handlers for a signal, or for every signal if not given."""
+        signals = list(self.handlers) if for_signal is None else [for_signal]
+        return sum(len(self._live_registrations(sig)) for sig in signals)
+
+    def list_handlers(
+        self, for_signal: Optional[int] = None
+    ) -> Dict[int, List[Dict[str, Any]]]:
+        """Describe the live handlers for a signal (or for every signal if not given),
+        in the order that they run.
+
+        Returns:
+            Dict[int, List[Dict[str, Any]]]: Handler descriptions, keyed by signal
+        """
+        signals = list(self.handlers) if for_signal is None else [for_signal]
+        return {
+            sig: [
+                registration.to_dict()
+                for stage in self.get_handler_stages(sig)
+                for registration in stage
+            ]
+            for sig in signals
+        }
+
+    def get_handler_stages(self, for_signal: int) -> List[List[HandlerRegistration]]:
+        """Group the handlers for a signal into the stages they run in. Stages are
+        ordered by priority, and each holds the handlers of one group.
+        """
+        stages: Dict[Tuple[int, str], List[HandlerRegistration]] = {}
+        for registration in self._live_registrations(for_signal):
+            key = (registration.priority, registration.group)
+            stages.setdefault(key, []).append(registration)
+        return [stages[key] for key in sorted(stages, key=lambda key: key[0])]
+
+    def _install_signal_handler(self, for_signal: int) -> None:
+        if self._loop and not self._loop.is_closed():
+            self._loop.add_signal_handler(for_signal, self.request_dispatch, for_signal)
+            return
+        try:
+            signal.signal(for_signal, self._handle_signal)
+        except ValueError:
+            # Signal handlers can only be set from the main thread
+            logger.warning(
+                "Could not install a handler for signal %s outside of the main thread.",
+                for_signal,
+            )
+
+    def _handle_signal(self, for_signal: int, _=None):
+        # Without an event loop, the signal interrupts whatever the main thread is
+        # doing. Hand the request off to a thread so that no locks are taken here.
+        threading.Thread(
+            target=self.request_dispatch, args=(for_signal,), daemon=True
+        ).start()
+
+    def attach_loop(self, loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+        """Deliver signals through an event loop with `loop.add_signal_handler()`, so
+        that they never interrupt the loop's thread. Coroutine handlers are also run on
+        this loop. Defaults to the running loop.
+
+        Without an attached loop, coroutine handlers only run when they are dispatched
+        by `request_dispatch()`, each on a temporary loop in the dispatcher's thread.
+        """
+        loop = loop or asyncio.get_running_loop()
+        if loop is self._loop:
+            return
+        self._loop = loop
+        for for_signal in self.handlers:
+            self._install_signal_handler(for_signal)
+
+    def detach_loop(self) -> None:
+        """Stop delivering signals through the attached event loop."""
+        loop, self._loop = self._loop, None
+        if not loop or loop.is_closed():
+            return
+        for for_signal in self.handlers:
+            loop.remove_signal_handler(for_signal)
+            self._install_signal_handler(for_signal)
+
+    def request_dispatch(self, for_signal: int) -> DispatchJob:
+        """Request that the handlers for a signal are run in the dispatch worker thread.
+        This returns right away with a job that can be polled or waited on.
+
+        If a job for the signal is still waiting to start, the request is coalesced
+        into it instead of creating a new one. A request that arrives while a job is
+        running queues one more job, so that the handlers always run at least once
+        after the latest request.
+
+        Args:
+            for_signal (int): The signal to run the handlers for
+
+        Returns:
+            DispatchJob: The job that will run the handlers
+        """
+        with self._jobs_lock:
+            if pending := self._pending.get(for_signal):
+                pending.requests += 1
+                return pending
+
+            job = DispatchJob(signal=for_signal)
+            self._pending[for_signal] = job
+            self.jobs[job.id] = job
+            while len(self.jobs) > self.job_history_size:
+                self.jobs.popitem(last=False)
+
+        self._executor.submit(self._run_job, job)
+        return job
+
+    def get_job(self, job_id: str) -> Optional[DispatchJob]:
+        return self.jobs.get(job_id)
+
+    def _run_job(self, job: DispatchJob) -> None:
+        with self._jobs_lock:
+            # Requests from now on need a new job, since the handlers have started
+            self._pending.pop(job.signal, None)
+            job.status = DispatchJobStatus.RUNNING
+            job.started_at = time.time()
+
+        try:
+            self.dispatch_handlers(job.signal, reports=job.handlers)
+        except Exception as exc:
+            logger.exception("Handlers for signal %s failed.", job.signal)
+            job.status = DispatchJobStatus.FAILED
+            job.error = repr(exc)
+        else:
+            if failed := [report.name for report in job.handlers if not report.success]:
+                job.status = DispatchJobStatus.FAILED
+                job.error = f"Handlers failed: {', '.join(failed)}"
+            else:
+                job.status = DispatchJobStatus.SUCCEEDED
+        finally:
+            job.finished_at = time.time()
+            job._done.set()
+
+    def _call_handler(self, handler: Callable) -> Any:
+        """Call a handler, and wait for the result if it returns an awaitable.
+
+        Awaitables run on the attached event loop. Without one, they run on a loop of
+        their own, but only in the dispatcher's threads (see `request_dispatch()`),
+        since that loop is closed as soon as the handler returns. Anywhere else, a
+        loop has to be attached with `attach_loop()`.
+        """
+        result = handler()
+        if not inspect.isawaitable(result):
+            return result
+        loop = self._loop
+        if loop and loop.is_running() and not _in_loop_thread(loop):
+            return asyncio.run_coroutine_threadsafe(result, loop).result()
+        if in_dispatcher_thread():
+            return asyncio.run(result)
+        if inspect.iscoroutine(result):
+            result.close()
+        raise RuntimeError(
+            f'Handler "{get_handler_name(handler)}" returned an awaitable outside of '
+            "the dispatcher's threads, without an attached event loop to run it on. "
+            "Call `dispatcher.attach_loop()` from the event loop, and use "
+            "`request_dispatch()` to run the handlers from its thread."
+        )
+
+    def _run_handler(
+        self, registration: HandlerRegistration
+    ) -> Optional[HandlerReport]:
+        # Keep the handler (and its owner) alive while it runs
+        handler = registration.handler
+        if handler is None:
+            return None
+        report = HandlerReport(
+            name=get_handler_name(handler),
+            group=registration.group,
+            priority=registration.priority,
+        )
+        started = time.perf_counter()
+        try:
+            report.result = serialize_result(self._call_handler(handler))
+        except Exception as exc:
+            logger.exception('Handler "%s" failed.', report.name)
+            report.success = False
+            report.error = repr(exc)
+        report.duration = time.perf_counter() - started
+        logger.info(
+            'Handler "%s" (group: %s) finished in %.3fs (success: %s)',
+            report.name,
+            report.group,
+            report.duration,
+            report.success,
+        )
+        return report
+
+    def dispatch_handlers(
+        self,
+        for_signal: int,
+        _=None,
+        reports: Optional[List[HandlerReport]] = None,
+    ) -> List[HandlerReport]:
+        """Run the handlers for a signal, one group at a time in order of priority.
+        The handlers within a group run concurrently in threads. An exception raised by
+        a handler is recorded in its report, and doesn't stop any other handler.
+
+        Returns:
+            List[HandlerReport]: The outcome and timing of each handler
+        """
+        reports = [] if reports is None else reports
+        for stage in self.get_handler_stages(for_signal):
+            if len(stage) == 1:
+                stage_reports = [self._run_handler(stage[0])]
+            else:
+                with ThreadPoolExecutor(
+                    max_workers=len(stage),
+                    thread_name_prefix="bingqilin-handler",
+                    initializer=_mark_dispatcher_thread,
+                ) as executor:
+                    stage_reports = list(executor.map(self._run_handler, stage))
+            reports.extend(report for report in stage_reports if report)
+        return reports
+
+
+def get_handler_name(handler: Callable) -> str:
+    if (owner := getattr(handler, "__self__", None)) is not None:
+        # Bound methods on named objects, such as contexts
+        if owner_name := getattr(owner, "name", None):
+            return f"{owner_name}.{handler.__name__}"
+    return getattr(handler, "__qualname__", None) or repr(handler)
+
+
+def serialize_result(value: Any) -> Any:
+    """Convert a handler's return value into something that can be sent as JSON."""
+    if value is None or isinstance(value, (str, int, float, bool, list, dict)):
+        return value
+    if to_dict := getattr(value, "to_dict", None):
+        return to_dict()
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return dataclasses.asdict(value)
+    return repr(value)
+
+
+# Marks the threads owned by dispatchers (the job worker and the threads that run a
+# stage of handlers), which never have an event loop of their own
+_dispatcher_thread = threading.local()
+
+
+def _mark_dispatcher_thread() -> None:
+    _dispatcher_thread.active = True
+
+
+def in_dispatcher_thread() -> bool:
+    """Whether the current thread is owned by a dispatcher. Event loops running in
+    these threads are temporary (see `SignalHandlerDispatcher._call_handler()`).
+    """
+    return getattr(_dispatcher_thread, "active", False)
+
 
-    def dispatch_handlers(self, for_signal: int, _=None):
-        for handler in dispatcher.get_handlers(for_signal):
-            handler()
+def _in_loop_thread(loop: asyncio.AbstractEventLoop) -> bool:
+    try:
+        return asyncio.get_running_loop() is loop
+    except RuntimeError:
+        return False
 
 
 dispatcher = SignalHandlerDispatcher()
@@ -1,7 +1,21 @@
 from enum import Enum
-from typing import Any, Dict, Mapping, MutableMapping, MutableSequence
+from typing import (
+    Any,
+    Dict,
+    Hashable,
+    List,
+    Mapping,
+    MutableMapping,
+    MutableSequence,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 
 DEFAULT_PATH_DELIMITER = "/"
+# Matches any single key in a path of `SequenceMergeStrategies`
+WILDCARD_KEY = "*"
 
 
 class SEQUENCE_MERGE_STRATEGY(Enum):
@@ -9,11 +23,10 @@ class SEQUENCE_MERGE_STRATEGY(Enum):
     Behavior to use when merging two sequences.
 
     REPLACE: Replace the current value with the newer one
-    APPEND: Append the newer value to the current one
+    CONCATENATE: Append the newer value to the current one
     UNIQUE: Append all elements from the newer one to the current value
-            if they don't exist in the current sequence
-
-    NOTE: If the elements in either sequence are not hashable, a TypeError will be raised.
+            if they don't exist in the current sequence. The order of the elements
+            is kept, and duplicates are removed. Elements don't need to be hashable.
     """
 
     REPLACE = "replace"
@@ -33,6 +46,51 @@ def iter_dict_key_paths(in_dict, prefix="", path_delimiter=DEFAULT_PATH_DELIMITE
             yield curr_path, value
 
 
+def unique_elements(*sequences: Sequence) -> List[Any]:
+    """Combine sequences into a list without duplicates, keeping the order in which
+    elements first appear. Unhashable elements are compared by equality.
+    """
+    seen = set()
+    unhashable: List[Any] = []
+    elements = []
+    for sequence in sequences:
+        for element in sequence:
+            try:
+                if element in seen:
+                    continue
+                seen.add(element)
+            except TypeError:
+                if element in unhashable:
+                    continue
+                unhashable.append(element)
+            elements.append(element)
+    return elements
+
+
+def merge_sequences(
+    current: MutableSequence,
+    new_value: Sequence,
+    merge_strategy: SEQUENCE_MERGE_STRATEGY,
+) -> Sequence:
+    """Merge two sequences with a strategy. A new sequence of the same type as the
+    current one is returned, and neither sequence is changed.
+    """
+    if merge_strategy == SEQUENCE_MERGE_STRATEGY.CONCATENATE:
+        return type(current)([*current, *new_value])  # type: ignore
+    if merge_strategy == SEQUENCE_MERGE_STRATEGY.UNIQUE:
+        return type(current)(unique_elements(current, new_value))  # type: ignore
+    return new_value
+
+
+# Types that are never mappings, to skip the slower `isinstance()` check against the
+# `Mapping` ABC for most leaf values
+_LEAF_TYPES = frozenset((str, int, float, bool, type(None), list, tuple))
+
+
+def _is_sequence(value: Any) -> bool:
+    return isinstance(value, Sequence) and not isinstance(value, (str, bytes))
+
+
 def set_key_path(
     in_dict,
     key_path,
@@ -64,15 +122,137 @@ def set_key_path(
     ):
         dict_child[parts[-1]] = new_value
     else:
-        if merge_strategy == SEQUENCE_MERGE_STRATEGY.REPLACE:
-            dict_child[parts[-1]] = new_value
-        elif merge_strategy == SEQUENCE_MERGE_STRATEGY.CONCATENATE:
-            dict_child[parts[-1]] += new_value
-        elif merge_strategy == SEQUENCE_MERGE_STRATEGY.UNIQUE:
-            sequence_type = type(dict_child[parts[-1]])
-            dict_child[parts[-1]] = sequence_type(
-                set(dict_child[parts[-1]] + new_value)
+        dict_child[parts[-1]] = merge_sequences(
+            dict_child[parts[-1]], new_value, merge_strategy
+        )
+
+
+class SequenceMergeStrategies:
+    """Sequence merge strategies for specific paths in a dict, for `merge()`.
+
+    Paths are strings of keys joined by the path delimiter, or tuples of keys (for keys
+    that contain the delimiter). A `*` key matches any key. A strategy applies to the
+    sequences at its path and under it, unless a deeper path has its own strategy.
+    The paths under an exact key and under `*` both apply to that key, and the exact
+    key takes precedence where both set a strategy.
+
+        strategies = SequenceMergeStrategies(
+            {
+                "fastapi/middleware": SEQUENCE_MERGE_STRATEGY.CONCATENATE,
+                "databases/*/hosts": SEQUENCE_MERGE_STRATEGY.UNIQUE,
+            }
+        )
+
+    The paths are compiled into a tree of keys once, so a `SequenceMergeStrategies`
+    can be reused for any number of merges.
+    """
+
+    __slots__ = ("strategy", "children", "wildcard", "_combined")
+
+    def __init__(
+        self,
+        paths: Optional[
+            Mapping[Union[str, Tuple[Hashable, ...]], SEQUENCE_MERGE_STRATEGY]
+        ] = None,
+        path_delimiter: str = DEFAULT_PATH_DELIMITER,
+    ) -> None:
+        self.strategy: Optional[SEQUENCE_MERGE_STRATEGY] = None
+        self.children: Dict[Hashable, SequenceMergeStrategies] = {}
+        self.wildcard: Optional[SequenceMergeStrategies] = None
+        # Children combined with the wildcard, built on first lookup of each key
+        self._combined: Dict[Hashable, SequenceMergeStrategies] = {}
+        for path, strategy in (paths or {}).items():
+            keys = path.split(path_delimiter) if isinstance(path, str) else path
+            node = self
+            for key in keys:
+                node = node._add_child(key)
+            node.strategy = SEQUENCE_MERGE_STRATEGY(strategy)
+
+    def _add_child(self, key: Hashable) -> "SequenceMergeStrategies":
+        if key == WILDCARD_KEY:
+            if self.wildcard is None:
+                self.wildcard = SequenceMergeStrategies()
+            return self.wildcard
+        if key not in self.children:
+            self.children[key] = SequenceMergeStrategies()
+        return self.children[key]
+
+    @classmethod
+    def _combine(
+        cls,
+        first: Optional["SequenceMergeStrategies"],
+        second: Optional["SequenceMergeStrategies"],
+    ) -> Optional["SequenceMergeStrategies"]:
+        """Combine two trees of strategies, preferring the strategies of `first`."""
+        if first is None:
+            return second
+        if second is None:
+            return first
+        combined = cls()
+        combined.strategy = first.strategy or second.strategy
+        for key in {**first.children, **second.children}:
+            combined.children[key] = cls._combine(  # type: ignore
+                first.children.get(key), second.children.get(key)
             )
+        combined.wildcard = cls._combine(first.wildcard, second.wildcard)
+        return combined
+
+    def child(self, key: Hashable) -> Optional["SequenceMergeStrategies"]:
+        exact = self.children.get(key)
+        if exact is None or self.wildcard is None:
+            return exact or self.wildcard
+        combined = self._combined.get(key)
+        if combined is None:
+            combined = self._combined[key] = self._combine(  # type: ignore
+                exact, self.wildcard
+            )
+        return combined
+
+
+def _merge_into(
+    base: MutableMapping,
+    new: Mapping,
+    strategy: SEQUENCE_MERGE_STRATEGY,
+    strategies: Optional[SequenceMergeStrategies],
+    create_parent_dicts: bool,
+    path: Tuple[Hashable, ...],
+) -> None:
+    for key, value in new.items():
+        node = strategies.child(key) if strategies is not None else None
+        key_strategy = (node.strategy or strategy) if node is not None else strategy
+
+        value_type = type(value)
+        if value_type is dict or (
+            value_type not in _LEAF_TYPES and isinstance(value, Mapping)
+        ):
+            # Empty mappings don't have any values to set
+            if not value:
+                continue
+            current = base.get(key)
+            if not isinstance(current, MutableMapping):
+                key_path = list(path + (key,))
+                if key not in base and not create_parent_dicts:
+                    raise KeyError(f"No dict to merge into at path {key_path}.")
+                if current or not create_parent_dicts:
+                    raise TypeError(
+                        "Only mappings values can be set. "
+                        f"Value at path {key_path} is of type {type(current)}."
+                    )
+                # Nested dicts are always created in the base, so that it never
+                # shares them with the dicts being merged in
+                current = base[key] = {}
+            _merge_into(
+                current, value, key_strategy, node, create_parent_dicts, path + (key,)
+            )
+            continue
+
+        if key_strategy != SEQUENCE_MERGE_STRATEGY.REPLACE:
+            current = base.get(key)
+            if (type(current) is list or isinstance(current, MutableSequence)) and (
+                value_type is list or _is_sequence(value)
+            ):
+                value = merge_sequences(current, value, key_strategy)
+        base[key] = value
 
 
 def merge(
@@ -81,6 +261,9 @@ def merge(
     path_delimiter: str = DEFAULT_PATH_DELIMITER,
     create_parent_dicts: bool = True,
     sequence_merge_strategy: SEQUENCE_MERGE_STRATEGY = SEQUENCE_MERGE_STRATEGY.REPLACE,
+    sequence_merge_strategies: Optional[
+        Union[SequenceMergeStrategies, Mapping[str, SEQUENCE_MERGE_STRATEGY]]
+    ] = None,
 ) -> dict:
     """This merge() does a deeper reconciliation of nested objects than what `dict.update()` would do.
     Consider two dicts:
@@ -93,15 +276,22 @@ def merge(
 
     {'a': {'d': {'e': 'xyz', 'f': 'uvw'}}, 'b': True, 'c': 123, 'g': 101}
 
+    The dicts are merged by walking them together, so keys can be of any hashable type
+    and can contain the path delimiter.
+
     Args:
         base (dict): A base dict to merge values into
         path_delimiter (str, optional): A delimiter to describe the keys to access a value in a nested dict.
-            Defaults to "/". Can be changed in case there are keys that contain a "/".
+            Defaults to "/". Only used to split the paths of `sequence_merge_strategies`.
         create_parent_dicts (bool, optional): If the key doesn't exist in the base dict and is supposed to contain
             a nested dict, create one. Disable this option if you want to enforce that the merging dict is
             a strict subset. Defaults to True.
         sequence_merge_strategy (str, optional): Behavior to use when merging two sequences.
             See the `SEQUENCE_MERGE_STRATEGY` class. Defaults to "replace".
+        sequence_merge_strategies (optional): Strategies for the sequences at specific
+            paths, which take precedence over `sequence_merge_strategy`. See the
+            `SequenceMergeStrategies` class. Pass an instance of it to reuse the
+            compiled paths across merges.
 
     Returns:
         dict: The merged dict
@@ -109,17 +299,14 @@ def merge(
     if not dicts:
         return base
 
+    strategies = sequence_merge_strategies
+    if strategies is not None and not isinstance(strategies, SequenceMergeStrategies):
+        strategies = SequenceMergeStrategies(strategies, path_delimiter=path_delimiter)
+    strategy = SEQUENCE_MERGE_STRATEGY(sequence_merge_strategy)
+    if strategies is not None and strategies.strategy is not None:
+        strategy = strategies.strategy
+
     for current_dict in [d for d in dicts if d]:
-        for key_path, value in iter_dict_key_paths(
-            current_dict, path_delimiter=path_delimiter
-        ):
-            set_key_path(
-                base,
-                key_path,
-                value,
-                create_parents=create_parent_dicts,
-                path_delimiter=path_delimiter,
-                merge_strategy=sequence_merge_strategy,
-            )
+        _merge_into(base, current_dict, strategy, strategies, create_parent_dicts, ())
 
     return base
@@ -5,8 +5,8 @@ from pydantic_settings.sources import PydanticBaseSettingsSource
 from bingqilin import setup_utils
 from bingqilin.conf import SettingsManager
 from bingqilin.conf.models import ConfigModel
-from bingqilin.contexts import LifespanContext, initializer
-from bingqilin.db.models import RedisDBConfig
+from bingqilin.contexts import LifespanContext, RedisField
+from bingqilin.db.redis import RedisClientTypes
 from bingqilin.extras.aws.conf.sources import (
     AWSSecretsManagerSource,
     AWSSystemsManagerParamsSource,
@@ -46,11 +46,8 @@ settings = AppSettings()
 
 class Context(LifespanContext):
     test: int
-
-    @initializer("redis")
-    @classmethod
-    def initialize_redis(cls, db_config: RedisDBConfig):
-        return db_config.initialize_client()
+    # The client is created from the `RedisDBConfig` and closed by the field type
+    redis: RedisClientTypes = RedisField()
 
 
 settings.load(_env_file=".env", _env_nested_delimiter="__")
@@ -0,0 +1,98 @@
+import asyncio
+import os
+import signal
+import tempfile
+
+import pytest
+
+from bingqilin.broadcast import ReconfigureBroadcaster, default_broadcast_dir
+from bingqilin.signal import SignalHandlerDispatcher
+from tests.common import BaseTestCase
+
+
+def make_broadcaster(directory: str, handler) -> ReconfigureBroadcaster:
+    dispatcher = SignalHandlerDispatcher()
+    dispatcher.handlers = {}
+    dispatcher.add_handler(signal.SIGUSR2, handler)
+    broadcaster = ReconfigureBroadcaster(
+        directory, for_signal=signal.SIGUSR2, signal_dispatcher=dispatcher
+    )
+    broadcaster.poll_interval = 0.05
+    return broadcaster
+
+
+class TestReconfigureBroadcaster(BaseTestCase):
+    def test_broadcast_in_process(self):
+        applied = []
+        with tempfile.TemporaryDirectory() as directory:
+            broadcaster = make_broadcaster(directory, lambda: applied.append(True))
+            broadcaster.start()
+            try:
+                self.assertEqual(broadcaster.status(0).applied, 1)
+                generation = broadcaster.broadcast()
+                status = asyncio.run(broadcaster.wait_for_workers(generation, 5))
+            finally:
+                broadcaster.stop()
+
+        self.assertEqual(generation, 1)
+        self.assertEqual(status.to_dict()["workers"], 1)
+        self.assertEqual(status.applied, 1)
+        self.assertEqual(applied, [True])
+
+    @pytest.mark.skipif(not hasattr(os, "fork"), reason="Requires os.fork()")
+    def test_broadcast_reaches_other_workers(self):
+        with tempfile.TemporaryDirectory() as directory:
+            read_fd, write_fd = os.pipe()
+            pid = os.fork()
+            if pid == 0:  # pragma: no cover
+                os.close(read_fd)
+                worker = make_broadcaster(
+                    directory, lambda: os.write(write_fd, b"applied")
+                )
+                worker.start()
+                os.write(write_fd, b"ready")
+                while worker.applied_generation < 1:
+                    worker._stop.wait(0.05)
+                worker._stop.wait(0.5)
+                os._exit(0)
+
+            os.close(write_fd)
+            self.assertEqual(os.read(read_fd, 5), b"ready")
+
+            broadcaster = make_broadcaster(directory, lambda: None)
+            broadcaster.start()
+            try:
+                generation = broadcaster.broadcast()
+                status = asyncio.run(broadcaster.wait_for_workers(generation, 5))
+                self.assertEqual(os.read(read_fd, 7), b"applied")
+            finally:
+                broadcaster.stop()
+                os.close(read_fd)
+                os.waitpid(pid, 0)
+
+        self.assertEqual(status.workers, 2)
+        self.assertEqual(status.applied, 2)
+        self.assertEqual(status.pending, [])
+
+    def test_default_broadcast_dir(self):
+        # Apps started by the same process don't share a directory
+        self.assertEqual(
+            default_broadcast_dir("app.Config", 10)
+            == default_broadcast_dir("other", 10),
+            False,
+        )
+        self.assertEqual(
+            default_broadcast_dir("app.Config", 10)
+            == default_broadcast_dir("app.Config", 11),
+            False,
+        )
+        self.assertEqual(
+            os.path.basename(default_broadcast_dir("app/<locals>.Config", 10)),
+            "bingqilin-broadcast-app__locals_.Config-10",
+        )
+        self.assertEqual(
+            ReconfigureBroadcaster(name="app.Config").path,
+            default_broadcast_dir("app.Config"),
+        )
+        with pytest.raises(ValueError):
+            ReconfigureBroadcaster().start()
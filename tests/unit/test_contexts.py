@@ -1,4 +1,19 @@
-from bingqilin.contexts import ContextField, LifespanContext
+import asyncio
+import os
+import threading
+import time
+from typing import Optional
+
+import pytest
+
+from bingqilin.contexts import (
+    ContextField,
+    DatabaseField,
+    LifespanContext,
+    initializer,
+    terminator,
+    warmer,
+)
 from tests.common import BaseTestCase
 
 
@@ -25,3 +40,535 @@ class TestLifespanContexts(BaseTestCase):
         ctx = Context(test_settings_manager).configure()
         self.assertEqual(ctx.get_default("test"), ctx.test_field)
         self.assertEqual(ctx.get_default(), ctx.test_field)
+
+    def test_initializer_classmethod(self, test_settings_manager):
+        class Context(LifespanContext):
+            test_field: dict = ContextField("test")
+
+            @initializer("test_field")
+            @classmethod
+            def initialize_test_field(cls, config):
+                return {"initialized_by": cls.__name__}
+
+        ctx = Context(test_settings_manager).configure()
+        self.assertEqual(ctx.test_field, {"initialized_by": "Context"})
+
+    def test_depends_on_order(self, test_settings_manager):
+        init_order = []
+
+        def make_initializer(name):
+            def _init(config):
+                init_order.append(name)
+                return name
+
+            return _init
+
+        class Context(LifespanContext):
+            third: str = ContextField(
+                "test",
+                initialize_func=make_initializer("third"),
+                depends_on=["second"],
+            )
+            second: str = ContextField(
+                "test",
+                initialize_func=make_initializer("second"),
+                depends_on=["first"],
+            )
+            first: str = ContextField("test", initialize_func=make_initializer("first"))
+
+        self.assertEqual(
+            Context.__field_init_layers__, [["first"], ["second"], ["third"]]
+        )
+        Context(test_settings_manager).configure()
+        self.assertEqual(init_order, ["first", "second", "third"])
+
+    def test_depends_on_cycle(self):
+        with pytest.raises(ValueError):
+
+            class Context(LifespanContext):
+                first: dict = ContextField("test", depends_on=["second"])
+                second: dict = ContextField("test", depends_on=["first"])
+
+    def test_async_configure_concurrent(self, test_settings_manager):
+        async def slow_init(config):
+            await asyncio.sleep(0.1)
+            return {"ready": True}
+
+        class Context(LifespanContext):
+            first: dict = ContextField("test", initialize_func=slow_init)
+            second: dict = ContextField("test", initialize_func=slow_init)
+            third: dict = ContextField("test", initialize_func=slow_init)
+
+        ctx = Context(test_settings_manager)
+        started = time.perf_counter()
+        asyncio.run(ctx.aconfigure())
+        self.assertEqual(time.perf_counter() - started < 0.25, True)
+        self.assertEqual(ctx.third, {"ready": True})
+
+        # Coroutine initializers also work from the synchronous path
+        ctx = Context(test_settings_manager).configure()
+        self.assertEqual(ctx.first, {"ready": True})
+
+    def test_async_terminate_timeout(self, test_settings_manager):
+        closed = []
+
+        async def close_fast(value):
+            closed.append(value)
+
+        async def close_hung(value):
+            await asyncio.sleep(10)
+
+        class Context(LifespanContext):
+            field_terminate_timeout = 0.1
+
+            fast: str = ContextField(
+                "test", initialize_func=lambda _: "fast", terminate_func=close_fast
+            )
+            hung: str = ContextField(
+                "test", initialize_func=lambda _: "hung", terminate_func=close_hung
+            )
+
+        ctx = Context(test_settings_manager).configure()
+        report = asyncio.run(ctx.aterminate())
+        self.assertEqual(report.terminated, ["fast"])
+        self.assertEqual(report.timed_out, ["hung"])
+        self.assertEqual(closed, ["fast"])
+
+    def test_reconfigure_swaps_and_retires(self, test_settings_manager):
+        closed = []
+        versions = iter(range(100))
+
+        class Context(LifespanContext):
+            reconfigure_grace_period = 0.05
+
+            client: int = ContextField(
+                "test",
+                initialize_func=lambda _: {"version": next(versions)},
+                terminate_func=closed.append,
+            )
+
+        ctx = Context(test_settings_manager).configure()
+        first_client = ctx.client
+        ctx.configure(force=True)
+        self.assertEqual(ctx.client, {"version": 1})
+        # The old client is only closed after the grace period
+        self.assertEqual(closed, [])
+        time.sleep(0.2)
+        self.assertEqual(closed, [first_client])
+
+    def test_reconfigure_failure_keeps_old_clients(self, test_settings_manager):
+        closed = []
+        should_fail = False
+
+        def init_flaky(config):
+            if should_fail:
+                raise ConnectionError("unreachable")
+            return {"flaky": True}
+
+        class Context(LifespanContext):
+            stable: dict = ContextField(
+                "test",
+                initialize_func=lambda _: {"stable": True},
+                terminate_func=closed.append,
+            )
+            flaky: dict = ContextField("test", initialize_func=init_flaky)
+
+        ctx = Context(test_settings_manager).configure()
+        stable_client = ctx.stable
+
+        should_fail = True
+        with pytest.raises(ConnectionError):
+            ctx.configure(force=True)
+
+        # The current clients are left in place, and the newly built one is closed
+        self.assertEqual(ctx.stable is stable_client, True)
+        self.assertEqual(ctx.flaky, {"flaky": True})
+        self.assertEqual(len(closed), 1)
+        self.assertEqual(closed[0] is stable_client, False)
+
+    def test_reconfigure_only_changed_fields(self, test_settings_manager):
+        class Context(LifespanContext):
+            first: dict = ContextField("test", initialize_func=lambda c: dict(c))
+            second: dict = ContextField("test", initialize_func=lambda c: dict(c))
+            dependent: dict = ContextField(
+                "test", initialize_func=lambda c: dict(c), depends_on=["second"]
+            )
+
+        ctx = Context(test_settings_manager).configure(
+            first={"host": "a"}, second={"host": "b"}, dependent={"host": "c"}
+        )
+        first_client = ctx.first
+        result = ctx.reconfigure(
+            first={"host": "a"}, second={"host": "changed"}, dependent={"host": "c"}
+        )
+        self.assertEqual(result.rebuilt, ["second", "dependent"])
+        self.assertEqual(result.unchanged, ["first"])
+        self.assertEqual(ctx.first is first_client, True)
+        self.assertEqual(ctx.second, {"host": "changed"})
+
+    def test_lazy_field(self, test_settings_manager):
+        init_count = []
+        closed = []
+
+        def init_slow(config):
+            init_count.append(1)
+            time.sleep(0.05)
+            return {"ready": True}
+
+        class Context(LifespanContext):
+            eager: dict = ContextField(
+                "test",
+                initialize_func=lambda _: {"eager": True},
+                terminate_func=closed.append,
+            )
+            lazy: dict = ContextField(
+                "test",
+                initialize_func=init_slow,
+                terminate_func=closed.append,
+                lazy=True,
+            )
+            untouched: dict = ContextField(
+                "test",
+                initialize_func=init_slow,
+                terminate_func=closed.append,
+                lazy=True,
+            )
+
+        ctx = Context(test_settings_manager).configure()
+        self.assertEqual(ctx.last_configure_result.deferred, ["lazy", "untouched"])
+        self.assertEqual(init_count, [])
+
+        threads = [threading.Thread(target=lambda: ctx.lazy) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(init_count), 1)
+        self.assertEqual(ctx.lazy, {"ready": True})
+
+        ctx.terminate()
+        # The untouched lazy field is never initialized, so it isn't terminated
+        self.assertEqual(len(closed), 2)
+
+    def test_lazy_field_async(self, test_settings_manager):
+        init_count = []
+
+        async def init_async(config):
+            init_count.append(1)
+            await asyncio.sleep(0.05)
+            return {"ready": True}
+
+        class Context(LifespanContext):
+            lazy: dict = ContextField("test", initialize_func=init_async, lazy=True)
+
+        async def resolve_concurrently(ctx):
+            return await asyncio.gather(*(ctx.aget("lazy") for _ in range(5)))
+
+        ctx = Context(test_settings_manager).configure()
+        values = asyncio.run(resolve_concurrently(ctx))
+        self.assertEqual(len(init_count), 1)
+        self.assertEqual(values[0] is values[-1], True)
+
+    def test_warmup(self, test_settings_manager):
+        warmed = []
+
+        async def warm_cache(value):
+            warmed.append(("cache", value))
+
+        class Context(LifespanContext):
+            cache: dict = ContextField(
+                "test",
+                initialize_func=lambda _: {"ready": True},
+                warmup_func=warm_cache,
+            )
+            lazy: dict = ContextField(
+                "test", initialize_func=lambda _: {"ready": True}, lazy=True
+            )
+
+            @warmer("cache")
+            @classmethod
+            def prime_cache(cls, value):
+                warmed.append(("prime", value))
+
+            @warmer("lazy")
+            @classmethod
+            def warm_lazy(cls, value):
+                warmed.append(("lazy", value))
+
+        ctx = Context(test_settings_manager).configure()
+        durations = asyncio.run(ctx.awarmup())
+        self.assertEqual(list(durations.keys()), ["cache"])
+        self.assertEqual(
+            warmed, [("cache", {"ready": True}), ("prime", {"ready": True})]
+        )
+
+    def test_warmup_async_redis_client(self):
+        from redis.asyncio import Redis as AsyncRedis
+
+        from bingqilin.db.redis import awarmup_redis_client
+
+        pings = []
+
+        class FakeAsyncRedis(AsyncRedis):
+            # Like `redis.asyncio.Redis.ping()`, a plain function returning an awaitable
+            def ping(self, **kwargs):
+                async def send():
+                    pings.append(threading.get_ident())
+
+                return send()
+
+        asyncio.run(awarmup_redis_client(FakeAsyncRedis(), 3))
+        self.assertEqual(pings, [threading.get_ident()] * 3)
+
+    def test_bad_declarations_raise_at_class_creation(self):
+        with pytest.raises(ValueError):
+
+            class UnknownInitializerContext(LifespanContext):
+                test_field: dict = ContextField("test")
+
+                @initializer("missing_field")
+                @classmethod
+                def initialize_missing(cls, config):
+                    return {}
+
+        with pytest.raises(ValueError):
+
+            class UninitializableContext(LifespanContext):
+                test_field: Optional[dict] = ContextField("test")
+
+    def test_lifecycle_stats(self, test_settings_manager):
+        attempts = []
+
+        class Context(LifespanContext):
+            flaky: dict = ContextField("test", retries=1)
+
+            @initializer("flaky")
+            @classmethod
+            def initialize_flaky(cls, config):
+                attempts.append(config)
+                if len(attempts) == 1:
+                    raise ConnectionError("Not yet")
+                return {"ready": True}
+
+        ctx = Context(test_settings_manager).configure()
+        ctx.configure(force=True)
+        ctx.terminate()
+
+        stats = ctx.lifecycle_stats()
+        self.assertEqual(
+            [run["kind"] for run in stats],
+            ["configure", "reconfigure", "retire", "terminate"],
+        )
+        phases = [(e["phase"], e["retries"]) for e in stats[0]["events"]]
+        self.assertEqual(phases, [("config", 0), ("initialize", 1)])
+        self.assertEqual([e["success"] for e in stats[0]["events"]], [True, True])
+        self.assertEqual(stats[1]["events"][-1]["retries"], 0)
+
+    @pytest.mark.skipif(not hasattr(os, "fork"), reason="Requires os.fork()")
+    def test_reset_after_fork(self, test_settings_manager):
+        class Client:
+            def __init__(self, config):
+                self.pid = os.getpid()
+                self.reset_in = None
+
+        def reset_client(client):
+            client.reset_in = os.getpid()
+
+        class Context(LifespanContext):
+            client: Client = ContextField("test", after_fork_func=reset_client)
+
+        ctx = Context(test_settings_manager).configure()
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:  # pragma: no cover
+            os.close(read_fd)
+            os.write(write_fd, str(ctx.client.reset_in == os.getpid()).encode())
+            os._exit(0)
+
+        os.close(write_fd)
+        with os.fdopen(read_fd) as reader:
+            reset_in_child = reader.read()
+        os.waitpid(pid, 0)
+        self.assertEqual(reset_in_child, "True")
+        self.assertEqual(ctx.client.reset_in, None)
+
+    def test_field_dependency(self, test_settings_manager):
+        class Context(LifespanContext):
+            test_field: dict = ContextField("test", is_default=True)
+            lazy_field: dict = ContextField("test", lazy=True)
+
+            @initializer("test_field")
+            @classmethod
+            def initialize_test_field(cls, config):
+                return {"version": len(built)}
+
+            @initializer("lazy_field")
+            @classmethod
+            def initialize_lazy_field(cls, config):
+                return {"lazy": True}
+
+        built = []
+        ctx = Context(test_settings_manager)
+        dependency = ctx.dependency("test_field")
+        self.assertEqual(ctx.dependency(namespace="test"), dependency)
+        with pytest.raises(ValueError):
+            ctx.dependency("missing_field")
+
+        ctx.configure()
+        first = asyncio.run(dependency())
+        self.assertEqual(first, {"version": 0})
+        self.assertEqual(ctx.field_slot("test_field").value, first)
+
+        built.append(first)
+        ctx.configure(force=True)
+        self.assertEqual(asyncio.run(dependency()), {"version": 1})
+        self.assertEqual(asyncio.run(ctx.dependency("lazy_field")()), {"lazy": True})
+        ctx.terminate()
+
+    def test_sync_reconfigure_uses_running_loop(self, test_settings_manager):
+        class AsyncClient:
+            def __init__(self):
+                self.loop = asyncio.get_running_loop()
+
+            async def ping(self):
+                future = self.loop.create_future()
+                self.loop.call_soon(future.set_result, "pong")
+                return await future
+
+        closed = []
+
+        async def make_client(config):
+            return AsyncClient()
+
+        async def close_client(client):
+            closed.append((client, asyncio.get_running_loop()))
+
+        class Context(LifespanContext):
+            reconfigure_grace_period = 0
+
+            client: AsyncClient = ContextField(
+                "test", initialize_func=make_client, terminate_func=close_client
+            )
+
+        async def reconfigure_while_running():
+            ctx = Context(test_settings_manager)
+            await ctx.aconfigure()
+            first_client = ctx.client
+            # A reconfigure from another thread, as the signal dispatcher does it
+            await asyncio.to_thread(ctx.configure, force=True)
+
+            loop = asyncio.get_running_loop()
+            self.assertEqual(ctx.client is first_client, False)
+            self.assertEqual(ctx.client.loop is loop, True)
+            self.assertEqual(await ctx.client.ping(), "pong")
+            await asyncio.sleep(0.05)
+            self.assertEqual(closed, [(first_client, loop)])
+            await ctx.aterminate()
+
+        asyncio.run(reconfigure_while_running())
+
+    def test_reconfigure_without_attached_loop_retires(self, test_settings_manager):
+        import signal
+
+        from bingqilin.signal import SignalHandlerDispatcher
+
+        closed = []
+        versions = iter(range(100))
+
+        async def close_client(client):
+            closed.append(client)
+
+        class Context(LifespanContext):
+            reconfigure_grace_period = 0.05
+
+            client: dict = ContextField(
+                "test",
+                initialize_func=lambda _: {"version": next(versions)},
+                terminate_func=close_client,
+            )
+
+        ctx = Context(test_settings_manager).configure()
+        first_client = ctx.client
+        dispatcher = SignalHandlerDispatcher()
+        dispatcher.handlers = {}
+        dispatcher.add_handler(signal.SIGUSR2, lambda: ctx.areconfigure(force=True))
+        # Without an attached loop, the handler runs on a temporary loop
+        job = dispatcher.request_dispatch(signal.SIGUSR2)
+        job.wait(5)
+        self.assertEqual(job.handlers[0].success, True)
+        self.assertEqual(ctx.client, {"version": 1})
+        self.assertNone(ctx._loop)
+
+        time.sleep(0.2)
+        self.assertEqual(closed, [first_client])
+        self.assertEqual(ctx._retiring, {})
+        ctx.terminate()
+
+    def test_lifespan_terminates_on_failed_startup(self, test_settings_manager):
+        from fastapi import FastAPI
+
+        from bingqilin import contexts_lifespan
+
+        closed = []
+
+        def fail(_):
+            raise RuntimeError("Can't connect")
+
+        class FirstContext(LifespanContext):
+            client: str = ContextField(
+                "test", initialize_func=lambda _: "first", terminate_func=closed.append
+            )
+
+        class SecondContext(LifespanContext):
+            client: str = ContextField(
+                "test", initialize_func=lambda _: "second", terminate_func=closed.append
+            )
+
+        class FailingContext(LifespanContext):
+            client: str = ContextField("test", initialize_func=fail)
+
+        lifespan = contexts_lifespan(
+            FirstContext(test_settings_manager),
+            SecondContext(test_settings_manager),
+            FailingContext(test_settings_manager),
+        )
+
+        async def start():
+            async with lifespan(FastAPI()):
+                pass
+
+        with pytest.raises(RuntimeError, match="Can't connect"):
+            asyncio.run(start())
+        # The contexts that were configured are terminated in reverse order
+        self.assertEqual(closed, ["second", "first"])
+
+    def test_database_field_decorated_methods(self, test_settings_manager):
+        terminated = []
+
+        class Client:
+            def close(self):
+                terminated.append("close")
+
+        class Context(LifespanContext):
+            db: Client = DatabaseField()
+            default_db: Client = DatabaseField(initialize_func=lambda _: Client())
+
+            @initializer("db")
+            @classmethod
+            def initialize_db(cls, config):
+                return Client()
+
+            @terminator("db")
+            @classmethod
+            def terminate_db(cls, client):
+                terminated.append("terminator")
+
+        plans = Context.__field_plans__
+        self.assertEqual(plans["db"].initializer, Context.initialize_db)
+        self.assertEqual(plans["db"].terminator, Context.terminate_db)
+
+        ctx = Context(test_settings_manager).configure(db={}, default_db={})
+        self.assertIsInstance(ctx.db, Client)
+        ctx.terminate()
+        # The database field's default terminator is only used without a @terminator
+        self.assertEqual(sorted(terminated), ["close", "terminator"])
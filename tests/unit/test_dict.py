@@ -0,0 +1,135 @@
+import pytest
+
+from bingqilin.utils.dict import (
+    SEQUENCE_MERGE_STRATEGY,
+    SequenceMergeStrategies,
+    merge,
+)
+from tests.common import BaseTestCase
+
+
+class TestMerge(BaseTestCase):
+    def test_nested_merge(self):
+        a = {"a": {"d": {"e": "xyz"}}, "b": True, "c": 123, "h": None}
+        b = {"a": {"d": {"f": "uvw"}, "g": 101}, "h": {"i": 1}, "j": {}}
+        self.assertEqual(
+            merge({}, a, b),
+            {
+                "a": {"d": {"e": "xyz", "f": "uvw"}, "g": 101},
+                "b": True,
+                "c": 123,
+                "h": {"i": 1},
+            },
+        )
+        # The merged dicts are not changed, and nested dicts are not shared with them
+        self.assertEqual(a["a"], {"d": {"e": "xyz"}})
+        merged = merge({}, a)
+        merged["a"]["d"]["e"] = "changed"
+        self.assertEqual(a["a"]["d"]["e"], "xyz")
+
+        with pytest.raises(TypeError):
+            merge({"a": "value"}, {"a": {"b": 1}})
+        with pytest.raises(KeyError):
+            merge({}, {"a": {"b": 1}}, create_parent_dicts=False)
+        self.assertEqual(
+            merge({"a": {}}, {"a": {"b": 1}}, create_parent_dicts=False),
+            {"a": {"b": 1}},
+        )
+
+    def test_keys_with_delimiter(self):
+        merged = merge(
+            {"urls": {"https://a.example/": {"weight": 1}}},
+            {"urls": {"https://a.example/": {"timeout": 5}, "/health": "ok"}},
+            {("tuple", "key"): 1},
+        )
+        self.assertEqual(
+            merged,
+            {
+                "urls": {
+                    "https://a.example/": {"weight": 1, "timeout": 5},
+                    "/health": "ok",
+                },
+                ("tuple", "key"): 1,
+            },
+        )
+
+    def test_sequence_strategies(self):
+        base = {"hosts": ["a", "b"], "nested": {"items": [{"id": 1}, {"id": 2}]}}
+        override = {
+            "hosts": ["b", "c", "a"],
+            "nested": {"items": [{"id": 2}, {"id": 3}]},
+        }
+
+        merged = merge({}, base, override)
+        self.assertEqual(merged["hosts"], ["b", "c", "a"])
+
+        merged = merge(
+            {},
+            base,
+            override,
+            sequence_merge_strategy=SEQUENCE_MERGE_STRATEGY.CONCATENATE,
+        )
+        self.assertEqual(merged["hosts"], ["a", "b", "b", "c", "a"])
+        self.assertEqual(len(merged["nested"]["items"]), 4)
+        self.assertEqual(base["hosts"], ["a", "b"])
+
+        merged = merge(
+            {}, base, override, sequence_merge_strategy=SEQUENCE_MERGE_STRATEGY.UNIQUE
+        )
+        self.assertEqual(merged["hosts"], ["a", "b", "c"])
+        self.assertEqual(merged["nested"]["items"], [{"id": 1}, {"id": 2}, {"id": 3}])
+
+    def test_sequence_strategy_paths(self):
+        strategies = SequenceMergeStrategies(
+            {
+                "databases/*/hosts": SEQUENCE_MERGE_STRATEGY.UNIQUE,
+                "databases/main/hosts": SEQUENCE_MERGE_STRATEGY.REPLACE,
+                "middleware": SEQUENCE_MERGE_STRATEGY.CONCATENATE,
+                ("a/b",): SEQUENCE_MERGE_STRATEGY.CONCATENATE,
+            }
+        )
+        base = {
+            "databases": {"main": {"hosts": ["a"]}, "replica": {"hosts": ["a", "b"]}},
+            "middleware": {"before": ["x"], "after": ["y"]},
+            "a/b": [1],
+            "other": [1],
+        }
+        override = {
+            "databases": {"main": {"hosts": ["b"]}, "replica": {"hosts": ["b", "c"]}},
+            "middleware": {"before": ["z"]},
+            "a/b": [2],
+            "other": [2],
+        }
+        for _ in range(2):
+            merged = merge({}, base, override, sequence_merge_strategies=strategies)
+            self.assertEqual(merged["databases"]["main"]["hosts"], ["b"])
+            self.assertEqual(merged["databases"]["replica"]["hosts"], ["a", "b", "c"])
+            self.assertEqual(
+                merged["middleware"], {"before": ["x", "z"], "after": ["y"]}
+            )
+            self.assertEqual(merged["a/b"], [1, 2])
+            self.assertEqual(merged["other"], [2])
+
+        merged = merge(
+            {},
+            base,
+            override,
+            sequence_merge_strategies={"other": SEQUENCE_MERGE_STRATEGY.UNIQUE},
+        )
+        self.assertEqual(merged["other"], [1, 2])
+
+    def test_sequence_strategy_paths_with_wildcard(self):
+        # Paths under `*` still apply to keys that have their own paths
+        strategies = SequenceMergeStrategies(
+            {
+                "a/x": SEQUENCE_MERGE_STRATEGY.UNIQUE,
+                "*/y": SEQUENCE_MERGE_STRATEGY.CONCATENATE,
+                "*/x": SEQUENCE_MERGE_STRATEGY.REPLACE,
+            }
+        )
+        base = {"a": {"x": [1, 2], "y": [1]}, "b": {"x": [1, 2], "y": [1]}}
+        override = {"a": {"x": [2, 3], "y": [1]}, "b": {"x": [2, 3], "y": [2]}}
+        for _ in range(2):
+            merged = merge({}, base, override, sequence_merge_strategies=strategies)
+            self.assertEqual(merged["a"], {"x": [1, 2, 3], "y": [1, 1]})
+            self.assertEqual(merged["b"], {"x": [2, 3], "y": [1, 2]})
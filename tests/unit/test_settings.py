@@ -1,5 +1,17 @@
+import asyncio
+import dataclasses
+import gc
+import os
+import threading
+import time
+import weakref
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pytest
+
 from fastapi import FastAPI
-from pydantic import BaseModel
+from pydantic import BaseModel, SecretStr
 from pydantic_settings import BaseSettings
 from pydantic_settings.sources import (
     PydanticBaseSettingsSource,
@@ -7,7 +19,15 @@ from pydantic_settings.sources import (
 )
 
 from bingqilin.conf import SettingsManager
+from bingqilin.contexts import ContextField, LifespanContext, initializer
+from bingqilin.conf.cache import ParsedFileCache
 from bingqilin.conf.models import ConfigModel, ConfigModelConfigDict
+from bingqilin.conf.snapshot import SettingsSnapshot
+from bingqilin.conf.sources import (
+    IniSettingsSource,
+    JsonSettingsSource,
+    TomlSettingsSource,
+)
 from tests.common import BaseTestCase
 
 
@@ -86,3 +106,512 @@ class TestSettingsManager(BaseTestCase):
 
         env_app = settings_manager_with_env_file.data.fastapi.create_app()
         self.assertEqual(env_app.openapi_version, "4.1.0")
+
+    def test_watch_settings_files(self, env_config_file):
+        class TestConfig(ConfigModel):
+            model_config = ConfigModelConfigDict(
+                extra="allow", env_file=env_config_file.name, env_nested_delimiter="__"
+            )
+
+        class TestSettings(SettingsManager):
+            data: TestConfig
+
+        settings = TestSettings().load(allow_reconfigure=False)
+        self.assertEqual(settings.get_file_paths(), [Path(env_config_file.name)])
+
+        changed = threading.Event()
+        settings.watch(changed.set, debounce=0.05, poll_interval=0.05)
+        try:
+            with open(env_config_file.name, "a") as env_file:
+                env_file.write('FASTAPI__TITLE="changed title"\n')
+            self.assertEqual(changed.wait(5), True)
+        finally:
+            assert settings.watcher
+            settings.watcher.stop()
+
+    def test_loaded_settings_classes_are_collected(self):
+        def load():
+            class TestConfig(ConfigModel):
+                name: str = ""
+
+            class TestSettings(SettingsManager):
+                data: TestConfig
+
+            settings = TestSettings().load(allow_reconfigure=False)
+            # The sources used for the load are kept for `get_file_paths()`
+            self.assertEqual(settings.get_file_paths(), [])
+            return weakref.ref(TestConfig)
+
+        config_ref = load()
+        gc.collect()
+        self.assertNone(config_ref())
+
+    def test_transactional_reconfigure(self):
+        class ClientConfig(BaseModel):
+            url: str = "first"
+
+        class Clients(BaseModel):
+            client: ClientConfig = ClientConfig()
+
+        class TestConfig(ConfigModel):
+            clients: Clients = Clients()
+
+        class TestSettings(SettingsManager):
+            data: TestConfig
+
+        class Context(LifespanContext):
+            client: dict = ContextField("clients")
+
+            @initializer("client")
+            @classmethod
+            def initialize_client(cls, config: ClientConfig):
+                if config.url == "bad":
+                    raise ConnectionError("Cannot connect")
+                return {"url": config.url}
+
+        env_key = "BINGQILIN_TXN_CLIENTS__CLIENT__URL"
+        settings = TestSettings().load(
+            _env_prefix="BINGQILIN_TXN_", _env_nested_delimiter="__"
+        )
+        ctx = Context(settings).configure()
+        self.assertEqual(settings.generation, 1)
+
+        try:
+            os.environ[env_key] = "second"
+            transaction = settings.reconfigure()
+            self.assertEqual(transaction.committed, True)
+            self.assertEqual(transaction.generation, 2)
+            self.assertEqual(transaction.contexts[ctx.name]["rebuilt"], ["client"])
+            self.assertEqual(ctx.client, {"url": "second"})
+
+            # A context that can't use the new settings rolls the whole reload back
+            os.environ[env_key] = "bad"
+            with pytest.raises(ConnectionError):
+                settings.reconfigure()
+        finally:
+            del os.environ[env_key]
+
+        assert settings.last_transaction
+        self.assertEqual(settings.last_transaction.committed, False)
+        self.assertEqual(settings.generation, 2)
+        self.assertEqual(settings.data.clients.client.url, "second")
+        self.assertEqual(ctx.client, {"url": "second"})
+        ctx.terminate()
+
+    def test_settings_snapshot(self, tmp_path):
+        fetches = []
+
+        class RemoteSource(PydanticBaseSettingsSource):
+            remote = True
+
+            def get_field_value(self, field, field_name):
+                return None, field_name, False
+
+            def __call__(self):
+                fetches.append(len(fetches) + 1)
+                return {"region": f"region-{len(fetches)}", "token": "hunter2"}
+
+        class TestConfig(ConfigModel):
+            region: str = ""
+            token: str = ""
+
+            @classmethod
+            def add_settings_sources(cls, settings_cls):
+                return (RemoteSource(settings_cls),)
+
+        class SecretConfig(TestConfig):
+            token: SecretStr = SecretStr("")
+
+        class TestSettings(SettingsManager):
+            data: TestConfig
+
+        class SecretSettings(SettingsManager):
+            data: SecretConfig
+
+        def load(manager_class, **snapshot_kwargs):
+            snapshot = SettingsSnapshot(
+                tmp_path / "settings.snapshot", **snapshot_kwargs
+            )
+            return manager_class().load(allow_reconfigure=False, snapshot=snapshot)
+
+        # Values for secret fields are not written to an unencrypted snapshot
+        load(SecretSettings)
+        self.assertEqual(
+            SettingsSnapshot(tmp_path / "settings.snapshot").read(SecretConfig), {}
+        )
+
+        settings = load(TestSettings)
+        self.assertEqual(settings.data.region, "region-2")
+        mode = (tmp_path / "settings.snapshot").stat().st_mode
+        self.assertEqual(mode & 0o777, 0o600)
+
+        # Later loads are served from the snapshot
+        settings = load(TestSettings)
+        self.assertEqual(fetches, [1, 2])
+        self.assertEqual(settings.data.region, "region-2")
+
+        # Reconfigures refresh it
+        settings.reconfigure()
+        self.assertEqual(settings.data.region, "region-3")
+        self.assertEqual(load(TestSettings).data.region, "region-3")
+
+        # And expired values are fetched again
+        self.assertEqual(load(TestSettings, ttl=0).data.region, "region-4")
+
+        # Sources added by overriding `settings_customise_sources()` are wrapped too
+        class CustomisedConfig(ConfigModel):
+            region: str = ""
+            token: str = ""
+
+            @classmethod
+            def settings_customise_sources(cls, settings_cls, *args, **kwargs):
+                sources = ConfigModel.settings_customise_sources(cls, *args, **kwargs)
+                return sources + (RemoteSource(settings_cls),)
+
+        class CustomisedSettings(SettingsManager):
+            data: CustomisedConfig
+
+        (tmp_path / "settings.snapshot").unlink()
+        self.assertEqual(load(CustomisedSettings).data.region, "region-5")
+        self.assertEqual(load(CustomisedSettings).data.region, "region-5")
+        self.assertEqual(fetches, [1, 2, 3, 4, 5])
+        profile = CustomisedSettings().profile_load()
+        self.assertEqual(
+            [timing.name for timing in profile.sources][-1], "RemoteSource"
+        )
+
+    def test_settings_snapshot_nested_secrets(self, tmp_path):
+        class Credentials(BaseModel):
+            username: str = ""
+            password: SecretStr = SecretStr("")
+
+        class RemoteSource(PydanticBaseSettingsSource):
+            remote = True
+
+            def __init__(self, settings_cls, values):
+                super().__init__(settings_cls)
+                self.values = values
+
+            def get_field_value(self, field, field_name):
+                return None, field_name, False
+
+            def __call__(self):
+                return self.values
+
+        def read_snapshot(values):
+            class TestConfig(ConfigModel):
+                credentials: Optional[Dict[str, Credentials]] = None
+
+                @classmethod
+                def add_settings_sources(cls, settings_cls):
+                    return (RemoteSource(settings_cls, values),)
+
+            class TestSettings(SettingsManager):
+                data: TestConfig
+
+            path = tmp_path / "settings.snapshot"
+            path.unlink(missing_ok=True)
+            TestSettings().load(
+                allow_reconfigure=False, snapshot=SettingsSnapshot(path)
+            )
+            return SettingsSnapshot(path).read(TestConfig)
+
+        # Secrets in models nested in optional fields, mappings and registered
+        # database configs are not written to an unencrypted snapshot
+        self.assertEqual(
+            read_snapshot({"credentials": {"main": {"password": "hunter2"}}}), {}
+        )
+        self.assertEqual(
+            read_snapshot(
+                {"databases": {"cache": {"type": "redis", "password": "hunter2"}}}
+            ),
+            {},
+        )
+        self.assertEqual(
+            read_snapshot({"credentials": {"main": {"username": "admin"}}}) != {},
+            True,
+        )
+
+    def test_concurrent_sources(self):
+        class SlowSource(PydanticBaseSettingsSource):
+            def __init__(self, settings_cls, values):
+                super().__init__(settings_cls)
+                self.values = values
+
+            def get_field_value(self, field, field_name):
+                return None, field_name, False
+
+            def __call__(self):
+                time.sleep(0.2)
+                return self.values
+
+        class AsyncSource(SlowSource):
+            async def acall(self):
+                await asyncio.sleep(0.2)
+                return self.values
+
+        class StateSource(SlowSource):
+            depends_on_state = True
+
+            def __call__(self):
+                return {"seen": sorted(self.current_state)}
+
+        class TestConfig(ConfigModel):
+            model_config = ConfigModelConfigDict(concurrent_sources=True)
+
+            first: str = ""
+            second: str = ""
+            third: str = ""
+            seen: List[str] = []
+
+            @classmethod
+            def add_settings_sources(cls, settings_cls):
+                return (
+                    SlowSource(settings_cls, {"first": "a", "second": "a"}),
+                    AsyncSource(settings_cls, {"second": "b", "third": "b"}),
+                    SlowSource(settings_cls, {"third": "c"}),
+                    StateSource(settings_cls, {}),
+                )
+
+        class TestSettings(SettingsManager):
+            data: TestConfig
+
+        started = time.perf_counter()
+        settings = TestSettings().load(allow_reconfigure=False)
+        self.assertEqual(time.perf_counter() - started < 0.5, True)
+        # Earlier sources still take precedence
+        self.assertEqual(
+            (settings.data.first, settings.data.second, settings.data.third),
+            ("a", "a", "b"),
+        )
+        self.assertEqual(
+            [key for key in settings.data.seen if key in ("first", "second", "third")],
+            ["first", "second", "third"],
+        )
+
+    def test_settings_generation(self):
+        class TestConfig(ConfigModel):
+            name: str = ""
+
+        class TestSettings(SettingsManager):
+            data: TestConfig
+
+        env_key = "BINGQILIN_GEN_NAME"
+        settings = TestSettings()
+        with pytest.raises(AttributeError):
+            settings.data
+
+        try:
+            os.environ[env_key] = "first"
+            settings.load(allow_reconfigure=False, _env_prefix="BINGQILIN_GEN_")
+            get_settings = settings.dependency()
+            self.assertEqual(settings.dependency(), get_settings)
+
+            pinned = asyncio.run(get_settings())
+            with pytest.raises(dataclasses.FrozenInstanceError):
+                pinned.generation = 5  # type: ignore
+
+            os.environ[env_key] = "second"
+            settings.reconfigure()
+        finally:
+            del os.environ[env_key]
+
+        # A pinned generation is unaffected by the reload
+        self.assertEqual((pinned.generation, pinned.data.name), (1, "first"))
+        current = asyncio.run(get_settings())
+        self.assertEqual((current.generation, current.data.name), (2, "second"))
+        self.assertEqual(settings.data, current.data)
+        self.assertEqual(settings.last_loaded_at, current.loaded_at)
+
+    def test_settings_load_profile(self):
+        class StaticSource(PydanticBaseSettingsSource):
+            def __init__(self, settings_cls, values, delay=0.0):
+                super().__init__(settings_cls)
+                self.values = values
+                self.delay = delay
+
+            def get_field_value(self, field, field_name):
+                return None, field_name, False
+
+            def __call__(self):
+                time.sleep(self.delay)
+                return self.values
+
+        class FirstSource(StaticSource):
+            pass
+
+        class SecondSource(StaticSource):
+            pass
+
+        class Nested(BaseModel):
+            a: int = 0
+            b: int = 0
+
+        class TestConfig(ConfigModel):
+            nested: Nested = Nested()
+            name: str = ""
+
+            @classmethod
+            def add_settings_sources(cls, settings_cls):
+                return (
+                    FirstSource(settings_cls, {"nested": {"a": 1}}),
+                    SecondSource(
+                        settings_cls, {"nested": {"a": 2, "b": 2}, "name": "x"}, 0.05
+                    ),
+                )
+
+        class TestSettings(SettingsManager):
+            data: TestConfig
+
+        settings = TestSettings().load(allow_reconfigure=False, profile=True)
+        profile = settings.last_profile
+        assert profile
+        self.assertEqual(profile.generation, 1)
+        self.assertEqual(profile.slowest_sources(1)[0].name, "SecondSource")
+        self.assertEqual((settings.data.nested.a, settings.data.nested.b), (1, 2))
+        self.assertEqual(profile.provenance["nested.a"], "FirstSource")
+        self.assertEqual(profile.provenance["nested.b"], "SecondSource")
+        self.assertEqual(profile.provenance["name"], "SecondSource")
+        self.assertEqual(profile.provenance["debug"], "default")
+
+        # Managers that profile their loads by default keep doing so
+        class ProfiledSettings(TestSettings):
+            profile_loads = True
+
+        settings = ProfiledSettings().load(allow_reconfigure=False)
+        self.assertNotNone(settings.last_profile)
+        settings = ProfiledSettings().load(allow_reconfigure=False, profile=False)
+        self.assertNone(settings.last_profile)
+
+        # Profiling without a settings manager that profiles its loads
+        settings = TestSettings().load(allow_reconfigure=False)
+        self.assertNone(settings.last_profile)
+        self.assertEqual(settings.profile_load().provenance["nested.a"], "FirstSource")
+
+    def test_parsed_file_cache(self, tmp_path):
+        ini_file = tmp_path / "settings.ini"
+        ini_file.write_text("[DEFAULT]\nshared = 1\n\n[section]\nkey = value\n")
+
+        cache = ParsedFileCache()
+        parses = []
+
+        def parse(path):
+            parses.append(path)
+            return IniSettingsSource(ConfigModel, files=[path]).loaded_config
+
+        self.assertEqual(cache.get(ini_file, parse), {"section": ["key", "shared"]})
+        self.assertEqual(cache.get(ini_file, parse), {"section": ["key", "shared"]})
+        self.assertEqual(len(parses), 1)
+
+        # A change to the file is parsed again
+        ini_file.write_text("[section]\nkey = value\nother = value\n")
+        self.assertEqual(cache.get(ini_file, parse), {"section": ["key", "other"]})
+        self.assertEqual(
+            cache.stats().to_dict(), {"hits": 1, "misses": 2, "entries": 1}
+        )
+
+        # Missing files are not cached
+        cache.get(tmp_path / "missing.ini", lambda path: {})
+        self.assertEqual(cache.stats().entries, 1)
+
+    def test_json_and_toml_sources(self, tmp_path):
+        json_file = tmp_path / "settings.json"
+        json_file.write_text(
+            '{"app": {"name": "json", "server": {"host": "0.0.0.0", "port": 80}}}'
+        )
+        override_file = tmp_path / "override.json"
+        override_file.write_text('{"app": {"server": {"port": 8080}}}')
+        toml_file = tmp_path / "pyproject.toml"
+        toml_file.write_text(
+            '[tool.myapp]\nname = "toml"\n\n'
+            '[tool.myapp.server]\nhost = "127.0.0.1"\nport = 8000\n'
+        )
+
+        class ServerConfig(BaseModel):
+            host: str = ""
+            port: int = 0
+
+        class AppConfig(ConfigModel):
+            name: str = ""
+            server: ServerConfig = ServerConfig()
+
+        class JsonConfig(AppConfig):
+            model_config = ConfigModelConfigDict(
+                json_files=[str(json_file), str(override_file)], json_section="app"
+            )
+
+            @classmethod
+            def add_settings_sources(cls, settings_cls):
+                return (JsonSettingsSource(settings_cls),)
+
+        class TomlConfig(AppConfig):
+            @classmethod
+            def add_settings_sources(cls, settings_cls):
+                return (
+                    TomlSettingsSource(
+                        settings_cls, files=[toml_file], section="tool.myapp"
+                    ),
+                )
+
+        class JsonSettings(SettingsManager):
+            data: JsonConfig
+
+        class TomlSettings(SettingsManager):
+            data: TomlConfig
+
+        data = JsonSettings().load(allow_reconfigure=False).data
+        self.assertEqual(
+            (data.name, data.server.host, data.server.port), ("json", "0.0.0.0", 8080)
+        )
+        data = TomlSettings().load(allow_reconfigure=False).data
+        self.assertEqual(
+            (data.name, data.server.host, data.server.port),
+            ("toml", "127.0.0.1", 8000),
+        )
+        self.assertEqual(
+            TomlSettingsSource(TomlConfig, files=[toml_file]).file_paths(), [toml_file]
+        )
+
+    def test_reuse_unchanged_sections(self, tmp_path):
+        settings_file = tmp_path / "settings.json"
+        settings_file.write_text(
+            '{"name": "a", "server": {"host": "0.0.0.0", "port": 80}, '
+            '"cache": {"host": "localhost", "port": 6379}}'
+        )
+
+        class ServerConfig(BaseModel):
+            host: str = ""
+            port: int = 0
+
+        class ReuseConfig(ConfigModel):
+            model_config = ConfigModelConfigDict(json_files=[str(settings_file)])
+
+            name: str = ""
+            server: ServerConfig = ServerConfig()
+            cache: ServerConfig = ServerConfig()
+
+            @classmethod
+            def add_settings_sources(cls, settings_cls):
+                return (JsonSettingsSource(settings_cls),)
+
+        class ReuseSettings(SettingsManager):
+            data: ReuseConfig
+            reuse_unchanged_sections = True
+
+        settings = ReuseSettings().load(allow_reconfigure=False, profile=True)
+        previous = settings.data
+        self.assertEqual(settings.last_profile.reused_fields, [])
+
+        settings_file.write_text(
+            '{"name": "bb", "server": {"host": "0.0.0.0", "port": 80}, '
+            '"cache": {"host": "localhost", "port": 6380}}'
+        )
+        transaction = settings.reconfigure()
+        self.assertEqual(settings.data.name, "bb")
+        self.assertEqual(settings.data.server is previous.server, True)
+        self.assertEqual(settings.data.cache is previous.cache, False)
+        self.assertEqual(settings.data.cache.port, 6380)
+        self.assertEqual(settings.last_profile.kind, "reload")
+        self.assertEqual(settings.last_profile.reused_fields, ["server"])
+        self.assertEqual(transaction.profile["reused_fields"], ["server"])
+        self.assertEqual(transaction.profile["generation"], 2)
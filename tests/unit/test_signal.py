@@ -0,0 +1,245 @@
+import asyncio
+import gc
+import os
+import signal
+import threading
+
+import pytest
+
+from bingqilin.signal import (
+    DispatchJobStatus,
+    DuplicateHandlerError,
+    SignalHandlerDispatcher,
+)
+from tests.common import BaseTestCase
+
+
+class TestSignalHandlerDispatcher(BaseTestCase):
+    def make_dispatcher(self) -> SignalHandlerDispatcher:
+        dispatcher = SignalHandlerDispatcher()
+        dispatcher.handlers = {}
+        return dispatcher
+
+    def test_dispatch_coalesces_requests(self):
+        dispatcher = self.make_dispatcher()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def handler():
+            calls.append(threading.current_thread().name)
+            started.set()
+            release.wait(5)
+
+        dispatcher.add_handler(signal.SIGUSR2, handler)
+        first = dispatcher.request_dispatch(signal.SIGUSR2)
+        started.wait(5)
+        self.assertEqual(first.status, DispatchJobStatus.RUNNING)
+
+        # Requests made while the first job runs are coalesced into one more job
+        second = dispatcher.request_dispatch(signal.SIGUSR2)
+        third = dispatcher.request_dispatch(signal.SIGUSR2)
+        self.assertEqual(second, third)
+        self.assertEqual(second.requests, 2)
+
+        release.set()
+        second.wait(5)
+        self.assertEqual(first.status, DispatchJobStatus.SUCCEEDED)
+        self.assertEqual(second.status, DispatchJobStatus.SUCCEEDED)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(dispatcher.get_job(first.id), first)
+        self.assertEqual(calls, ["bingqilin-dispatch_0"] * 2)
+
+    def test_failed_job(self):
+        dispatcher = self.make_dispatcher()
+
+        def handler():
+            raise RuntimeError("Bad config")
+
+        dispatcher.add_handler(signal.SIGUSR2, handler)
+        job = dispatcher.request_dispatch(signal.SIGUSR2)
+        job.wait(5)
+        self.assertEqual(job.status, DispatchJobStatus.FAILED)
+        report = job.to_dict()["handlers"][0]
+        self.assertEqual(report["success"], False)
+        self.assertEqual(report["error"], "RuntimeError('Bad config')")
+        self.assertEqual(job.error, f"Handlers failed: {report['name']}")
+
+    def test_handler_groups(self):
+        dispatcher = self.make_dispatcher()
+        events = []
+        barrier = threading.Barrier(2, timeout=5)
+
+        def make_handler(name):
+            def handler():
+                if name.startswith("context"):
+                    # Both handlers in the group have to be running at the same time
+                    barrier.wait()
+                events.append(name)
+                if name == "context_a":
+                    raise RuntimeError("Failed")
+
+            handler.__qualname__ = name
+            return handler
+
+        dispatcher.add_handler(
+            signal.SIGUSR2, make_handler("context_a"), group="contexts"
+        )
+        dispatcher.add_handler(
+            signal.SIGUSR2, make_handler("context_b"), group="contexts"
+        )
+        dispatcher.add_handler(signal.SIGUSR2, make_handler("other"))
+        dispatcher.add_handler(
+            signal.SIGUSR2, make_handler("settings"), group="settings"
+        )
+
+        reports = dispatcher.dispatch_handlers(signal.SIGUSR2)
+        self.assertEqual(events[:2], ["settings", "other"])
+        self.assertEqual(sorted(events[2:]), ["context_a", "context_b"])
+        self.assertEqual(
+            [(r.name, r.group, r.priority, r.success) for r in reports],
+            [
+                ("settings", "settings", 0, True),
+                ("other", "default", 50, True),
+                ("context_a", "contexts", 100, False),
+                ("context_b", "contexts", 100, True),
+            ],
+        )
+
+    def test_signal_through_event_loop(self):
+        dispatcher = self.make_dispatcher()
+        loop_threads = []
+
+        async def handler():
+            loop_threads.append(threading.current_thread())
+
+        dispatcher.add_handler(signal.SIGUSR2, handler)
+
+        async def main():
+            dispatcher.attach_loop()
+            try:
+                os.kill(os.getpid(), signal.SIGUSR2)
+                for _ in range(100):
+                    await asyncio.sleep(0.01)
+                    if dispatcher.jobs and list(dispatcher.jobs.values())[-1].done:
+                        break
+            finally:
+                dispatcher.detach_loop()
+
+        asyncio.run(main())
+        # Coroutine handlers run on the attached loop
+        self.assertEqual(loop_threads, [threading.main_thread()])
+
+    def test_handler_registry(self):
+        dispatcher = self.make_dispatcher()
+
+        class Owner:
+            name = "owner"
+
+            def reload(self):
+                return "reloaded"
+
+        owner = Owner()
+        # Registering the same bound method again replaces the registration
+        dispatcher.add_handler(signal.SIGUSR2, owner.reload)
+        dispatcher.add_handler(signal.SIGUSR2, owner.reload, group="settings")
+        self.assertEqual(dispatcher.count_handlers(signal.SIGUSR2), 1)
+        self.assertEqual(
+            dispatcher.list_handlers(signal.SIGUSR2),
+            {
+                signal.SIGUSR2: [
+                    {
+                        "name": "owner.reload",
+                        "group": "settings",
+                        "priority": 0,
+                        "weak": True,
+                        "alive": True,
+                    }
+                ]
+            },
+        )
+
+        with pytest.raises(DuplicateHandlerError):
+            dispatcher.add_handler(
+                signal.SIGUSR2, owner.reload, raise_on_duplicate=True
+            )
+
+        # Another instance with the same method is a different handler
+        other = Owner()
+        dispatcher.add_handler(signal.SIGUSR2, other.reload)
+        self.assertEqual(dispatcher.count_handlers(), 2)
+
+        # Handlers don't keep their owners alive
+        del owner, other
+        gc.collect()
+        self.assertEqual(dispatcher.count_handlers(signal.SIGUSR2), 0)
+        self.assertEqual(dispatcher.dispatch_handlers(signal.SIGUSR2), [])
+
+        # Builtins are held strongly, even though they have a `__self__`
+        registration = dispatcher.add_handler(signal.SIGUSR2, print)
+        self.assertEqual(registration.weak, False)
+
+        # Bound methods are held weakly even if their owner is falsy
+        class EmptyOwner:
+            name = "empty"
+
+            def __len__(self):
+                return 0
+
+            def reload(self):
+                return "reloaded"
+
+        empty = EmptyOwner()
+        registration = dispatcher.add_handler(signal.SIGUSR2, empty.reload)
+        self.assertEqual(registration.weak, True)
+        self.assertEqual(registration.to_dict()["name"], "empty.reload")
+        del empty
+        gc.collect()
+        self.assertEqual(dispatcher.count_handlers(signal.SIGUSR2), 1)
+
+    def test_remove_handler_keeps_signal_installed(self):
+        dispatcher = self.make_dispatcher()
+        previous = signal.signal(signal.SIGUSR2, signal.SIG_DFL)
+        try:
+            # Removing from a signal without handlers doesn't register the signal
+            dispatcher.remove_handler(signal.SIGUSR2, print)
+            self.assertEqual(signal.SIGUSR2 in dispatcher.handlers, False)
+            dispatcher.add_handler(signal.SIGUSR2, print)
+            self.assertEqual(
+                signal.getsignal(signal.SIGUSR2), dispatcher._handle_signal
+            )
+
+            # Removing the last handler lets the next one install the signal again
+            dispatcher.remove_handler(signal.SIGUSR2, print)
+            self.assertEqual(signal.SIGUSR2 in dispatcher.handlers, False)
+            signal.signal(signal.SIGUSR2, signal.SIG_DFL)
+            dispatcher.add_handler(signal.SIGUSR2, print)
+            self.assertEqual(
+                signal.getsignal(signal.SIGUSR2), dispatcher._handle_signal
+            )
+        finally:
+            signal.signal(signal.SIGUSR2, previous)
+
+    def test_coroutine_handlers_without_loop(self):
+        dispatcher = self.make_dispatcher()
+
+        async def handler():
+            return threading.current_thread().name
+
+        dispatcher.add_handler(signal.SIGUSR2, handler)
+        # The dispatcher's thread runs the handler on a loop of its own
+        job = dispatcher.request_dispatch(signal.SIGUSR2)
+        job.wait(5)
+        self.assertEqual(job.status, DispatchJobStatus.SUCCEEDED)
+        self.assertEqual(job.handlers[0].result.startswith("bingqilin-dispatch"), True)
+
+        # Anywhere else, a loop has to be attached
+        async def dispatch_in_loop():
+            return dispatcher.dispatch_handlers(signal.SIGUSR2)
+
+        for reports in (
+            dispatcher.dispatch_handlers(signal.SIGUSR2),
+            asyncio.run(dispatch_in_loop()),
+        ):
+            self.assertEqual(reports[0].success, False)
+            self.assertEqual("attach_loop()" in (reports[0].error or ""), True)